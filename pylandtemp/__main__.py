@@ -0,0 +1,5 @@
+import sys
+
+from pylandtemp.cli import main
+
+sys.exit(main())
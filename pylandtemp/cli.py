@@ -0,0 +1,257 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from pylandtemp.pipeline import ArraySink, ChunkedStoreSink, TiledPipeline
+from pylandtemp.pipeline.checkpoint import Checkpoint, CheckpointSink
+from pylandtemp.pipeline.tiles import generate_tiles
+
+SCENE_OPTIONS = ("lst_method", "emissivity_method", "unit", "quantize")
+
+
+def load_manifest(path: str) -> list:
+    """Reads a JSON manifest of scenes.
+
+    {
+        "lst_method": "mono-window", "emissivity_method": "avdan", "unit": "kelvin", "quantize": false,
+        "scenes": [
+            {
+                "id": "LC08_L1TP_190054_20220101",
+                "bands": {"landsat_band_10": "b10.npy", "landsat_band_4": "b4.npy", "landsat_band_5": "b5.npy"},
+                "output": "lst.npy"
+            }
+        ]
+    }
+
+    Top level options are defaults that any scene can override. Bands are .npy files,
+    read through memory maps. The output is a .npy file or a chunked store,
+    {"store": "<directory>", "overviews": [2, 4]}. Relative paths are relative to the
+    manifest.
+
+    Args:
+        path (str): Manifest file
+
+    Returns:
+        list[dict]: Scenes with resolved paths and options
+    """
+    with open(path) as f:
+        manifest = json.load(f)
+    root = os.path.dirname(os.path.abspath(path))
+    defaults = {"emissivity_method": "avdan", "unit": "kelvin", "quantize": False}
+    defaults.update({key: manifest[key] for key in SCENE_OPTIONS if key in manifest})
+
+    scenes, ids = [], set()
+    for index, entry in enumerate(manifest["scenes"]):
+        scene = {
+            **defaults,
+            **{key: entry[key] for key in SCENE_OPTIONS if key in entry},
+        }
+        if "lst_method" not in scene:
+            raise ValueError(f"No lst_method given for scene {index} of the manifest")
+        scene["id"] = str(entry.get("id", index))
+        if scene["id"] in ids:
+            raise ValueError(f"Duplicate scene id in the manifest: {scene['id']}")
+        ids.add(scene["id"])
+        scene["bands"] = {
+            name: os.path.join(root, band) for name, band in entry["bands"].items()
+        }
+        output = entry["output"]
+        if isinstance(output, str):
+            scene["output"] = {"path": os.path.join(root, output)}
+        else:
+            scene["output"] = {**output, "store": os.path.join(root, output["store"])}
+        scenes.append(scene)
+    return scenes
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        checkpoint: Checkpoint,
+        tile_shape: tuple = (1024, 1024),
+        jobs: int = 1,
+        threads: int = None,
+    ):
+        """Processes the scenes of a manifest, skipping the scenes and tiles that the
+            checkpoint records as completed.
+
+        Args:
+            checkpoint (Checkpoint): Checkpoint of the run
+            tile_shape (tuple, optional): Tile shape of the pipelines. Defaults to (1024, 1024).
+            jobs (int, optional): Number of scenes processed at the same time. Defaults to 1.
+            threads (int, optional): Threads computing the tiles of a scene.
+        """
+        self.checkpoint = checkpoint
+        self.tile_shape = tuple(tile_shape)
+        self.jobs = jobs
+        self.threads = threads
+
+    def _sink(self, scene: dict, pipeline: TiledPipeline, shape: tuple, resume: bool):
+        output = scene["output"]
+        if "store" in output:
+            return ChunkedStoreSink(
+                output["store"], overviews=output.get("overviews", ())
+            )
+        mode = "r+" if resume and os.path.exists(output["path"]) else "w+"
+        return ArraySink(
+            np.lib.format.open_memmap(
+                output["path"], mode=mode, dtype=pipeline.dtype, shape=shape
+            )
+        )
+
+    def process(self, scene: dict) -> dict:
+        """Processes one scene, returns its summary"""
+        if self.checkpoint.is_done(scene["id"]):
+            return {"id": scene["id"], "status": "skipped"}
+
+        start = time.perf_counter()
+        try:
+            pipeline = TiledPipeline(
+                scene["lst_method"],
+                scene["emissivity_method"],
+                unit=scene["unit"],
+                tile_shape=self.tile_shape,
+                max_workers=self.threads,
+                quantize=scene["quantize"],
+            )
+            bands = {
+                name: np.load(path, mmap_mode="r")
+                for name, path in scene["bands"].items()
+            }
+            shape = pipeline.scene_shape(**bands)
+            config = {
+                **{key: scene[key] for key in SCENE_OPTIONS},
+                "tile_shape": list(self.tile_shape),
+                "output": scene["output"],
+            }
+            completed = self.checkpoint.completed_tiles(scene["id"], config)
+            tiles = [
+                tile
+                for tile in generate_tiles(shape, self.tile_shape)
+                if tile not in completed
+            ]
+            sink = self._sink(scene, pipeline, shape, resume=bool(completed))
+            self.checkpoint.start_scene(scene["id"], config)
+            result = pipeline(
+                sink=CheckpointSink(sink, self.checkpoint, scene["id"]),
+                tiles=tiles,
+                **bands,
+            )
+            if isinstance(result, np.memmap):
+                result.flush()
+            del result, sink
+        except Exception as error:
+            message = f"{type(error).__name__}: {error}"
+            self.checkpoint.scene_failed(scene["id"], message)
+            return {"id": scene["id"], "status": "failed", "error": message}
+
+        summary = {
+            "pixels": shape[0] * shape[1],
+            "tiles": len(tiles),
+            "resumed_tiles": len(completed),
+            "seconds": time.perf_counter() - start,
+        }
+        self.checkpoint.scene_done(scene["id"], **summary)
+        return {"id": scene["id"], "status": "done", **summary}
+
+    def run(self, scenes: list) -> dict:
+        """Processes scenes, returns the summary of the run"""
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            results = list(executor.map(self.process, scenes))
+        seconds = time.perf_counter() - start
+
+        done = [result for result in results if result["status"] == "done"]
+        pixels = sum(result["pixels"] for result in done)
+        return {
+            "scenes": len(results),
+            "done": len(done),
+            "skipped": sum(result["status"] == "skipped" for result in results),
+            "failed": [result for result in results if result["status"] == "failed"],
+            "tiles": sum(result["tiles"] for result in done),
+            "resumed_tiles": sum(result["resumed_tiles"] for result in done),
+            "pixels": pixels,
+            "seconds": seconds,
+            "scene_seconds": [result["seconds"] for result in done],
+            "pixels_per_second": pixels / seconds if seconds > 0 else 0.0,
+        }
+
+
+def format_summary(summary: dict) -> str:
+    lines = [
+        f"Scenes: {summary['scenes']} ({summary['done']} processed, "
+        f"{summary['skipped']} already done, {len(summary['failed'])} failed)",
+        f"Tiles: {summary['tiles']} computed, {summary['resumed_tiles']} resumed from checkpoint",
+        f"Pixels: {summary['pixels']} in {summary['seconds']:.2f} s "
+        f"({summary['pixels_per_second'] / 1e6:.2f} Mpixel/s)",
+    ]
+    if summary["scene_seconds"]:
+        times = np.array(summary["scene_seconds"])
+        lines.append(
+            f"Seconds per scene: mean {times.mean():.2f}, min {times.min():.2f}, max {times.max():.2f}"
+        )
+    for failure in summary["failed"]:
+        lines.append(f"Failed {failure['id']}: {failure['error']}")
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="pylandtemp",
+        description="Compute land surface temperature for the scenes of a manifest",
+    )
+    parser.add_argument("manifest", help="JSON manifest of scenes")
+    parser.add_argument(
+        "--checkpoint",
+        help="Checkpoint file used to resume an interrupted run. "
+        "Defaults to <manifest>.checkpoint",
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=1, help="Scenes processed at the same time"
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="Threads computing the tiles of a scene",
+    )
+    parser.add_argument(
+        "--tile-size",
+        type=int,
+        nargs=2,
+        default=(1024, 1024),
+        metavar=("ROWS", "COLS"),
+        help="Tile shape",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore and replace an existing checkpoint",
+    )
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+    scenes = load_manifest(args.manifest)
+    checkpoint_path = args.checkpoint or f"{args.manifest}.checkpoint"
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    checkpoint = Checkpoint(checkpoint_path)
+    try:
+        runner = BatchRunner(checkpoint, args.tile_size, args.jobs, args.threads)
+        summary = runner.run(scenes)
+    finally:
+        checkpoint.close()
+    print(format_summary(summary))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""xarray integration of the public functions.
+
+The functions of this module take xarray.DataArray bands, backed by numpy or dask arrays
+(e.g opened with xarray.open_dataarray(path, chunks=...)), and return DataArrays with the
+dimensions and coordinates of the first band. Dask backed bands give lazy results, which
+are computed chunk by chunk with .compute(), e.g on a local multi-process scheduler with
+.compute(scheduler='processes').
+
+Requires xarray (pip install pylandtemp[xarray,dask]).
+"""
+
+import functools
+
+import xarray as xr
+
+from pylandtemp import pylandtemp
+
+
+def _unwrap(value):
+    return value.data if isinstance(value, xr.DataArray) else value
+
+
+def _preserve_coordinates(function):
+    @functools.wraps(function)
+    def wrapped(*args, **kwargs):
+        template = next(
+            (
+                value
+                for value in list(args) + list(kwargs.values())
+                if isinstance(value, xr.DataArray)
+            ),
+            None,
+        )
+        result = function(
+            *[_unwrap(value) for value in args],
+            **{key: _unwrap(value) for key, value in kwargs.items()},
+        )
+        if template is None:
+            return result
+
+        def wrap(image, name):
+            if image is None:
+                return None
+            return xr.DataArray(
+                image, coords=template.coords, dims=template.dims, name=name
+            )
+
+        if isinstance(result, tuple):
+            return tuple(
+                wrap(image, f"{function.__name__}_{band}")
+                for image, band in zip(result, (10, 11))
+            )
+        return wrap(result, function.__name__)
+
+    return wrapped
+
+
+split_window = _preserve_coordinates(pylandtemp.split_window)
+single_window = _preserve_coordinates(pylandtemp.single_window)
+emissivity = _preserve_coordinates(pylandtemp.emissivity)
+ndvi = _preserve_coordinates(pylandtemp.ndvi)
+brightness_temperature = _preserve_coordinates(pylandtemp.brightness_temperature)
@@ -1,5 +1,6 @@
 import numpy as np
 
+from pylandtemp.masks import apply_mask
 from pylandtemp.utils import rescale_band, cavity_effect, fractional_vegetation_cover
 
 
@@ -43,15 +44,43 @@ class Emissivity:
 
         emm_10, emm_11 = self._compute_emissivity()
         mask = emm_10 == 0
-        emm_10[mask] = np.nan
-        if emm_11 is not None:
-            emm_11[mask] = np.nan
-        return emm_10, emm_11
+        masked_emm_10 = apply_mask(emm_10, mask)
+        if emm_11 is emm_10:
+            emm_11 = masked_emm_10
+        elif emm_11 is not None:
+            emm_11 = apply_mask(emm_11, mask)
+        return masked_emm_10, emm_11
+
+    def _fill_landcover(self, values: dict) -> np.ndarray:
+        """Builds an image holding a value per landcover class (NaN outside the classes)
+
+        Args:
+            values (dict): Maps 'baresoil', 'vegetation' and 'mixed' to functions of a selector.
+                           The selector restricts an image to the pixels of the class (scalars
+                           are returned unchanged) and the function returns the value of these pixels.
+
+        Returns:
+            np.ndarray: Image of the landcover values
+        """
+        if isinstance(self.ndvi, np.ndarray):
+            image = np.full_like(self.ndvi, np.nan)
+            for landcover, indices in self._get_landcover_mask_indices().items():
+                image[indices] = values[landcover](
+                    lambda band: band[indices] if np.ndim(band) else band
+                )
+            return image
+
+        # Chunked arrays (e.g dask) cannot be assigned by index, classes are selected functionally
+        image = np.nan
+        for landcover, mask in self._get_land_surface_mask().items():
+            image = np.where(mask, values[landcover](lambda band: band), image)
+        return image
 
     def _compute_emissivity(self):
         raise NotImplementedError("No concrete implementation of emissivity method yet")
 
     def _get_land_surface_mask(self):
+        # Plain bool masks: they only live until their indices are taken
         mask_baresoil = (self.ndvi >= self.ndvi_min) & (
             self.ndvi < self.baresoil_ndvi_max
         )
@@ -72,9 +101,9 @@ class Emissivity:
         vegetation, baresoil and mixed"
         """
         masks = self._get_land_surface_mask()
-        baresoil = np.where(masks["baresoil"])
-        vegetation = np.where(masks["vegetation"])
-        mixed = np.where(masks["mixed"])
+        baresoil = np.nonzero(masks["baresoil"])
+        vegetation = np.nonzero(masks["vegetation"])
+        mixed = np.nonzero(masks["mixed"])
         return {"baresoil": baresoil, "vegetation": vegetation, "mixed": mixed}
 
     def _compute_fvc(self):
@@ -90,18 +119,16 @@ class ComputeMonoWindowEmissivity(Emissivity):
     emissivity_veg_11 = None
 
     def _compute_emissivity(self) -> np.ndarray:
-        emm = np.empty_like(self.ndvi)
-        landcover_mask_indices = self._get_landcover_mask_indices()
-
-        # Baresoil value assignment
-        emm[landcover_mask_indices["baresoil"]] = self.emissivity_soil_10
-        # Vegetation value assignment
-        emm[landcover_mask_indices["vegetation"]] = self.emissivity_veg_10
-        # Mixed value assignment
-        emm[landcover_mask_indices["mixed"]] = (
-            0.004
-            * (((self.ndvi[landcover_mask_indices["mixed"]] - 0.2) / (0.5 - 0.2)) ** 2)
-        ) + 0.986
+        emm = self._fill_landcover(
+            {
+                "baresoil": lambda select: select(self.emissivity_soil_10),
+                "vegetation": lambda select: select(self.emissivity_veg_10),
+                "mixed": lambda select: (
+                    0.004 * (((select(self.ndvi) - 0.2) / (0.5 - 0.2)) ** 2)
+                )
+                + 0.986,
+            }
+        )
         return emm, emm
 
 
@@ -134,39 +161,29 @@ class ComputeEmissivityNBEM(Emissivity):
             )
 
         self.red_band = rescale_band(self.red_band)
-        landcover_mask_indices = self._get_landcover_mask_indices()
         fractional_veg_cover = self._compute_fvc()
 
         def calc_emissivity_for_band(
-            image,
             emissivity_veg,
             emissivity_soil,
             cavity_effect,
             red_band_coeff_a=None,
             red_band_coeff_b=None,
         ):
-            image[landcover_mask_indices["baresoil"]] = red_band_coeff_a - (
-                red_band_coeff_b * self.red_band[landcover_mask_indices["baresoil"]]
+            return self._fill_landcover(
+                {
+                    "baresoil": lambda select: red_band_coeff_a
+                    - (red_band_coeff_b * select(self.red_band)),
+                    "mixed": lambda select: (
+                        select(emissivity_veg) * select(fractional_veg_cover)
+                    )
+                    + (select(emissivity_soil) * (1 - select(fractional_veg_cover)))
+                    + select(cavity_effect),
+                    "vegetation": lambda select: select(emissivity_veg)
+                    + select(cavity_effect),
+                }
             )
 
-            image[landcover_mask_indices["mixed"]] = (
-                (emissivity_veg * fractional_veg_cover[landcover_mask_indices["mixed"]])
-                + (
-                    emissivity_soil
-                    * (1 - fractional_veg_cover[landcover_mask_indices["mixed"]])
-                )
-                + cavity_effect[landcover_mask_indices["mixed"]]
-            )
-
-            image[landcover_mask_indices["vegetation"]] = (
-                emissivity_veg + cavity_effect[landcover_mask_indices["vegetation"]]
-            )
-            return image
-
-        emissivity_band_10 = np.empty_like(self.ndvi)
-        emissivity_band_11 = np.empty_like(self.ndvi)
-        frac_vegetation_cover = self._compute_fvc()
-
         cavity_effect_10 = cavity_effect(
             self.emissivity_veg_10, self.emissivity_soil_10, fractional_veg_cover
         )
@@ -175,7 +192,6 @@ class ComputeEmissivityNBEM(Emissivity):
         )
 
         emissivity_band_10 = calc_emissivity_for_band(
-            emissivity_band_10,
             self.emissivity_veg_10,
             self.emissivity_soil_10,
             cavity_effect_10,
@@ -183,7 +199,6 @@ class ComputeEmissivityNBEM(Emissivity):
             red_band_coeff_b=0.047,
         )
         emissivity_band_11 = calc_emissivity_for_band(
-            emissivity_band_11,
             self.emissivity_veg_11,
             self.emissivity_soil_11,
             cavity_effect_11,
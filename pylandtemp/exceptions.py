@@ -1,4 +1,11 @@
-__all__ = ["assert_required_keywords_provided", "assert_temperature_unit"]
+__all__ = [
+    "InvalidMaskError",
+    "KeywordArgumentError",
+    "InputShapesNotEqual",
+    "InvalidMethodRequested",
+    "assert_required_keywords_provided",
+    "assert_temperature_unit",
+]
 
 
 class InvalidMaskError(Exception):
@@ -42,6 +49,6 @@ def assert_required_keywords_provided(keywords, **kwargs):
             raise KeywordArgumentError(message)
 
 
-def assert_temperature_unit():
+def assert_temperature_unit(unit):
     if unit not in ["celcius", "kelvin"]:
         raise ValueError("Temperature unit shoould be either Kelvin or Celcius")
@@ -0,0 +1,400 @@
+import numpy as np
+
+# Number of image rows expanded to bytes at once when a compact mask is applied or converted
+BLOCK_ROWS = 256
+
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def _row_blocks(rows: int, block_rows: int = BLOCK_ROWS):
+    for row in range(0, rows, block_rows):
+        yield row, min(rows, row + block_rows)
+
+
+def _concatenate_spans(shape: tuple, spans: list):
+    if not spans:
+        return RunLengthMask(shape, [], [], [])
+    return RunLengthMask(shape, *(np.concatenate(parts) for parts in zip(*spans)))
+
+
+def _spans_from_block(block: np.ndarray, row_offset: int = 0):
+    """Returns the (rows, starts, stops) of the runs of True values in a bool block"""
+    # Rows are laid end to end with a False separator after each of them, so that a
+    # single pass finds every change of value: run starts and stops alternate
+    width = block.shape[1] + 1
+    padded = np.zeros(block.shape[0] * width + 1, dtype=bool)
+    padded[1:].reshape(block.shape[0], width)[:, :-1] = block
+    changes = np.flatnonzero(padded[1:] != padded[:-1])
+    rows, starts = np.divmod(changes[0::2], width)
+    return rows + row_offset, starts, changes[1::2] - rows * width
+
+
+def _run_pixels(rows: np.ndarray, starts: np.ndarray, stops: np.ndarray):
+    """Returns the (rows, columns) indices of the pixels of runs, like np.nonzero"""
+    lengths = (stops - starts).astype(np.intp)
+    # Column of every pixel: the start of its run plus its offset within the run
+    offsets = np.arange(lengths.sum()) - np.repeat(
+        np.cumsum(lengths) - lengths, lengths
+    )
+    return np.repeat(rows, lengths), np.repeat(starts, lengths) + offsets
+
+
+class CompactMask:
+    """Parent class of the compact mask representations.
+
+    A mask is True where the output should be masked out (NaN), like the bool masks
+    used throughout pylandtemp. Compact masks never hold one byte per pixel: they are
+    expanded to bool a block of rows at a time when they are applied to an image.
+    """
+
+    shape = None
+    # Makes numpy defer to the reflected operators, e.g for bool_array & compact_mask
+    __array_ufunc__ = None
+
+    @property
+    def ndim(self) -> int:
+        return 2
+
+    @property
+    def nbytes(self) -> int:
+        raise NotImplementedError("No concrete implementation of nbytes yet")
+
+    def _block(self, row_start: int, row_stop: int) -> np.ndarray:
+        """Expands rows [row_start, row_stop) of the mask to a bool array"""
+        raise NotImplementedError("No concrete implementation of _block yet")
+
+    def to_bitmask(self):
+        raise NotImplementedError("No concrete implementation of to_bitmask yet")
+
+    def apply(self, image: np.ndarray, value=np.nan) -> np.ndarray:
+        """Sets image to value where the mask is True (in place)
+
+        Args:
+            image (np.ndarray): Image of the same shape as the mask
+            value (optional): Value written to masked pixels. Defaults to np.nan.
+
+        Returns:
+            np.ndarray: The modified image
+        """
+        if tuple(image.shape) != self.shape:
+            raise ValueError(
+                f"Mask of shape {self.shape} cannot be applied to image of shape {image.shape}"
+            )
+        for row_start, row_stop in _row_blocks(self.shape[0]):
+            image[row_start:row_stop][self._block(row_start, row_stop)] = value
+        return image
+
+    def nonzero(self) -> tuple:
+        """Returns the (rows, columns) indices of the masked pixels, like np.nonzero"""
+        rows, cols = [np.empty(0, dtype=np.intp)], [np.empty(0, dtype=np.intp)]
+        for row_start, row_stop in _row_blocks(self.shape[0]):
+            block_rows, block_cols = np.nonzero(self._block(row_start, row_stop))
+            rows.append(block_rows + row_start)
+            cols.append(block_cols)
+        return np.concatenate(rows), np.concatenate(cols)
+
+    def count(self) -> int:
+        """Number of masked pixels"""
+        return self.to_bitmask().count()
+
+    def any(self) -> bool:
+        return self.count() > 0
+
+    def __array__(self, dtype=None, copy=None):
+        out = np.empty(self.shape, dtype=bool)
+        for row_start, row_stop in _row_blocks(self.shape[0]):
+            out[row_start:row_stop] = self._block(row_start, row_stop)
+        return out if dtype is None else out.astype(dtype)
+
+    def __and__(self, other):
+        return self.to_bitmask() & other
+
+    def __or__(self, other):
+        return self.to_bitmask() | other
+
+    def __xor__(self, other):
+        return self.to_bitmask() ^ other
+
+    def __invert__(self):
+        return ~self.to_bitmask()
+
+    __rand__ = __and__
+    __ror__ = __or__
+    __rxor__ = __xor__
+
+
+class BitMask(CompactMask):
+    def __init__(self, packed: np.ndarray, shape: tuple):
+        """Mask stored with 1 bit per pixel (rows packed with np.packbits).
+
+        Suited for scattered masks such as cloud masks. Logical operations between
+        bit masks work on the packed bytes directly.
+
+        Args:
+            packed (np.ndarray[uint8]): Packed rows of shape (rows, ceil(columns / 8)).
+                                        Padding bits of the last byte must be 0.
+            shape (tuple): (rows, columns) of the mask
+        """
+        self.shape = tuple(shape)
+        if packed.shape != (self.shape[0], -(-self.shape[1] // 8)):
+            raise ValueError(
+                f"Packed array of shape {packed.shape} does not match mask shape {self.shape}"
+            )
+        self.packed = packed
+
+    @classmethod
+    def from_array(cls, mask: np.ndarray):
+        """Packs a 2-dimensional bool array"""
+        mask = np.asarray(mask, dtype=bool)
+        if mask.ndim != 2:
+            raise ValueError("Mask should be 2-dimensional")
+        return cls(np.packbits(mask, axis=1), mask.shape)
+
+    @classmethod
+    def from_condition(cls, image: np.ndarray, condition):
+        """Builds the mask condition(image) a block of rows at a time
+
+        Args:
+            image (np.ndarray): 2-dimensional image
+            condition (callable): Function returning a bool array for a block of rows of image
+        """
+        packed = np.empty((image.shape[0], -(-image.shape[1] // 8)), dtype=np.uint8)
+        for row_start, row_stop in _row_blocks(image.shape[0]):
+            packed[row_start:row_stop] = np.packbits(
+                condition(image[row_start:row_stop]), axis=1
+            )
+        return cls(packed, image.shape)
+
+    @property
+    def nbytes(self) -> int:
+        return self.packed.nbytes
+
+    def to_bitmask(self):
+        return self
+
+    def count(self) -> int:
+        return int(_POPCOUNT[self.packed].sum(dtype=np.int64))
+
+    def _block(self, row_start: int, row_stop: int) -> np.ndarray:
+        return np.unpackbits(
+            self.packed[row_start:row_stop], axis=1, count=self.shape[1]
+        ).view(bool)
+
+    def __getitem__(self, key):
+        rows, cols = key
+        row_start, row_stop, row_step = rows.indices(self.shape[0])
+        col_start, col_stop, col_step = cols.indices(self.shape[1])
+        if row_step != 1 or col_step != 1:
+            raise IndexError("Only contiguous windows can be selected from a mask")
+        if col_start == 0 and col_stop == self.shape[1]:
+            packed = self.packed[row_start:row_stop]
+            return BitMask(packed, (packed.shape[0], self.shape[1]))
+        return BitMask.from_array(
+            self._block(row_start, row_stop)[:, col_start:col_stop]
+        )
+
+    def _coerce(self, other):
+        if isinstance(other, CompactMask):
+            other = other.to_bitmask()
+        else:
+            other = BitMask.from_array(other)
+        if other.shape != self.shape:
+            raise ValueError(
+                f"Masks should have the same shape: {self.shape}, {other.shape}"
+            )
+        return other
+
+    def _clear_padding(self, packed: np.ndarray) -> np.ndarray:
+        remainder = self.shape[1] % 8
+        if remainder:
+            packed[:, -1] &= np.uint8((0xFF << (8 - remainder)) & 0xFF)
+        return packed
+
+    def __and__(self, other):
+        return BitMask(self.packed & self._coerce(other).packed, self.shape)
+
+    def __or__(self, other):
+        return BitMask(self.packed | self._coerce(other).packed, self.shape)
+
+    def __xor__(self, other):
+        return BitMask(self.packed ^ self._coerce(other).packed, self.shape)
+
+    def __invert__(self):
+        return BitMask(self._clear_padding(~self.packed), self.shape)
+
+    __rand__ = __and__
+    __ror__ = __or__
+    __rxor__ = __xor__
+
+
+class RunLengthMask(CompactMask):
+    def __init__(self, shape: tuple, rows, starts, stops):
+        """Mask stored as runs of masked pixels along the rows.
+
+        Suited for masks made of large contiguous areas, such as the nodata border
+        of a Landsat scene, which take a couple of runs per row.
+
+        Args:
+            shape (tuple): (rows, columns) of the mask
+            rows (array-like[int]): Row of each run, in increasing order
+            starts (array-like[int]): First masked column of each run
+            stops (array-like[int]): Column after the last masked column of each run
+        """
+        self.shape = tuple(shape)
+        self.rows = np.asarray(rows, dtype=np.int32)
+        self.starts = np.asarray(starts, dtype=np.int32)
+        self.stops = np.asarray(stops, dtype=np.int32)
+
+    @classmethod
+    def from_array(cls, mask: np.ndarray):
+        """Run-length encodes a 2-dimensional bool array"""
+        mask = np.asarray(mask, dtype=bool)
+        if mask.ndim != 2:
+            raise ValueError("Mask should be 2-dimensional")
+        spans = [
+            _spans_from_block(mask[row_start:row_stop], row_start)
+            for row_start, row_stop in _row_blocks(mask.shape[0])
+        ]
+        return _concatenate_spans(mask.shape, spans)
+
+    @property
+    def nbytes(self) -> int:
+        return self.rows.nbytes + self.starts.nbytes + self.stops.nbytes
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def count(self) -> int:
+        return int((self.stops - self.starts).sum(dtype=np.int64))
+
+    def to_bitmask(self):
+        packed = np.empty((self.shape[0], -(-self.shape[1] // 8)), dtype=np.uint8)
+        for row_start, row_stop in _row_blocks(self.shape[0]):
+            packed[row_start:row_stop] = np.packbits(
+                self._block(row_start, row_stop), axis=1
+            )
+        return BitMask(packed, self.shape)
+
+    def _block_pixels(self, row_start: int, row_stop: int) -> tuple:
+        """(rows, columns) indices of the masked pixels of rows [row_start, row_stop)"""
+        first, last = np.searchsorted(self.rows, [row_start, row_stop])
+        return _run_pixels(
+            self.rows[first:last] - row_start,
+            self.starts[first:last],
+            self.stops[first:last],
+        )
+
+    def _block(self, row_start: int, row_stop: int) -> np.ndarray:
+        block = np.zeros((row_stop - row_start, self.shape[1]), dtype=bool)
+        block[self._block_pixels(row_start, row_stop)] = True
+        return block
+
+    def apply(self, image: np.ndarray, value=np.nan) -> np.ndarray:
+        if tuple(image.shape) != self.shape:
+            raise ValueError(
+                f"Mask of shape {self.shape} cannot be applied to image of shape {image.shape}"
+            )
+        if len(self) <= 4 * self.shape[0]:
+            # Few long runs, e.g a nodata border: one slice per run
+            for row, start, stop in zip(self.rows, self.starts, self.stops):
+                image[row, start:stop] = value
+            return image
+        # Many short runs: only the masked pixels are touched, a block of rows at a time
+        for row_start, row_stop in _row_blocks(self.shape[0]):
+            image[row_start:row_stop][self._block_pixels(row_start, row_stop)] = value
+        return image
+
+    def nonzero(self) -> tuple:
+        return _run_pixels(self.rows, self.starts, self.stops)
+
+    def __getitem__(self, key):
+        rows, cols = key
+        row_start, row_stop, row_step = rows.indices(self.shape[0])
+        col_start, col_stop, col_step = cols.indices(self.shape[1])
+        if row_step != 1 or col_step != 1:
+            raise IndexError("Only contiguous windows can be selected from a mask")
+        first, last = np.searchsorted(self.rows, [row_start, row_stop])
+        starts = np.clip(self.starts[first:last], col_start, col_stop)
+        stops = np.clip(self.stops[first:last], col_start, col_stop)
+        keep = stops > starts
+        return RunLengthMask(
+            (max(0, row_stop - row_start), max(0, col_stop - col_start)),
+            self.rows[first:last][keep] - row_start,
+            starts[keep] - col_start,
+            stops[keep] - col_start,
+        )
+
+
+def compact_mask(mask: np.ndarray) -> CompactMask:
+    """Converts a bool mask to the smaller of its run-length and bit-packed representations
+
+    Args:
+        mask (np.ndarray[bool]): 2-dimensional mask
+
+    Returns:
+        CompactMask: RunLengthMask or BitMask
+    """
+    run_length = RunLengthMask.from_array(mask)
+    bitmask_nbytes = mask.shape[0] * -(-mask.shape[1] // 8)
+    return (
+        run_length if run_length.nbytes <= bitmask_nbytes else run_length.to_bitmask()
+    )
+
+
+def nodata_mask(image: np.ndarray, nodata=0) -> CompactMask:
+    """Builds the compact mask of the pixels of image equal to nodata, without allocating a
+        full bool image. The validity mask of pylandtemp is nodata_mask(landsat_band_10).
+
+    Args:
+        image (np.ndarray): Image. Images that are not 2-dimensional numpy arrays (e.g dask
+                            arrays) get a plain, possibly lazy, bool mask.
+        nodata (optional): Nodata value. Defaults to 0.
+
+    Returns:
+        CompactMask: RunLengthMask, or BitMask when that is smaller
+    """
+    if not isinstance(image, np.ndarray) or image.ndim != 2:
+        return image == nodata
+    bitmask_nbytes = image.shape[0] * -(-image.shape[1] // 8)
+    spans, nbytes = [], 0
+    for row_start, row_stop in _row_blocks(image.shape[0]):
+        block_spans = _spans_from_block(image[row_start:row_stop] == nodata, row_start)
+        spans.append(block_spans)
+        # rows, starts and stops are stored as int32
+        nbytes += 12 * len(block_spans[0])
+        if nbytes > bitmask_nbytes:
+            return BitMask.from_condition(image, lambda block: block == nodata)
+    return _concatenate_spans(image.shape, spans)
+
+
+def apply_mask(image: np.ndarray, mask, value=np.nan) -> np.ndarray:
+    """Sets image to value where mask is True, for bool or compact masks.
+        numpy images are modified in place. Other arrays (e.g dask arrays) are masked
+        functionally, so callers should always use the returned image.
+
+    Args:
+        image (np.ndarray): Image to mask
+        mask (np.ndarray[bool] or CompactMask): Mask of the same shape as image
+        value (optional): Value written to masked pixels. Defaults to np.nan.
+
+    Returns:
+        np.ndarray: The masked image
+    """
+    if isinstance(mask, CompactMask):
+        return mask.apply(image, value)
+    if not isinstance(image, np.ndarray):
+        return np.where(mask, value, image)
+    image[mask] = value
+    return image
+
+
+def mask_rows(mask, row_start: int, row_stop: int) -> np.ndarray:
+    """Rows [row_start, row_stop) of a bool or compact mask, as a bool array"""
+    if isinstance(mask, CompactMask):
+        return mask._block(row_start, row_stop)
+    return np.asarray(mask[row_start:row_stop])
+
+
+def is_valid_mask(mask) -> bool:
+    """True for bool arrays and compact masks"""
+    return isinstance(mask, CompactMask) or getattr(mask, "dtype", None) == bool
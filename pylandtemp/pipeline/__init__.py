@@ -0,0 +1,20 @@
+from .tiles import Tile, TiledArray, generate_tiles
+from .pipeline import TiledPipeline
+from .sinks import ArraySink, ChunkedArray, ChunkedStore, ChunkedStoreSink
+from .scene import LSTScene, LazyLST
+from .points import sample_points, rowcol_from_xy
+from .service import LSTService, LSTServiceClient, QueueFullError
+from .tileserver import ByteLRUCache, TileServer, encode_png
+from .distributed import JobQueue, SQLiteJobQueue, Worker
+from .checkpoint import Checkpoint, CheckpointSink
+from .composite import CompositeAccumulator, TemporalComposite
+from .climatology import ClimatologySink, ClimatologyStore, month_period
+from .zonal import ZonalStatsSink
+from .stats import StatsCollector, SummaryAccumulator
+from .quicklook import QuicklookPipeline, aggregate_bands
+from .progressive import ProgressiveLST
+from .mosaic import MosaicBuilder, MosaicScene
+from .graph import Stage, StageGraph, lst_graph
+from .uncertainty import MonteCarloLST
+from .cube import BandCube, cube_lst
+from .focal import FocalStatistics, focal_statistics
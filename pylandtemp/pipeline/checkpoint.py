@@ -0,0 +1,103 @@
+import json
+import os
+import threading
+
+from .tiles import Tile
+
+
+class Checkpoint:
+    def __init__(self, path: str):
+        """Append-only record of the scenes and tiles completed by a batch run.
+
+        Every event is one line of JSON flushed to disk as soon as it happens, so an
+        interrupted run loses at most the tiles that were being computed. A truncated
+        last line (the process died while writing it) is ignored when loading.
+
+        Args:
+            path (str): Checkpoint file, created if needed
+        """
+        self.path = path
+        self.scenes = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        self._apply(json.loads(line))
+                    except ValueError:
+                        continue
+        self._file = open(path, "a")
+
+    def _scene(self, scene: str) -> dict:
+        return self.scenes.setdefault(
+            scene, {"config": None, "tiles": set(), "status": "pending"}
+        )
+
+    def _apply(self, event: dict):
+        state = self._scene(event["scene"])
+        if "tile" in event:
+            state["tiles"].add(Tile(*event["tile"]))
+        elif event["status"] == "started":
+            if event["config"] != state["config"]:
+                # Tiles computed with another configuration cannot be reused
+                state["tiles"] = set()
+            state["config"] = event["config"]
+            state["status"] = "started"
+        else:
+            state["status"] = event["status"]
+
+    def _record(self, event: dict):
+        with self._lock:
+            self._apply(event)
+            self._file.write(json.dumps(event) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def is_done(self, scene: str) -> bool:
+        return scene in self.scenes and self.scenes[scene]["status"] == "done"
+
+    def completed_tiles(self, scene: str, config: dict) -> set:
+        """Tiles of a scene completed by previous runs with the same configuration"""
+        state = self.scenes.get(scene)
+        if state is None or state["config"] != config:
+            return set()
+        return set(state["tiles"])
+
+    def start_scene(self, scene: str, config: dict):
+        self._record({"scene": scene, "status": "started", "config": config})
+
+    def tile_done(self, scene: str, tile: Tile):
+        self._record({"scene": scene, "tile": list(tile)})
+
+    def scene_done(self, scene: str, **summary):
+        self._record({"scene": scene, "status": "done", **summary})
+
+    def scene_failed(self, scene: str, error: str):
+        self._record({"scene": scene, "status": "failed", "error": error})
+
+    def close(self):
+        self._file.close()
+
+
+class CheckpointSink:
+    def __init__(self, sink, checkpoint: Checkpoint, scene: str):
+        """Forwards tiles to a sink and records each of them in a checkpoint once written
+
+        Args:
+            sink: Sink receiving the tiles
+            checkpoint (Checkpoint): Checkpoint of the run
+            scene (str): Identifier of the scene in the checkpoint
+        """
+        self.sink = sink
+        self.checkpoint = checkpoint
+        self.scene = scene
+
+    def open(self, *args, **kwargs):
+        self.sink.open(*args, **kwargs)
+
+    def write(self, tile, data):
+        self.sink.write(tile, data)
+        self.checkpoint.tile_done(self.scene, tile)
+
+    def close(self):
+        return self.sink.close()
@@ -0,0 +1,189 @@
+import datetime
+import json
+import os
+
+import numpy as np
+
+from .sinks import ArraySink, decode_tile
+
+
+def month_period(date) -> int:
+    """Period of a date in a monthly climatology (0 for January)"""
+    return date.month - 1
+
+
+class ClimatologyStore:
+    def __init__(self, path: str):
+        """Per-pixel LST climatology of a grid: count, mean and sum of squared deviations
+            (Welford's online algorithm) for every period, held in memory-mapped .npy files.
+
+        Adding a scene only reads and writes the accumulators of its own period and pixels,
+        so the cost of a new scene does not depend on the length of the history.
+
+        Args:
+            path (str): Directory of a store created with ClimatologyStore.create
+        """
+        self.path = path
+        with open(os.path.join(path, "climatology.json")) as f:
+            metadata = json.load(f)
+        self.shape = tuple(metadata["shape"])
+        self.periods = metadata["periods"]
+        self.unit = metadata["unit"]
+        self.count = np.load(os.path.join(path, "count.npy"), mmap_mode="r+")
+        self.mean = np.load(os.path.join(path, "mean.npy"), mmap_mode="r+")
+        self.m2 = np.load(os.path.join(path, "m2.npy"), mmap_mode="r+")
+
+    @classmethod
+    def create(cls, path: str, shape: tuple, periods: int = 12, unit: str = "kelvin"):
+        """Creates an empty store
+
+        Args:
+            path (str): Directory of the store, created if needed
+            shape (tuple): (rows, columns) of the grid
+            periods (int, optional): Number of periods, e.g 12 months. Defaults to 12.
+            unit (str, optional): Unit of the accumulated LST. Defaults to 'kelvin'.
+        """
+        os.makedirs(path, exist_ok=True)
+        full_shape = (periods,) + tuple(shape)
+        for name, dtype in (
+            ("count", np.uint32),
+            ("mean", np.float64),
+            ("m2", np.float64),
+        ):
+            np.lib.format.open_memmap(
+                os.path.join(path, f"{name}.npy"),
+                mode="w+",
+                dtype=dtype,
+                shape=full_shape,
+            ).flush()
+        with open(os.path.join(path, "climatology.json"), "w") as f:
+            json.dump(
+                {"shape": list(shape), "periods": periods, "unit": unit}, f, indent=4
+            )
+        return cls(path)
+
+    def _period(self, period) -> int:
+        if isinstance(period, (datetime.date, datetime.datetime)):
+            period = month_period(period)
+        if not 0 <= period < self.periods:
+            raise ValueError(
+                f"Period should be between 0 and {self.periods - 1}: {period}"
+            )
+        return period
+
+    def update(self, period, lst: np.ndarray, window=(slice(None), slice(None))):
+        """Adds the LST of a scene (or of a window of it) to the accumulators of a period.
+        NaN pixels are skipped.
+        """
+        period = self._period(period)
+        count = self.count[period][window]
+        mean = self.mean[period][window]
+        m2 = self.m2[period][window]
+
+        valid = ~np.isnan(lst)
+        new_count = count + valid
+        delta = np.where(valid, lst - mean, 0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_step = np.where(valid, delta / new_count, 0)
+        new_mean = mean + mean_step
+        m2 += np.where(valid, delta * (lst - new_mean), 0)
+        mean[...] = new_mean
+        count[...] = new_count
+
+    def statistics(self, period, window=(slice(None), slice(None)), min_count=2):
+        """Returns the (mean, standard deviation) of a period. NaN where fewer than
+        min_count scenes were accumulated.
+        """
+        period = self._period(period)
+        count = np.asarray(self.count[period][window])
+        enough = count >= max(min_count, 2)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(np.asarray(self.m2[period][window]) / (count - 1))
+        return (
+            np.where(enough, self.mean[period][window], np.nan),
+            np.where(enough, std, np.nan),
+        )
+
+    def zscore(
+        self, period, lst: np.ndarray, window=(slice(None), slice(None)), min_count=2
+    ):
+        """Standardized anomaly of an LST image (or window) against the climatology of a period.
+        NaN where the baseline has fewer than min_count scenes or no variance.
+        """
+        mean, std = self.statistics(period, window, min_count=min_count)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(std > 0, (lst - mean) / std, np.nan)
+
+    def flush(self):
+        for array in (self.count, self.mean, self.m2):
+            array.flush()
+
+
+class ClimatologySink:
+    def __init__(
+        self,
+        store: ClimatologyStore,
+        period,
+        anomaly_sink=None,
+        lst_sink=None,
+        update: bool = True,
+        min_count: int = 2,
+    ):
+        """Sink computing the anomaly of a scene against a climatology and adding the scene
+            to the climatology, in the pass of the pipeline that computes its LST.
+
+        Each tile is compared to the baseline before it is accumulated, so the anomaly is
+        relative to the history prior to the scene. Quantized tiles are decoded first.
+
+        Args:
+            store (ClimatologyStore): Climatology of the scene grid
+            period (int or datetime.date): Period of the scene (the month for dates)
+            anomaly_sink (optional): Sink receiving the z-score tiles. Defaults to an ArraySink.
+            lst_sink (optional): Sink also receiving the LST tiles. Defaults to None.
+            update (bool, optional): Add the scene to the climatology. Defaults to True.
+            min_count (int, optional): Minimum baseline size for an anomaly. Defaults to 2.
+        """
+        self.store = store
+        self.period = period
+        self.anomaly_sink = ArraySink() if anomaly_sink is None else anomaly_sink
+        self.lst_sink = lst_sink
+        self.update = update
+        self.min_count = min_count
+        self.attrs = {}
+
+    def open(
+        self, shape: tuple, dtype, tile_shape: tuple, fill_value=np.nan, attrs=None
+    ):
+        if tuple(shape) != self.store.shape:
+            raise ValueError(
+                f"Scene shape {tuple(shape)} does not match the climatology grid {self.store.shape}"
+            )
+        self.attrs = attrs or {}
+        if self.attrs.get("units", self.store.unit) != self.store.unit:
+            raise ValueError(
+                f"LST in {self.attrs['units']} cannot update a climatology in {self.store.unit}"
+            )
+        self.anomaly_sink.open(
+            shape, np.float64, tile_shape, fill_value=np.nan, attrs={"units": "1"}
+        )
+        if self.lst_sink is not None:
+            self.lst_sink.open(
+                shape, dtype, tile_shape, fill_value=fill_value, attrs=attrs
+            )
+
+    def write(self, tile, data: np.ndarray):
+        if self.lst_sink is not None:
+            self.lst_sink.write(tile, data)
+        data = decode_tile(data, self.attrs)
+        self.anomaly_sink.write(
+            tile, self.store.zscore(self.period, data, tile.window, self.min_count)
+        )
+        if self.update:
+            self.store.update(self.period, data, tile.window)
+
+    def close(self) -> dict:
+        self.store.flush()
+        outputs = {"anomaly": self.anomaly_sink.close()}
+        if self.lst_sink is not None:
+            outputs["lst"] = self.lst_sink.close()
+        return outputs
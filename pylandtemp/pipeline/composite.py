@@ -0,0 +1,257 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .pipeline import TiledPipeline
+from .ranges import LST_VALUE_RANGES
+from .sinks import ArraySink
+from .tiles import generate_tiles
+
+# Pixels whose histograms are scanned at once by quantile(), which bounds its temporary
+# (pixels, bins) arrays to a few MB whatever the tile size
+QUANTILE_CHUNK_PIXELS = 2**14
+
+# Bytes held per pixel of a tile while the LST of a date is computed, about 16 float64
+# intermediates (bands, NDVI, brightness temperature, emissivity, LST...)
+BYTES_PER_PIXEL = 128
+
+
+class CompositeAccumulator:
+    def __init__(
+        self, shape: tuple, value_range: tuple, bin_width: float = 0.5, sketch=True
+    ):
+        """Running per-pixel statistics of a stack of images received one at a time.
+
+        Count, sum, minimum and maximum are exact. Quantiles come from a per-pixel
+        histogram with fixed bins, so their error is at most one bin width and the memory
+        does not depend on the number of images. Bin counts are uint8 (one byte per bin
+        and pixel), promoted to uint16 once a pixel receives more than 255 values.
+
+        Args:
+            shape (tuple): Shape of the images
+            value_range (tuple): (min, max) range of the histogram
+            bin_width (float, optional): Width of the histogram bins. Defaults to 0.5.
+            sketch (bool, optional): If False, no histogram is kept and quantiles are not
+                                     available. Defaults to True.
+        """
+        self.shape = tuple(shape)
+        self.low, self.high = value_range
+        self.bin_width = bin_width
+        self.bins = max(1, int(np.ceil((self.high - self.low) / bin_width)))
+        self.count = np.zeros(shape, dtype=np.uint16)
+        self.sum = np.zeros(shape, dtype=np.float64)
+        self.min = np.full(shape, np.inf)
+        self.max = np.full(shape, -np.inf)
+        self.histogram = (
+            np.zeros((int(np.prod(shape)), self.bins), dtype=np.uint8)
+            if sketch
+            else None
+        )
+
+    def update(self, image: np.ndarray):
+        """Adds an image to the statistics. NaN pixels are ignored."""
+        valid = ~np.isnan(image)
+        values = np.where(valid, image, 0)
+        self.count += valid
+        self.sum += values
+        np.fmin(self.min, np.where(valid, image, np.inf), out=self.min)
+        np.fmax(self.max, np.where(valid, image, -np.inf), out=self.max)
+        if self.histogram is not None:
+            if (
+                self.histogram.dtype == np.uint8
+                and self.count.max() > np.iinfo(np.uint8).max
+            ):
+                self.histogram = self.histogram.astype(np.uint16)
+            pixels = np.flatnonzero(valid)
+            bins = np.clip(
+                ((values.ravel()[pixels] - self.low) // self.bin_width).astype(np.intp),
+                0,
+                self.bins - 1,
+            )
+            # Every pixel holds one value, so the (pixel, bin) pairs are unique
+            self.histogram[pixels, bins] += 1
+
+    def _finalize(self, image: np.ndarray) -> np.ndarray:
+        return np.where(self.count > 0, image, np.nan)
+
+    def mean(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self._finalize(self.sum / self.count)
+
+    def minimum(self) -> np.ndarray:
+        return self._finalize(self.min)
+
+    def maximum(self) -> np.ndarray:
+        return self._finalize(self.max)
+
+    def quantile(self, q: float) -> np.ndarray:
+        """Approximate q-quantile (0 <= q <= 1), interpolated inside the histogram bins"""
+        if self.histogram is None:
+            raise ValueError("Quantiles need the histogram sketch")
+        if not 0 <= q <= 1:
+            raise ValueError(f"Quantile should be between 0 and 1: {q}")
+        count = self.count.ravel()
+        values = np.empty(len(count))
+        # Integer cumulative counts of a chunk of pixels at a time
+        for start in range(0, len(count), QUANTILE_CHUNK_PIXELS):
+            chunk = slice(start, start + QUANTILE_CHUNK_PIXELS)
+            histogram = self.histogram[chunk]
+            cumulative = np.cumsum(histogram, axis=1, dtype=np.uint16)
+            target = q * count[chunk]
+            bins = np.minimum(
+                np.argmax(cumulative >= target[:, None], axis=1), self.bins - 1
+            )
+            pixels = np.arange(len(bins))
+            in_bin = histogram[pixels, bins]
+            below = cumulative[pixels, bins] - in_bin
+            with np.errstate(invalid="ignore", divide="ignore"):
+                fraction = (target - below) / in_bin
+            values[chunk] = self.low + (bins + np.nan_to_num(fraction)) * self.bin_width
+        values = np.clip(values.reshape(self.shape), self.min, self.max)
+        return self._finalize(values)
+
+    def statistic(self, name: str) -> np.ndarray:
+        """'count', 'mean', 'min', 'max', 'median' or 'p<percentile>' (e.g 'p90')"""
+        if name == "count":
+            return self.count.copy()
+        if name == "mean":
+            return self.mean()
+        if name == "min":
+            return self.minimum()
+        if name == "max":
+            return self.maximum()
+        if name == "median":
+            return self.quantile(0.5)
+        match = re.fullmatch(r"p(\d+(\.\d+)?)", name)
+        if match is None:
+            raise ValueError(f"Unknown statistic: {name}")
+        return self.quantile(float(match.group(1)) / 100)
+
+
+class TemporalComposite:
+    def __init__(
+        self,
+        lst_method: str,
+        emissivity_method: str = "avdan",
+        unit: str = "kelvin",
+        statistics: tuple = ("max", "mean", "count", "median"),
+        tile_shape: tuple = (256, 256),
+        max_workers: int = None,
+        value_range: tuple = None,
+        bin_width: float = 0.5,
+        memory_budget: int = 256 * 2**20,
+    ):
+        """Per-pixel composites of the LST of a stack of dates.
+
+        The composite is built tile by tile: for every tile, the LST of each date is
+        computed from the tile windows of its bands and folded into running accumulators
+        (see CompositeAccumulator), then the tile of every statistic is written to its
+        sink. Memory depends on the tile size, not on the number of dates or the scene size,
+        and the tiles processed concurrently are limited to fit memory_budget.
+
+        Args:
+            lst_method (str): key of a single window or split window LST method
+            emissivity_method (str, optional): 'avdan', 'xiaolei' or 'gopinadh'. Defaults to 'avdan'.
+            unit (str, optional): 'kelvin' or 'celcius'. Defaults to 'kelvin'.
+            statistics (tuple, optional): Statistics to compute among 'count', 'mean', 'min', 'max',
+                                          'median' and percentiles 'p<percentile>' (e.g 'p10').
+                                          Defaults to ('max', 'mean', 'count', 'median').
+            tile_shape (tuple, optional): (rows, columns) of a tile. Defaults to (256, 256).
+            max_workers (int, optional): Number of threads processing tiles concurrently.
+            value_range (tuple, optional): Range of the quantile histograms. Values outside
+                                           of it are counted in the first or last bin.
+                                           Defaults to LST_VALUE_RANGES of the unit.
+            bin_width (float, optional): Width of the quantile histogram bins, the maximum
+                                         error of the quantiles. Defaults to 0.5 degree.
+            memory_budget (int, optional): Bytes of the tiles processed concurrently, which
+                                           caps max_workers. Defaults to 256 MiB.
+        """
+        self.pipeline = TiledPipeline(
+            lst_method,
+            emissivity_method,
+            unit=unit,
+            tile_shape=tile_shape,
+            max_workers=max_workers,
+        )
+        self.statistics = tuple(statistics)
+        self.value_range = value_range or LST_VALUE_RANGES[unit]
+        self.bin_width = bin_width
+        self.memory_budget = memory_budget
+        self.sketch = any(
+            name not in ("count", "mean", "min", "max") for name in self.statistics
+        )
+        # Validates the statistic names before any computation
+        probe = CompositeAccumulator((1, 1), self.value_range, bin_width, self.sketch)
+        for name in self.statistics:
+            probe.statistic(name)
+
+    def _tile_bytes(self, dates: int) -> int:
+        """Bytes held while a tile of a stack of dates is processed"""
+        pixels = int(np.prod(self.pipeline.tile_shape))
+        # uint16 count, float64 sum, minimum and maximum, then the histogram bins
+        pixel_bytes = BYTES_PER_PIXEL + 2 + 3 * 8
+        if self.sketch:
+            bins = max(1, int(np.ceil(np.ptp(self.value_range) / self.bin_width)))
+            itemsize = 1 if dates <= np.iinfo(np.uint8).max else 2
+            pixel_bytes += bins * itemsize
+            # Cumulative counts and comparison of a chunk of quantile()
+            chunk_pixels = min(pixels, QUANTILE_CHUNK_PIXELS)
+            return pixels * pixel_bytes + chunk_pixels * bins * 3
+        return pixels * pixel_bytes
+
+    def _dtype(self, name: str):
+        return np.dtype("uint16") if name == "count" else np.dtype("float64")
+
+    def __call__(self, dates: list, sinks: dict = None) -> dict:
+        """Computes the composites of a stack of dates
+
+        Args:
+            dates (list[dict]): Bands of every date, as dicts of the TiledPipeline keyword
+                                arguments (landsat_band_10, landsat_band_4...). Band sources
+                                only need to support 2-dimensional slicing (memory maps...).
+            sinks (dict, optional): Sink of each statistic. Defaults to an ArraySink per statistic.
+
+        Returns:
+            dict: Output of the sink of each statistic (images for ArraySinks)
+        """
+        if not dates:
+            raise ValueError("At least one date is required")
+        if len(dates) > np.iinfo(np.uint16).max:
+            raise ValueError(f"At most {np.iinfo(np.uint16).max} dates are supported")
+        shapes = {self.pipeline.scene_shape(**bands) for bands in dates}
+        if len(shapes) != 1:
+            raise ValueError(f"All dates should have the same shape: {shapes}")
+        shape = shapes.pop()
+
+        sinks = dict(sinks or {})
+        for name in self.statistics:
+            sinks.setdefault(name, ArraySink())
+            sinks[name].open(
+                shape,
+                self._dtype(name),
+                self.pipeline.tile_shape,
+                fill_value=0 if name == "count" else np.nan,
+                attrs={"units": "count" if name == "count" else self.pipeline.unit},
+            )
+
+        def process(tile):
+            accumulator = CompositeAccumulator(
+                tile.shape, self.value_range, self.bin_width, self.sketch
+            )
+            for bands in dates:
+                accumulator.update(self.pipeline.compute_tile(tile, **bands))
+            for name in self.statistics:
+                sinks[name].write(tile, accumulator.statistic(name))
+
+        workers = self.pipeline.max_workers or min(32, (os.cpu_count() or 1) + 4)
+        workers = max(
+            1, min(workers, self.memory_budget // self._tile_bytes(len(dates)))
+        )
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for _ in executor.map(
+                process, generate_tiles(shape, self.pipeline.tile_shape)
+            ):
+                pass
+        return {name: sinks[name].close() for name in self.statistics}
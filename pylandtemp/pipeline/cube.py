@@ -0,0 +1,117 @@
+import numpy as np
+
+from .pipeline import TiledPipeline
+
+CUBE_LAYOUTS = ("bands-first", "bands-last")
+
+
+class BandCube:
+    def __init__(self, cube, band_indices: dict, layout: str = "bands-first"):
+        """Bands of a scene held in a single 3-dimensional array, as produced by readers
+            of multi-band files: (bands, rows, columns) for 'bands-first' (band sequential)
+            or (rows, columns, bands) for 'bands-last' (pixel interleaved).
+
+        The bands are exposed as views of the cube, so nothing is copied or converted
+        before the pipeline reads a tile, and the tiles follow the memory order of the
+        cube (see tile_shape).
+
+        Args:
+            cube (array-like): 3-dimensional array supporting basic slicing (numpy arrays,
+                               memory maps...), of any dtype and strides
+            band_indices (dict): Index of each band along the band axis, keyed like the
+                                 TiledPipeline keyword arguments,
+                                 e.g {'landsat_band_10': 9, 'landsat_band_4': 3, ...}
+            layout (str, optional): 'bands-first' or 'bands-last'. Defaults to 'bands-first'.
+        """
+        if layout not in CUBE_LAYOUTS:
+            raise ValueError(f"Layout should be one of {list(CUBE_LAYOUTS)}: {layout}")
+        if len(cube.shape) != 3:
+            raise ValueError(f"Band cube should be 3-dimensional: {cube.shape}")
+        self.cube = cube
+        self.layout = layout
+        band_count = cube.shape[0] if layout == "bands-first" else cube.shape[2]
+        for name, index in band_indices.items():
+            if not -band_count <= index < band_count:
+                raise ValueError(
+                    f"Band index of '{name}' out of range for {band_count} bands: {index}"
+                )
+        self.band_indices = dict(band_indices)
+
+    @property
+    def shape(self) -> tuple:
+        """(rows, columns) of the scene"""
+        if self.layout == "bands-first":
+            return tuple(self.cube.shape[1:])
+        return tuple(self.cube.shape[:2])
+
+    @property
+    def bands(self) -> dict:
+        """Views of the bands of the cube, keyed like the TiledPipeline keyword arguments"""
+        if self.layout == "bands-first":
+            return {name: self.cube[index] for name, index in self.band_indices.items()}
+        return {
+            name: self.cube[:, :, index] for name, index in self.band_indices.items()
+        }
+
+    def tile_shape(self, tile_pixels: int = 2**20) -> tuple:
+        """Tiles of about tile_pixels pixels spanning the fastest varying spatial axis of the
+        cube, full-width row strips for C ordered cubes of both layouts. The band windows
+        of a tile are then contiguous runs of memory: one run per band plane
+        ('bands-first'), or a single run holding every band ('bands-last').
+
+        Args:
+            tile_pixels (int, optional): Pixels of a tile. Defaults to 2**20.
+
+        Returns:
+            tuple: (rows, columns) of a tile
+        """
+        rows, cols = self.shape
+        strides = getattr(self.cube, "strides", None)
+        axes = (1, 2) if self.layout == "bands-first" else (0, 1)
+        if strides is not None and abs(strides[axes[0]]) < abs(strides[axes[1]]):
+            # Column major spatial axes: column strips
+            return (rows, max(1, min(cols, tile_pixels // max(rows, 1))))
+        return (max(1, min(rows, tile_pixels // max(cols, 1))), cols)
+
+
+def cube_lst(
+    cube,
+    band_indices: dict,
+    lst_method: str,
+    emissivity_method: str = "avdan",
+    layout: str = "bands-first",
+    unit: str = "kelvin",
+    tile_pixels: int = 2**20,
+    sink=None,
+    **options,
+):
+    """Computes the land surface temperature of a band cube (see BandCube), tile by tile
+        in the memory order of the cube, without copying the bands
+
+    Args:
+        cube (array-like): (bands, rows, columns) or (rows, columns, bands) array
+        band_indices (dict): Index of each band along the band axis, keyed like the
+                             TiledPipeline keyword arguments
+        lst_method (str): key of a single window or split window LST method
+        emissivity_method (str, optional): 'avdan', 'xiaolei' or 'gopinadh'. Defaults to 'avdan'.
+        layout (str, optional): 'bands-first' or 'bands-last'. Defaults to 'bands-first'.
+        unit (str, optional): 'kelvin' or 'celcius'. Defaults to 'kelvin'.
+        tile_pixels (int, optional): Pixels of a tile (see BandCube.tile_shape). Defaults to 2**20.
+        sink (optional): Sink receiving the tiles (see TiledPipeline.__call__).
+                         Defaults to an ArraySink.
+
+    kwargs:
+        Other TiledPipeline arguments (max_workers, quantize, fast_math...)
+
+    Returns:
+        Whatever sink.close() returns. The LST image (np.ndarray) for the default sink.
+    """
+    bands = BandCube(cube, band_indices, layout)
+    pipeline = TiledPipeline(
+        lst_method,
+        emissivity_method,
+        unit=unit,
+        tile_shape=bands.tile_shape(tile_pixels),
+        **options,
+    )
+    return pipeline(sink=sink, **bands.bands)
@@ -0,0 +1,350 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import closing
+
+from .jobs import job_pipeline_key, run_job
+from .pipeline import TiledPipeline
+
+LeasedJob = namedtuple("LeasedJob", ("id", "spec", "attempts"))
+
+
+class JobQueue:
+    """Parent class of the work queues shared by the nodes of a distributed run.
+
+    Jobs are JSON serializable dicts in the format of pylandtemp.pipeline.jobs.run_job,
+    plus the pipeline configuration ('lst_method', 'emissivity_method', 'unit', 'quantize').
+    A worker leases a job for a limited time and keeps the lease alive with heartbeats.
+    Jobs whose lease expires (the worker died or hung) become available again until
+    they reach the maximum number of attempts.
+    """
+
+    def put(self, jobs: list) -> list:
+        """Adds jobs, returns their ids"""
+        raise NotImplementedError("No concrete implementation of put yet")
+
+    def lease(self, worker_id: str, lease_seconds: float):
+        """Leases the next available job, returns a LeasedJob or None"""
+        raise NotImplementedError("No concrete implementation of lease yet")
+
+    def heartbeat(self, job_id: int, worker_id: str, lease_seconds: float) -> bool:
+        """Extends a lease, returns False if the worker no longer holds it"""
+        raise NotImplementedError("No concrete implementation of heartbeat yet")
+
+    def complete(self, job_id: int, worker_id: str, result: dict) -> bool:
+        raise NotImplementedError("No concrete implementation of complete yet")
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> bool:
+        raise NotImplementedError("No concrete implementation of fail yet")
+
+    def counts(self) -> dict:
+        """Number of jobs per status ('pending', 'leased', 'done', 'failed')"""
+        raise NotImplementedError("No concrete implementation of counts yet")
+
+    def throughput(self) -> dict:
+        """Completed jobs and pixels, and their rate over the run"""
+        raise NotImplementedError("No concrete implementation of throughput yet")
+
+    def unfinished(self) -> int:
+        counts = self.counts()
+        return counts["pending"] + counts["leased"]
+
+
+class SQLiteJobQueue(JobQueue):
+    STATUSES = ("pending", "leased", "done", "failed")
+
+    def __init__(self, path: str, max_attempts: int = 3, timeout: float = 60.0):
+        """Job queue stored in a SQLite database, shared by the worker processes of one
+            machine or by nodes mounting the same file system. Leasing is serialized by
+            a write transaction, so a job is never held by two workers at the same time.
+
+        Args:
+            path (str): Database file, created if needed
+            max_attempts (int, optional): Leases of a job before it is marked failed. Defaults to 3.
+            timeout (float, optional): Seconds to wait for the database lock. Defaults to 60.
+        """
+        if max_attempts < 1:
+            raise ValueError(f"max_attempts should be at least 1: {max_attempts}")
+        self.path = path
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        with closing(self._connect()) as connection:
+            connection.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    spec TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT,
+                    lease_expires REAL,
+                    started REAL,
+                    finished REAL,
+                    pixels INTEGER,
+                    result TEXT,
+                    error TEXT
+                )""")
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode, transactions are opened explicitly
+        return sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+
+    def _transaction(self, statements):
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(connection)
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+            return result
+        finally:
+            connection.close()
+
+    def put(self, jobs: list) -> list:
+        def insert(connection):
+            return [
+                connection.execute(
+                    "INSERT INTO jobs (spec) VALUES (?)", (json.dumps(job),)
+                ).lastrowid
+                for job in jobs
+            ]
+
+        return self._transaction(insert)
+
+    def _release_expired(self, connection, now: float):
+        connection.execute(
+            """UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                   error = 'Lease expired', worker = NULL, lease_expires = NULL
+               WHERE status = 'leased' AND lease_expires < ?""",
+            (self.max_attempts, now),
+        )
+
+    def lease(self, worker_id: str, lease_seconds: float):
+        def take(connection):
+            now = time.time()
+            self._release_expired(connection, now)
+            row = connection.execute(
+                "SELECT id, spec, attempts FROM jobs WHERE status = 'pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                """UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?,
+                       attempts = attempts + 1, started = ?
+                   WHERE id = ?""",
+                (worker_id, now + lease_seconds, now, row[0]),
+            )
+            return LeasedJob(row[0], json.loads(row[1]), row[2] + 1)
+
+        return self._transaction(take)
+
+    def heartbeat(self, job_id: int, worker_id: str, lease_seconds: float) -> bool:
+        def extend(connection):
+            now = time.time()
+            return connection.execute(
+                """UPDATE jobs SET lease_expires = ?
+                   WHERE id = ? AND worker = ? AND status = 'leased' AND lease_expires >= ?""",
+                (now + lease_seconds, job_id, worker_id, now),
+            ).rowcount
+
+        return self._transaction(extend) == 1
+
+    def complete(self, job_id: int, worker_id: str, result: dict) -> bool:
+        def finish(connection):
+            now = time.time()
+            return connection.execute(
+                """UPDATE jobs SET status = 'done', finished = ?, pixels = ?, result = ?,
+                       error = NULL, lease_expires = NULL
+                   WHERE id = ? AND worker = ? AND status = 'leased' AND lease_expires >= ?""",
+                (
+                    now,
+                    result["shape"][0] * result["shape"][1],
+                    json.dumps(result),
+                    job_id,
+                    worker_id,
+                    now,
+                ),
+            ).rowcount
+
+        return self._transaction(finish) == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> bool:
+        def release(connection):
+            return connection.execute(
+                """UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                       error = ?, worker = NULL, lease_expires = NULL
+                   WHERE id = ? AND worker = ? AND status = 'leased'""",
+                (self.max_attempts, error, job_id, worker_id),
+            ).rowcount
+
+        return self._transaction(release) == 1
+
+    def counts(self) -> dict:
+        def count(connection):
+            self._release_expired(connection, time.time())
+            return connection.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+
+        counts = dict.fromkeys(self.STATUSES, 0)
+        counts.update(self._transaction(count))
+        return counts
+
+    def job(self, job_id: int) -> dict:
+        """Status, attempts, worker, result and error of a job"""
+        with closing(self._connect()) as connection:
+            connection.row_factory = sqlite3.Row
+            row = connection.execute(
+                "SELECT * FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(f"No job with id {job_id}")
+        job = dict(row)
+        job["spec"] = json.loads(job["spec"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def throughput(self) -> dict:
+        with closing(self._connect()) as connection:
+            jobs, pixels, started, finished = connection.execute(
+                """SELECT COUNT(*), COALESCE(SUM(pixels), 0), MIN(started), MAX(finished)
+                   FROM jobs WHERE status = 'done'"""
+            ).fetchone()
+        seconds = (finished - started) if jobs else 0.0
+        return {
+            "jobs": jobs,
+            "pixels": pixels,
+            "seconds": seconds,
+            "jobs_per_second": jobs / seconds if seconds > 0 else 0.0,
+            "pixels_per_second": pixels / seconds if seconds > 0 else 0.0,
+        }
+
+
+class Worker:
+    def __init__(
+        self,
+        queue: JobQueue,
+        worker_id: str = None,
+        lease_seconds: float = 300.0,
+        heartbeat_interval: float = None,
+        poll_interval: float = 1.0,
+        tile_shape: tuple = (1024, 1024),
+        max_workers: int = None,
+    ):
+        """Node of a distributed run. Leases jobs from a shared queue and runs each of
+            them through the local TiledPipeline, while a background thread renews the
+            lease. If the lease is lost the result is not reported, since the job was
+            released to another worker.
+
+        Args:
+            queue (JobQueue): Shared job queue
+            worker_id (str, optional): Unique name of the worker. Defaults to <hostname>-<pid>.
+            lease_seconds (float, optional): Lease duration. Defaults to 300.
+            heartbeat_interval (float, optional): Seconds between lease renewals.
+                                                  Defaults to a third of lease_seconds.
+            poll_interval (float, optional): Seconds between lease attempts while the jobs left
+                                             are leased by other workers. Defaults to 1.
+            tile_shape (tuple, optional): Tile shape of the pipelines. Defaults to (1024, 1024).
+            max_workers (int, optional): Threads computing the tiles of a job.
+        """
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval or lease_seconds / 3
+        self.poll_interval = poll_interval
+        self.tile_shape = tuple(tile_shape)
+        self.max_workers = max_workers
+        self.pipelines = {}
+        self.stats = {
+            "completed": 0,
+            "failed": 0,
+            "lost": 0,
+            "pixels": 0,
+            "seconds": 0.0,
+        }
+
+    def pipeline(self, job: dict) -> TiledPipeline:
+        key = job_pipeline_key(job)
+        if key not in self.pipelines:
+            lst_method, emissivity_method, unit, quantize = key
+            self.pipelines[key] = TiledPipeline(
+                lst_method,
+                emissivity_method,
+                unit=unit,
+                tile_shape=self.tile_shape,
+                max_workers=self.max_workers,
+                quantize=quantize,
+            )
+        return self.pipelines[key]
+
+    def _heartbeat(self, job_id: int, stop: threading.Event, lost: threading.Event):
+        while not stop.wait(self.heartbeat_interval):
+            if not self.queue.heartbeat(job_id, self.worker_id, self.lease_seconds):
+                lost.set()
+                return
+
+    def process(self, leased: LeasedJob) -> dict:
+        """Runs a leased job and reports its outcome to the queue"""
+        stop, lost = threading.Event(), threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(leased.id, stop, lost), daemon=True
+        )
+        heartbeat.start()
+        try:
+            result = run_job(self.pipeline(leased.spec), leased.spec)
+        except Exception as error:
+            stop.set()
+            heartbeat.join()
+            self.queue.fail(
+                leased.id, self.worker_id, f"{type(error).__name__}: {error}"
+            )
+            self.stats["failed"] += 1
+            return None
+        stop.set()
+        heartbeat.join()
+
+        if lost.is_set() or not self.queue.complete(leased.id, self.worker_id, result):
+            self.stats["lost"] += 1
+            return None
+        self.stats["completed"] += 1
+        self.stats["pixels"] += result["shape"][0] * result["shape"][1]
+        self.stats["seconds"] += result["seconds"]
+        return result
+
+    def run(self, max_jobs: int = None) -> dict:
+        """Processes jobs until the queue has no pending or leased jobs left
+
+        Args:
+            max_jobs (int, optional): Stop after this number of jobs. Defaults to None (no limit).
+
+        Returns:
+            dict: Completed, failed and lost jobs, pixels, compute seconds and pixels per second
+        """
+        processed = 0
+        while max_jobs is None or processed < max_jobs:
+            leased = self.queue.lease(self.worker_id, self.lease_seconds)
+            if leased is None:
+                if self.queue.unfinished() == 0:
+                    break
+                # Remaining jobs are leased by other workers, they may be released
+                time.sleep(self.poll_interval)
+                continue
+            self.process(leased)
+            processed += 1
+        return self.report()
+
+    def report(self) -> dict:
+        seconds = self.stats["seconds"]
+        return {
+            "worker": self.worker_id,
+            **self.stats,
+            "pixels_per_second": self.stats["pixels"] / seconds if seconds > 0 else 0.0,
+        }
@@ -0,0 +1,205 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .sinks import ArraySink, decode_tile
+from .tiles import Tile, generate_tiles
+
+FOCAL_STATISTICS = ("mean", "std", "count", "anomaly")
+
+
+def _window_shape(window) -> tuple:
+    shape = (window, window) if np.ndim(window) == 0 else tuple(window)
+    if len(shape) != 2 or any(int(size) != size or size < 1 for size in shape):
+        raise ValueError(f"Window should be one or two positive integers: {window}")
+    if not all(size % 2 for size in shape):
+        raise ValueError(
+            f"Window sizes should be odd, to be centred on a pixel: {window}"
+        )
+    return tuple(int(size) for size in shape)
+
+
+def _summed_area_table(image: np.ndarray, dtype) -> np.ndarray:
+    # Zero first row and column, so that window sums need no special case at the edges
+    table = np.zeros((image.shape[0] + 1, image.shape[1] + 1), dtype=dtype)
+    np.cumsum(image, axis=0, dtype=dtype, out=table[1:, 1:])
+    np.cumsum(table[1:, 1:], axis=1, out=table[1:, 1:])
+    return table
+
+
+def _window_sums(table: np.ndarray, top, bottom, left, right) -> np.ndarray:
+    # Column sums of the window rows, then differences along the columns
+    rows = table[bottom] - table[top]
+    return rows[:, right] - rows[:, left]
+
+
+def focal_statistics(
+    image: np.ndarray,
+    window,
+    statistics: tuple = ("mean", "std", "count"),
+    min_count: int = 1,
+    region: Tile = None,
+) -> dict:
+    """Moving window statistics of an image, ignoring NaN values, from summed-area tables
+        of the values, of their squares and of the valid pixels. Each statistic costs a
+        constant number of operations per pixel, whatever the window size.
+
+    Windows are cropped at the edges of the image.
+
+    Args:
+        image (np.ndarray): 2-dimensional image, e.g the LST of split_window or single_window
+        window (int or tuple): Odd size of the square window in pixels, or odd (rows, columns),
+                               e.g 33 for about 1 km at 30 m
+        statistics (tuple, optional): Statistics among 'mean', 'std' (population), 'count'
+                                      (valid pixels of the window) and 'anomaly' (pixel minus
+                                      the window mean, the surface heat island intensity of
+                                      the pixel relative to its neighbourhood).
+                                      Defaults to ('mean', 'std', 'count').
+        min_count (int, optional): Windows with fewer valid pixels are NaN. Defaults to 1.
+        region (Tile, optional): Window of image to compute, when image holds a halo around
+                                 it. Defaults to None, the whole image.
+
+    Returns:
+        dict: Image of every statistic ('count' as int64)
+    """
+    unknown = set(statistics) - set(FOCAL_STATISTICS)
+    if unknown:
+        raise ValueError(
+            f"Unknown statistics {sorted(unknown)}. Choose among {list(FOCAL_STATISTICS)}"
+        )
+    if len(image.shape) != 2:
+        raise ValueError("Image should be 2-dimensional")
+    half_rows, half_cols = (size // 2 for size in _window_shape(window))
+    region = Tile(0, 0, *image.shape) if region is None else region
+    rows = np.arange(region.row, region.row + region.height)
+    cols = np.arange(region.col, region.col + region.width)
+    top = np.maximum(rows - half_rows, 0)
+    bottom = np.minimum(rows + half_rows + 1, image.shape[0])
+    left = np.maximum(cols - half_cols, 0)
+    right = np.minimum(cols + half_cols + 1, image.shape[1])
+
+    image = np.asarray(image, dtype=np.float64)
+    valid = ~np.isnan(image)
+    count = _window_sums(_summed_area_table(valid, np.int64), top, bottom, left, right)
+    empty = count < max(min_count, 1)
+    outputs = {}
+    if "count" in statistics:
+        outputs["count"] = count
+    if not set(statistics) - {"count"}:
+        return outputs
+
+    # Values are summed relative to their mean, so the sums of squares do not cancel out
+    offset = image[valid].mean() if valid.any() else 0.0
+    centred = np.where(valid, image - offset, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (
+            _window_sums(
+                _summed_area_table(centred, np.float64), top, bottom, left, right
+            )
+            / count
+        )
+        if "std" in statistics:
+            squares = _window_sums(
+                _summed_area_table(centred * centred, np.float64),
+                top,
+                bottom,
+                left,
+                right,
+            )
+            variance = np.maximum(squares / count - mean * mean, 0.0)
+            outputs["std"] = np.where(empty, np.nan, np.sqrt(variance))
+    mean = np.where(empty, np.nan, mean + offset)
+    if "mean" in statistics:
+        outputs["mean"] = mean
+    if "anomaly" in statistics:
+        outputs["anomaly"] = image[region.window] - mean
+    return {name: outputs[name] for name in statistics}
+
+
+class FocalStatistics:
+    def __init__(
+        self,
+        window,
+        statistics: tuple = ("mean", "std", "count"),
+        min_count: int = 1,
+        tile_shape: tuple = (1024, 1024),
+        max_workers: int = None,
+    ):
+        """Moving window statistics of a scene (see focal_statistics), tile by tile.
+
+        Each tile is read with a halo of half a window on every side, so its statistics
+        are the ones of the whole image, and the scene is never held in memory. The
+        input can be the output of a pipeline or any lazy 2-dimensional source (LSTScene.lst,
+        ChunkedArray, memory map...).
+
+        Args:
+            window (int or tuple): Odd size of the square window in pixels, or odd (rows, columns)
+            statistics (tuple, optional): Statistics among 'mean', 'std', 'count' and 'anomaly'.
+                                          Defaults to ('mean', 'std', 'count').
+            min_count (int, optional): Windows with fewer valid pixels are NaN. Defaults to 1.
+            tile_shape (tuple, optional): (rows, columns) of a tile. Defaults to (1024, 1024).
+            max_workers (int, optional): Number of threads computing tiles concurrently.
+        """
+        self.window = _window_shape(window)
+        unknown = set(statistics) - set(FOCAL_STATISTICS)
+        if unknown:
+            raise ValueError(
+                f"Unknown statistics {sorted(unknown)}. Choose among {list(FOCAL_STATISTICS)}"
+            )
+        self.statistics = tuple(statistics)
+        self.min_count = min_count
+        self.tile_shape = tuple(tile_shape)
+        self.max_workers = max_workers
+
+    def compute_tile(self, tile: Tile, image, attrs: dict = None) -> dict:
+        """Computes the statistics of a tile from its window of image and its halo"""
+        half_rows, half_cols = (size // 2 for size in self.window)
+        row_start = max(tile.row - half_rows, 0)
+        col_start = max(tile.col - half_cols, 0)
+        halo = (
+            slice(row_start, min(tile.row + tile.height + half_rows, image.shape[0])),
+            slice(col_start, min(tile.col + tile.width + half_cols, image.shape[1])),
+        )
+        return focal_statistics(
+            decode_tile(np.asarray(image[halo]), attrs),
+            self.window,
+            self.statistics,
+            self.min_count,
+            region=Tile(tile.row - row_start, tile.col - col_start, *tile.shape),
+        )
+
+    def __call__(self, image, sinks: dict = None, attrs: dict = None) -> dict:
+        """Computes the statistics over the scene
+
+        Args:
+            image (array-like): 2-dimensional image supporting slicing, NaN where invalid
+            sinks (dict, optional): Sink of each statistic. Defaults to an ArraySink per statistic.
+            attrs (dict, optional): Encoding of a quantized image (the 'attrs' of the
+                                    TiledPipeline that produced it). Defaults to None, floats.
+
+        Returns:
+            dict: Output of the sink of each statistic (images for ArraySinks)
+        """
+        shape = tuple(image.shape)
+        if len(shape) != 2:
+            raise ValueError("Image should be 2-dimensional")
+        sinks = dict(sinks or {})
+        for name in self.statistics:
+            sinks.setdefault(name, ArraySink())
+            count = name == "count"
+            sinks[name].open(
+                shape,
+                np.dtype(np.int64 if count else np.float64),
+                self.tile_shape,
+                fill_value=0 if count else np.nan,
+                attrs={"window": self.window},
+            )
+
+        def process(tile):
+            for name, data in self.compute_tile(tile, image, attrs).items():
+                sinks[name].write(tile, data)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for _ in executor.map(process, generate_tiles(shape, self.tile_shape)):
+                pass
+        return {name: sinks[name].close() for name in self.statistics}
@@ -0,0 +1,227 @@
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+
+from pylandtemp.emissivity import default_algorithms as emissivity_algorithms
+from pylandtemp.masks import nodata_mask
+from pylandtemp.pylandtemp import fast_math_lst, ndvi
+from pylandtemp.runner import Runner
+from pylandtemp.temperature import BrightnessTemperatureLandsat
+from pylandtemp.temperature import default_algorithms as temperature_algorithms
+from pylandtemp.temperature.utils import compute_brightness_temperature
+
+
+class Stage(namedtuple("Stage", ("outputs", "function", "inputs"))):
+    """Node of a StageGraph: function(**{argument: value of name for argument, name in
+    inputs.items()}) produces the values of outputs (a tuple of names, unpacked from the
+    returned tuple when there is more than one)
+    """
+
+    __slots__ = ()
+
+
+class StageGraph:
+    def __init__(self, stages: list):
+        """Dependency graph of stages, run on a thread pool.
+
+        A stage starts as soon as the values it consumes are available, so independent
+        stages run concurrently (numpy releases the GIL in its array operations). Each
+        intermediate value is released as soon as the last stage consuming it finishes.
+
+        Args:
+            stages (list[Stage]): Stages of the graph. Names consumed but not produced by a
+                                  stage are the inputs of the graph.
+        """
+        self.stages = list(stages)
+        self.producers = {}
+        for stage in self.stages:
+            for name in stage.outputs:
+                if name in self.producers:
+                    raise ValueError(f"'{name}' is produced by more than one stage")
+                self.producers[name] = stage
+        self.inputs = sorted(
+            {
+                name
+                for stage in self.stages
+                for name in stage.inputs.values()
+                if name not in self.producers
+            }
+        )
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        available = set(self.inputs)
+        remaining = list(self.stages)
+        while remaining:
+            ready = [
+                stage for stage in remaining if set(stage.inputs.values()) <= available
+            ]
+            if not ready:
+                raise ValueError("Stages should not depend on each other cyclically")
+            for stage in ready:
+                available.update(stage.outputs)
+                remaining.remove(stage)
+
+    def __call__(
+        self, outputs: tuple = None, max_workers: int = None, **inputs
+    ) -> dict:
+        """Runs the graph
+
+        Args:
+            outputs (tuple, optional): Names of the values to return. Defaults to None, every
+                                       value produced by a stage (nothing is released).
+            max_workers (int, optional): Number of threads running stages concurrently.
+
+        kwargs:
+            Values of the inputs of the graph
+
+        Returns:
+            dict: The requested values
+        """
+        missing = [name for name in self.inputs if name not in inputs]
+        if missing:
+            raise ValueError(f"Inputs of the graph are not provided: {missing}")
+        keep = set(self.producers if outputs is None else outputs)
+        unknown = keep - set(self.producers) - set(self.inputs)
+        if unknown:
+            raise ValueError(f"Values not produced by the graph: {sorted(unknown)}")
+
+        values = dict(inputs)
+        consumers = {}
+        for stage in self.stages:
+            for name in set(stage.inputs.values()):
+                consumers[name] = consumers.get(name, 0) + 1
+        for name in list(values):
+            if consumers.get(name, 0) == 0 and name not in keep:
+                del values[name]
+        waiting = list(self.stages)
+
+        def submit_ready(executor, running):
+            for stage in list(waiting):
+                if all(name in values for name in stage.inputs.values()):
+                    waiting.remove(stage)
+                    arguments = {
+                        argument: values[name]
+                        for argument, name in stage.inputs.items()
+                    }
+                    running[executor.submit(stage.function, **arguments)] = stage
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            running = {}
+            submit_ready(executor, running)
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    result = future.result()
+                    if len(stage.outputs) == 1:
+                        result = (result,)
+                    for name, value in zip(stage.outputs, result):
+                        if consumers.get(name, 0) or name in keep:
+                            values[name] = value
+                    # Intermediates are released once their last consumer finished
+                    for name in set(stage.inputs.values()):
+                        consumers[name] -= 1
+                        if consumers[name] == 0 and name not in keep:
+                            del values[name]
+                submit_ready(executor, running)
+        return {name: values[name] for name in keep}
+
+
+def _float64_lst(function, **arguments):
+    return fast_math_lst(function(**arguments), True)
+
+
+def lst_graph(
+    lst_method: str, emissivity_method: str, fast_math: bool = False
+) -> StageGraph:
+    """Graph of the stages of pylandtemp.pylandtemp.lst_stages, built from the same
+        functions and classes: the nodata mask, NDVI, the brightness temperature of each
+        thermal band, the emissivity and the LST.
+
+    Inputs of the graph are the bands ('landsat_band_10', 'landsat_band_4',
+    'landsat_band_5' and 'landsat_band_11' for split window methods), 'quantize' and, for
+    split window methods, 'cwv'. It produces the values of lst_stages, 'mask' and, for
+    single window methods, the unused 'emissivity_11'.
+
+    Args:
+        lst_method (str): key of a single window or split window LST method
+        emissivity_method (str): key of an emissivity method
+        fast_math (bool, optional): Fast math mode of lst_stages. Defaults to False.
+
+    Returns:
+        StageGraph: Graph of the LST computation
+    """
+    split = lst_method in temperature_algorithms.split_window
+    algorithms = (
+        temperature_algorithms.split_window
+        if split
+        else temperature_algorithms.single_window
+    )
+    if lst_method not in algorithms:
+        raise ValueError(
+            f"Requested method not implemented. Choose among available methods: {list(algorithms)}"
+        )
+    constants = BrightnessTemperatureLandsat()
+    brightness_temperature = partial(
+        compute_brightness_temperature,
+        M=constants.mult_factor,
+        A=constants.add_factor,
+        fast_math=fast_math,
+    )
+
+    lst_inputs = {
+        "emissivity_10": "emissivity_10",
+        "brightness_temperature_10": "brightness_temperature_10",
+        "mask": "mask",
+        "ndvi": "ndvi",
+        "quantize": "quantize",
+    }
+    stages = [
+        Stage(("mask",), nodata_mask, {"image": "landsat_band_10"}),
+        Stage(
+            ("ndvi",),
+            ndvi,
+            {
+                "landsat_band_5": "landsat_band_5",
+                "landsat_band_4": "landsat_band_4",
+                "mask": "mask",
+            },
+        ),
+        Stage(
+            ("brightness_temperature_10",),
+            partial(
+                brightness_temperature,
+                k1=constants.k1_constant_10,
+                k2=constants.k2_constant_10,
+            ),
+            {"image": "landsat_band_10", "mask": "mask"},
+        ),
+        Stage(
+            ("emissivity_10", "emissivity_11"),
+            partial(Runner(algorithms=emissivity_algorithms), emissivity_method),
+            {"ndvi": "ndvi", "red_band": "landsat_band_4"},
+        ),
+    ]
+    if split:
+        stages.append(
+            Stage(
+                ("brightness_temperature_11",),
+                partial(
+                    brightness_temperature,
+                    k1=constants.k1_constant_11,
+                    k2=constants.k2_constant_11,
+                ),
+                {"image": "landsat_band_11", "mask": "mask"},
+            )
+        )
+        lst_inputs.update(
+            emissivity_11="emissivity_11",
+            brightness_temperature_11="brightness_temperature_11",
+            cwv="cwv",
+        )
+    lst_method = partial(Runner(algorithms=algorithms), lst_method)
+    if fast_math:
+        lst_method = partial(_float64_lst, lst_method)
+    stages.append(Stage(("lst",), lst_method, lst_inputs))
+    return StageGraph(stages)
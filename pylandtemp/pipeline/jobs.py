@@ -0,0 +1,100 @@
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from .sinks import ArraySink, ChunkedStoreSink
+
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attaches to an existing shared memory segment without taking ownership of it,
+    so that the segment is not unlinked when the attaching process exits.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 registers attached segments with the resource tracker
+        segment = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(segment._name, "shared_memory")
+        return segment
+
+
+def shared_array(segment: shared_memory.SharedMemory, shape, dtype) -> np.ndarray:
+    """numpy view of a shared memory segment"""
+    return np.ndarray(tuple(shape), dtype=np.dtype(dtype), buffer=segment.buf)
+
+
+def job_pipeline_key(job: dict) -> tuple:
+    """Configuration of the pipeline running a job"""
+    return (
+        job["lst_method"],
+        job.get("emissivity_method", "avdan"),
+        job.get("unit", "kelvin"),
+        bool(job.get("quantize", False)),
+    )
+
+
+def run_job(pipeline, job: dict) -> dict:
+    """Runs a scene job described with plain JSON types through a TiledPipeline.
+
+    Jobs are dicts {"bands": {"landsat_band_10": BAND, ...}, "output": OUTPUT, ...}, where
+        BAND is {"path": "<file>.npy"} (memory mapped, only tile windows are read) or
+        {"shm": "<name>", "shape": [rows, cols], "dtype": "<f8"} for a shared memory segment,
+        OUTPUT is {"path": "<file>.npy"}, {"store": "<directory>", "overviews": [...]}
+        (chunked store) or {"shm": "<name>"}, an existing segment of the LST size.
+
+    Args:
+        pipeline (TiledPipeline): Pipeline configured for the job (see job_pipeline_key)
+        job (dict): Job description
+
+    Returns:
+        dict: Output, shape and dtype of the LST, and run time in seconds
+    """
+    start = time.perf_counter()
+    segments = []
+    try:
+        bands = {}
+        for name, source in job["bands"].items():
+            if "shm" in source:
+                segments.append(attach_shared_memory(source["shm"]))
+                bands[name] = shared_array(
+                    segments[-1], source["shape"], source["dtype"]
+                )
+            else:
+                bands[name] = np.load(source["path"], mmap_mode="r")
+
+        shape = pipeline.scene_shape(**bands)
+        output = job["output"]
+        if "store" in output:
+            sink = ChunkedStoreSink(
+                output["store"], overviews=output.get("overviews", ())
+            )
+        elif "shm" in output:
+            segments.append(attach_shared_memory(output["shm"]))
+            sink = ArraySink(shared_array(segments[-1], shape, pipeline.dtype))
+        else:
+            sink = ArraySink(
+                np.lib.format.open_memmap(
+                    output["path"], mode="w+", dtype=pipeline.dtype, shape=shape
+                )
+            )
+        result = pipeline(sink=sink, **bands)
+        if isinstance(result, np.memmap):
+            result.flush()
+    finally:
+        # Views of the segments are released before the segments are closed
+        result = sink = bands = None
+        for segment in segments:
+            try:
+                segment.close()
+            except BufferError:
+                # Views still referenced by the traceback of an exception raised while
+                # running; the mapping is released once they are collected
+                pass
+
+    return {
+        "output": output,
+        "shape": list(shape),
+        "dtype": pipeline.dtype.str,
+        "seconds": time.perf_counter() - start,
+    }
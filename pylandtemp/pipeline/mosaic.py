@@ -0,0 +1,201 @@
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .pipeline import TiledPipeline
+from .sinks import ArraySink
+from .tiles import generate_tiles
+
+OVERLAP_RULES = ("latest", "mean", "min-cloud")
+
+
+class MosaicScene(
+    namedtuple(
+        "MosaicScene", ("bands", "offset", "cloud", "date"), defaults=(0.0, None)
+    )
+):
+    """Scene of a mosaic: its bands (dict keyed like the TiledPipeline keyword arguments),
+    the (row, col) of its top-left pixel in the mosaic grid, its cloud cover fraction and
+    its acquisition date
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_transform(
+        cls, bands: dict, transform, mosaic_transform, cloud=0.0, date=None
+    ):
+        """Places a scene with its affine transform (see rowcol_from_xy) on the grid of
+        the mosaic. Both should have the same pixel size and pixel boundaries.
+        """
+        a, b, c, d, e, f = tuple(transform)[:6]
+        ma, mb, mc, md, me, mf = tuple(mosaic_transform)[:6]
+        if (a, b, d, e) != (ma, mb, md, me) or b != 0 or d != 0:
+            raise ValueError(
+                "Scenes should be north-up and have the pixel size of the mosaic"
+            )
+        row, col = (f - mf) / me, (c - mc) / ma
+        if not (np.isclose(row, round(row)) and np.isclose(col, round(col))):
+            raise ValueError(
+                f"Scene is not aligned with the pixels of the mosaic: offset ({row}, {col})"
+            )
+        return cls(bands, (int(round(row)), int(round(col))), cloud, date)
+
+    @property
+    def shape(self) -> tuple:
+        return tuple(self.bands["landsat_band_10"].shape)
+
+
+class MosaicBuilder:
+    def __init__(
+        self,
+        lst_method: str,
+        emissivity_method: str = "avdan",
+        unit: str = "kelvin",
+        rule: str = "latest",
+        tile_shape: tuple = (1024, 1024),
+        max_workers: int = None,
+        nodata=0,
+    ):
+        """Computes the land surface temperature mosaic of overlapping scenes placed on a
+            common grid, tile by tile of the mosaic.
+
+        The scenes intersecting a mosaic tile are visited in priority order. With the
+        'latest' and 'min-cloud' rules, the pixels already covered by a valid LST of a
+        higher priority scene are not computed again, so overlapping scenes cost no more
+        than the area they add. With the 'mean' rule, every valid pixel is computed and a
+        per-pixel count is only allocated in tiles where scenes overlap.
+
+        Args:
+            lst_method (str): key of a single window or split window LST method
+            emissivity_method (str, optional): 'avdan', 'xiaolei' or 'gopinadh'. Defaults to 'avdan'.
+            unit (str, optional): 'kelvin' or 'celcius'. Defaults to 'kelvin'.
+            rule (str, optional): Overlap rule: 'latest' (most recent date, or last scene when
+                                  dates are missing), 'min-cloud' (lowest cloud fraction) or
+                                  'mean' (average of the valid values). Defaults to 'latest'.
+            tile_shape (tuple, optional): (rows, columns) of a mosaic tile. Defaults to (1024, 1024).
+            max_workers (int, optional): Number of threads computing tiles concurrently.
+            nodata (optional): Nodata value of band 10. Defaults to 0.
+        """
+        if rule not in OVERLAP_RULES:
+            raise ValueError(
+                f"Overlap rule should be one of {list(OVERLAP_RULES)}: {rule}"
+            )
+        self.pipeline = TiledPipeline(lst_method, emissivity_method, unit=unit)
+        self.rule = rule
+        self.tile_shape = tuple(tile_shape)
+        self.max_workers = max_workers
+        self.nodata = nodata
+        self.computed_pixels = 0
+        self._lock = threading.Lock()
+
+    def order(self, scenes: list) -> list:
+        """Scenes sorted from the highest to the lowest priority"""
+        scenes = list(scenes)
+        if self.rule == "min-cloud":
+            return sorted(scenes, key=lambda scene: scene.cloud)
+        if self.rule == "latest":
+            if all(scene.date is not None for scene in scenes):
+                return sorted(scenes, key=lambda scene: scene.date, reverse=True)
+            return scenes[::-1]
+        return scenes
+
+    def __call__(self, scenes: list, shape: tuple, sink=None):
+        """Builds the mosaic
+
+        Args:
+            scenes (list[MosaicScene]): Scenes placed on the mosaic grid. Their bands can be
+                                        any 2-dimensional object supporting slicing.
+            shape (tuple): (rows, columns) of the mosaic
+            sink (optional): Sink receiving the mosaic tiles (see TiledPipeline.__call__).
+                             Defaults to an ArraySink.
+
+        Returns:
+            Whatever sink.close() returns. The mosaic (np.ndarray) for the default sink,
+            NaN where no scene has a valid LST.
+        """
+        scenes = self.order(scenes)
+        for scene in scenes:
+            self.pipeline.scene_shape(**scene.bands)
+        sink = ArraySink() if sink is None else sink
+        sink.open(
+            tuple(shape),
+            np.float64,
+            self.tile_shape,
+            fill_value=np.nan,
+            attrs={"units": self.pipeline.unit, "overlap_rule": self.rule},
+        )
+
+        def process(tile):
+            sink.write(tile, self.compute_tile(tile, scenes))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for _ in executor.map(process, generate_tiles(shape, self.tile_shape)):
+                pass
+        return sink.close()
+
+    def compute_tile(self, tile, scenes: list) -> np.ndarray:
+        """Computes a mosaic tile from scenes sorted by priority"""
+        out = np.full(tile.shape, np.nan)
+        count = None
+        computed = 0
+        for scene in scenes:
+            top, left = scene.offset
+            rows, cols = scene.shape
+            row_start = max(tile.row, top)
+            row_stop = min(tile.row + tile.height, top + rows)
+            col_start = max(tile.col, left)
+            col_stop = min(tile.col + tile.width, left + cols)
+            if row_start >= row_stop or col_start >= col_stop:
+                continue
+            scene_window = (
+                slice(row_start - top, row_stop - top),
+                slice(col_start - left, col_stop - left),
+            )
+            window = (
+                slice(row_start - tile.row, row_stop - tile.row),
+                slice(col_start - tile.col, col_stop - tile.col),
+            )
+            local = out[window]
+            todo = (
+                np.asarray(scene.bands["landsat_band_10"][scene_window]) != self.nodata
+            )
+            if self.rule != "mean":
+                # Pixels covered by a higher priority scene are not computed
+                todo &= np.isnan(local)
+            if not todo.any():
+                continue
+
+            # Gathered pixels keep the 2-dimensional shape the algorithms expect
+            lst = self.pipeline.compute(
+                **{
+                    name: np.asarray(scene.bands[name][scene_window])[todo][None, :]
+                    for name in self.pipeline.required_bands
+                }
+            )[0]
+            computed += int(todo.sum())
+            if self.rule != "mean":
+                local[todo] = lst
+                continue
+
+            current = local[todo]
+            valid = ~np.isnan(lst)
+            if count is None and (valid & ~np.isnan(current)).any():
+                # Counts are only needed once scenes overlap in the tile
+                count = (~np.isnan(out)).astype(np.uint16)
+            if count is None:
+                local[todo] = np.where(valid, lst, current)
+                continue
+            pixel_count = count[window][todo] + valid
+            count[window][todo] = pixel_count
+            with np.errstate(invalid="ignore", divide="ignore"):
+                running_mean = current + (lst - current) / pixel_count
+            local[todo] = np.where(
+                valid, np.where(np.isnan(current), lst, running_mean), current
+            )
+
+        with self._lock:
+            self.computed_pixels += computed
+        return out
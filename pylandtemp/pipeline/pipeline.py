@@ -0,0 +1,393 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from pylandtemp.pylandtemp import (
+    CELCIUS_SCALER,
+    emissivity,
+    lst_stages,
+    ndvi,
+    split_window,
+    single_window,
+)
+from pylandtemp.masks import nodata_mask
+from pylandtemp.temperature import default_algorithms as temperature_algorithms
+from pylandtemp.temperature.utils import (
+    LST_ADD_OFFSET,
+    LST_NODATA,
+    LST_SCALE_FACTOR,
+    compute_brightness_temperature,
+    quantize_temperature,
+)
+from pylandtemp.exceptions import (
+    InputShapesNotEqual,
+    assert_required_keywords_provided,
+    assert_temperature_unit,
+)
+from .tiles import generate_tiles
+from .sinks import ArraySink
+from .stats import StatsCollector
+from .graph import lst_graph
+
+
+class TiledPipeline:
+    def __init__(
+        self,
+        lst_method: str,
+        emissivity_method: str = "avdan",
+        unit: str = "kelvin",
+        tile_shape: tuple = (1024, 1024),
+        max_workers: int = None,
+        quantize: bool = False,
+        water_vapour=None,
+        stage_workers: int = None,
+        fast_math: bool = False,
+        lookup_table=None,
+        thermal_factor: int = None,
+    ):
+        """Computes land surface temperature tile by tile and hands every finished
+            tile to a sink, so that the full scene never has to be held by the pipeline.
+
+        Args:
+            lst_method (str): key of a single window ('mono-window') or split window
+                              ('jiminez-munoz', 'kerr', 'mc-millin', 'price', 'sobrino-1993') method
+            emissivity_method (str, optional): 'avdan', 'xiaolei' or 'gopinadh'. Defaults to 'avdan'.
+            unit (str, optional): 'kelvin' or 'celcius'. Defaults to 'kelvin'.
+            tile_shape (tuple, optional): (rows, columns) of a tile. Defaults to (1024, 1024).
+            max_workers (int, optional): Number of threads computing tiles concurrently.
+                                         Defaults to the ThreadPoolExecutor default.
+            quantize (bool, optional): If True, tiles are encoded as scaled int16 as soon as they
+                                       are computed (see the 'attrs' attribute for the encoding).
+                                       Defaults to False.
+            water_vapour (WaterVapourGrid, optional): Coarse column water vapour grid of the
+                                                      'jiminez-munoz' method, interpolated on each
+                                                      tile as it is computed (see
+                                                      pylandtemp.temperature.WaterVapourGrid).
+                                                      Defaults to None, the constant of the method.
+            stage_workers (int, optional): If set, the stages of each tile (NDVI, brightness
+                                           temperatures, emissivity, LST) run as a StageGraph
+                                           with this many threads, independent stages concurrently
+                                           and intermediates released as soon as possible.
+                                           Defaults to None, the stages run in sequence.
+            fast_math (bool, optional): If True, the brightness temperatures are computed in
+                                        float32, which changes the LST by less than 1e-3 K
+                                        (see split_window). Defaults to False.
+            lookup_table (MonoWindowLUT, optional): Lookup table of the 'mono-window' method with
+                                                    the 'avdan' emissivity. If set, the LST of a
+                                                    pixel is looked up from its band 10 digital
+                                                    number and NDVI (see
+                                                    pylandtemp.temperature.MonoWindowLUT).
+                                                    Defaults to None, the exact computation.
+            thermal_factor (int, optional): If set, the brightness temperatures of a tile are
+                                            computed once per thermal_factor x thermal_factor
+                                            block and repeated over it (see
+                                            pylandtemp.pylandtemp.brightness_temperature), e.g 3
+                                            for the native 100 m resolution of the thermal bands.
+                                            Tile shapes should be multiples of the factor.
+                                            Defaults to None.
+        """
+        assert_temperature_unit(unit)
+        if (
+            lst_method not in temperature_algorithms.single_window
+            and lst_method not in temperature_algorithms.split_window
+        ):
+            available = list(temperature_algorithms.single_window) + list(
+                temperature_algorithms.split_window
+            )
+            raise ValueError(
+                f"Requested method not implemented. Choose among available methods: {available}"
+            )
+
+        if water_vapour is not None and lst_method != "jiminez-munoz":
+            raise ValueError(
+                f"Water vapour is only used by the 'jiminez-munoz' method, not '{lst_method}'"
+            )
+
+        if lookup_table is not None and (
+            lst_method != "mono-window" or emissivity_method != "avdan"
+        ):
+            raise ValueError(
+                "Lookup tables are only available for the 'mono-window' method with "
+                f"the 'avdan' emissivity, not '{lst_method}' with '{emissivity_method}'"
+            )
+        if lookup_table is not None and stage_workers is not None:
+            raise ValueError("Lookup tables do not run as a stage graph")
+        if thermal_factor is not None:
+            if any(size % thermal_factor for size in tile_shape):
+                raise ValueError(
+                    f"Tile shape {tuple(tile_shape)} should be a multiple of the thermal factor {thermal_factor}"
+                )
+            if stage_workers is not None or lookup_table is not None:
+                raise ValueError(
+                    "Thermal factors are not available with stage graphs or lookup tables"
+                )
+
+        self.lst_method = lst_method
+        self.emissivity_method = emissivity_method
+        self.unit = unit
+        self.tile_shape = tuple(tile_shape)
+        self.max_workers = max_workers
+        self.quantize = quantize
+        self.water_vapour = water_vapour
+        self.stage_workers = stage_workers
+        self.fast_math = fast_math
+        self.lookup_table = lookup_table
+        self.thermal_factor = thermal_factor
+        self.stage_graph = (
+            None
+            if stage_workers is None
+            else lst_graph(lst_method, emissivity_method, fast_math=fast_math)
+        )
+
+        if quantize:
+            self.dtype = np.dtype("int16")
+            self.fill_value = LST_NODATA
+            self.attrs = {
+                "units": unit,
+                "scale_factor": LST_SCALE_FACTOR,
+                "add_offset": LST_ADD_OFFSET if unit == "kelvin" else 0.0,
+                "_FillValue": LST_NODATA,
+            }
+        else:
+            self.dtype = np.dtype("float64")
+            self.fill_value = np.nan
+            self.attrs = {"units": unit}
+
+    @property
+    def is_single_window(self) -> bool:
+        return self.lst_method in temperature_algorithms.single_window
+
+    @property
+    def required_bands(self) -> list:
+        if self.is_single_window:
+            return ["landsat_band_10", "landsat_band_4", "landsat_band_5"]
+        return [
+            "landsat_band_10",
+            "landsat_band_11",
+            "landsat_band_4",
+            "landsat_band_5",
+        ]
+
+    def __call__(self, sink=None, tiles: list = None, stats=False, **bands):
+        """Runs the pipeline over the whole scene
+
+        Args:
+            sink (optional): Object receiving the finished tiles through
+                             open(shape, dtype, tile_shape, fill_value, attrs), write(tile, data)
+                             and close().
+                             Defaults to an ArraySink, which assembles the LST in memory.
+            tiles (list[Tile], optional): Tiles to compute, e.g the tiles left over by an
+                                          interrupted run. Defaults to all the tiles of the scene.
+            stats (bool or StatsCollector, optional): If set, summaries of the NDVI, brightness
+                                                      temperature, emissivity and LST of the computed
+                                                      tiles are collected as the tiles are computed.
+                                                      Defaults to False.
+
+        kwargs:
+        **landsat_band_10 (array-like): Band 10 of the Landsat 8 image
+        **landsat_band_11 (array-like): Band 11 of the Landsat 8 image (split window methods only)
+        **landsat_band_4 (array-like): Band 4 of the Landsat 8 image (Red band)
+        **landsat_band_5 (array-like): Band 5 of the Landsat 8 image (Near-Infrared band)
+
+        Bands can be any 2-dimensional object supporting slicing (numpy arrays, memory maps...).
+        Only the window of the current tile is read from them.
+
+        Returns:
+            Whatever sink.close() returns. The LST image (np.ndarray) for the default sink.
+            With stats, a tuple of that output and the summary dict of every stage
+            (see StatsCollector.summary).
+        """
+        shape = self.scene_shape(**bands)
+        sink = ArraySink() if sink is None else sink
+        sink.open(
+            shape,
+            self.dtype,
+            self.tile_shape,
+            fill_value=self.fill_value,
+            attrs=self.attrs,
+        )
+
+        collector = None
+        if stats:
+            collector = (
+                stats
+                if isinstance(stats, StatsCollector)
+                else StatsCollector(unit=self.unit)
+            )
+
+        def process(tile):
+            if collector is None:
+                sink.write(tile, self.compute_tile(tile, **bands))
+                return
+            lst, stages = self.compute_stages(
+                cwv=self.tile_water_vapour(tile.window),
+                **{
+                    name: np.asarray(bands[name][tile.window])
+                    for name in self.required_bands
+                },
+            )
+            collector.update(stages)
+            del stages
+            sink.write(tile, lst)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            if tiles is None:
+                tiles = generate_tiles(shape, self.tile_shape)
+            for _ in executor.map(process, tiles):
+                pass
+        output = sink.close()
+        return output if collector is None else (output, collector.summary())
+
+    def scene_shape(self, **bands) -> tuple:
+        """Validates the input bands and returns their common shape"""
+        assert_required_keywords_provided(self.required_bands, **bands)
+        shapes = [tuple(bands[name].shape) for name in self.required_bands]
+        if len(set(shapes)) != 1:
+            raise InputShapesNotEqual(
+                f"Shapes of input images should be equal: {', '.join(map(str, shapes))}"
+            )
+        if len(shapes[0]) != 2:
+            raise ValueError("Input images should be 2-dimensional")
+        return shapes[0]
+
+    def compute_tile(self, tile, **bands) -> np.ndarray:
+        """Computes the land surface temperature of a single tile
+
+        Args:
+            tile (Tile): window of the scene to compute
+
+        Returns:
+            np.ndarray: Land surface temperature of the tile
+        """
+        return self.compute(
+            cwv=self.tile_water_vapour(tile.window),
+            **{
+                name: np.asarray(bands[name][tile.window])
+                for name in self.required_bands
+            },
+        )
+
+    def tile_water_vapour(self, window):
+        """Water vapour of a window of the scene, None without a water vapour grid"""
+        if self.water_vapour is None:
+            return None
+        return self.water_vapour(window)
+
+    def compute(self, cwv=None, **bands) -> np.ndarray:
+        """Computes the land surface temperature of in-memory band arrays
+            (a tile, gathered samples...) with the configured methods
+
+        Args:
+            cwv (float or np.ndarray, optional): Water vapour of the pixels of the bands
+                                                 (see tile_water_vapour). Defaults to None.
+
+        Returns:
+            np.ndarray: Land surface temperature, same shape as the bands
+        """
+        if self.stage_graph is not None:
+            lst = self.run_stage_graph(("lst",), self.quantize, cwv, bands)["lst"]
+            if self.quantize or self.unit == "kelvin":
+                return lst
+            return lst - CELCIUS_SCALER
+        if self.lookup_table is not None:
+            return self.look_up(**bands)
+        if self.is_single_window:
+            return single_window(
+                bands["landsat_band_10"],
+                bands["landsat_band_4"],
+                bands["landsat_band_5"],
+                lst_method=self.lst_method,
+                emissivity_method=self.emissivity_method,
+                unit=self.unit,
+                quantize=self.quantize,
+                fast_math=self.fast_math,
+                thermal_factor=self.thermal_factor,
+            )
+        return split_window(
+            bands["landsat_band_10"],
+            bands["landsat_band_11"],
+            bands["landsat_band_4"],
+            bands["landsat_band_5"],
+            lst_method=self.lst_method,
+            emissivity_method=self.emissivity_method,
+            unit=self.unit,
+            quantize=self.quantize,
+            cwv=cwv,
+            fast_math=self.fast_math,
+            thermal_factor=self.thermal_factor,
+        )
+
+    def look_up(self, **bands) -> np.ndarray:
+        """Looks up the land surface temperature of in-memory band arrays in the lookup table"""
+        mask = nodata_mask(bands["landsat_band_10"])
+        ndvi_image = ndvi(bands["landsat_band_5"], bands["landsat_band_4"], mask)
+        lst = self.lookup_table(bands["landsat_band_10"], ndvi_image)
+        if self.quantize:
+            return quantize_temperature(lst)
+        if self.unit == "celcius":
+            return lst - CELCIUS_SCALER
+        return lst
+
+    def look_up_stages(self, **bands) -> dict:
+        """Stage images of the lookup table path: the NDVI, brightness temperature and
+        emissivity the table is indexed by, with the LST (in kelvin) looked up in the table
+        """
+        mask = nodata_mask(bands["landsat_band_10"])
+        ndvi_image = ndvi(bands["landsat_band_5"], bands["landsat_band_4"], mask)
+        emissivity_10, _ = emissivity(
+            ndvi_image, bands["landsat_band_4"], self.emissivity_method
+        )
+        return {
+            "ndvi": ndvi_image,
+            "brightness_temperature_10": compute_brightness_temperature(
+                bands["landsat_band_10"], *self.lookup_table.calibration, mask
+            ),
+            "emissivity_10": emissivity_10,
+            "lst": self.lookup_table(bands["landsat_band_10"], ndvi_image),
+        }
+
+    def run_stage_graph(self, outputs, quantize: bool, cwv, bands: dict) -> dict:
+        """Runs the stage graph of the pipeline methods on in-memory band arrays"""
+        return self.stage_graph(
+            outputs=outputs,
+            max_workers=self.stage_workers,
+            quantize=quantize,
+            cwv=cwv,
+            **{name: bands[name] for name in self.required_bands},
+        )
+
+    def compute_stages(self, cwv=None, **bands) -> tuple:
+        """Computes the land surface temperature of in-memory band arrays along with its
+            intermediate images
+
+        Returns:
+            Tuple(np.ndarray, dict): The output of compute() and the stage images
+                                     (see pylandtemp.pylandtemp.lst_stages), with the LST
+                                     stage as floats in the pipeline unit
+        """
+        if self.stage_graph is not None:
+            names = ["ndvi", "brightness_temperature_10", "emissivity_10", "lst"]
+            if not self.is_single_window:
+                names += ["brightness_temperature_11", "emissivity_11"]
+            stages = self.run_stage_graph(names, False, cwv, bands)
+        elif self.lookup_table is not None:
+            stages = self.look_up_stages(**bands)
+        else:
+            stages = lst_stages(
+                bands["landsat_band_10"],
+                None if self.is_single_window else bands["landsat_band_11"],
+                bands["landsat_band_4"],
+                bands["landsat_band_5"],
+                self.lst_method,
+                self.emissivity_method,
+                cwv=cwv,
+                fast_math=self.fast_math,
+                thermal_factor=self.thermal_factor,
+            )
+        lst_kelvin = stages["lst"]
+        if self.unit == "celcius":
+            stages["lst"] = lst_kelvin - CELCIUS_SCALER
+        if self.quantize:
+            # Encoded from kelvin, as in compute()
+            return quantize_temperature(lst_kelvin), stages
+        return stages["lst"], stages
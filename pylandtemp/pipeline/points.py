@@ -0,0 +1,108 @@
+import numpy as np
+
+from .pipeline import TiledPipeline
+
+
+def rowcol_from_xy(xs, ys, transform) -> tuple:
+    """Converts map coordinates to pixel indices
+
+    Args:
+        xs (array-like): x coordinates
+        ys (array-like): y coordinates
+        transform: Affine transform of the scene in the (a, b, c, d, e, f) order used by
+                   rasterio/affine, where x = a * col + b * row + c and y = d * col + e * row + f.
+                   A rasterio Affine object can be passed directly.
+
+    Returns:
+        Tuple(np.ndarray, np.ndarray): Rows and columns of the pixels containing the coordinates
+    """
+    a, b, c, d, e, f = tuple(transform)[:6]
+    determinant = (a * e) - (b * d)
+    if determinant == 0:
+        raise ValueError("Transform is not invertible")
+    dx = np.asarray(xs, dtype=np.float64) - c
+    dy = np.asarray(ys, dtype=np.float64) - f
+    cols = ((e * dx) - (b * dy)) / determinant
+    rows = ((a * dy) - (d * dx)) / determinant
+    return np.floor(rows).astype(np.intp), np.floor(cols).astype(np.intp)
+
+
+def sample_points(
+    lst_method: str,
+    points,
+    emissivity_method: str = "avdan",
+    unit: str = "kelvin",
+    transform=None,
+    window: int = 1,
+    **bands,
+) -> np.ndarray:
+    """Computes the land surface temperature at a set of pixel locations only.
+
+    The band values of the requested pixels (and their neighborhoods) are gathered and
+    NDVI, brightness temperature, emissivity and LST are computed on those samples alone,
+    so the cost depends on the number of points and not on the size of the scene.
+
+    Args:
+        lst_method (str): key of a single window or split window LST method
+        points (array-like): (n, 2) array of (row, col) pixel indices, or of (x, y)
+                             coordinates when transform is given
+        emissivity_method (str, optional): 'avdan', 'xiaolei' or 'gopinadh'. Defaults to 'avdan'.
+        unit (str, optional): 'kelvin' or 'celcius'. Defaults to 'kelvin'.
+        transform (optional): Affine transform of the scene (see rowcol_from_xy). Defaults to None.
+        window (int, optional): Odd size of the square neighborhood averaged around each point.
+                                Defaults to 1 (the pixel itself).
+
+    kwargs:
+    **landsat_band_10, **landsat_band_11, **landsat_band_4, **landsat_band_5 (array-like):
+        Band sources supporting numpy advanced indexing (numpy arrays, memory maps...).
+        landsat_band_11 is only needed by split window methods.
+
+    Returns:
+        np.ndarray: LST of each point, the NaN-aware mean over its neighborhood.
+                    NaN for points outside the scene or without valid pixels.
+    """
+    if window < 1 or window % 2 == 0:
+        raise ValueError(f"Window size should be a positive odd number: {window}")
+
+    pipeline = TiledPipeline(lst_method, emissivity_method, unit=unit)
+    rows_total, cols_total = pipeline.scene_shape(**bands)
+
+    points = np.asarray(points)
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError("Points should be an array of shape (n, 2)")
+    if len(points) == 0:
+        return np.empty(0)
+    if transform is not None:
+        rows, cols = rowcol_from_xy(points[:, 0], points[:, 1], transform)
+    else:
+        rows, cols = points[:, 0].astype(np.intp), points[:, 1].astype(np.intp)
+
+    offsets = np.arange(window) - (window // 2)
+    sample_rows = (rows[:, None, None] + offsets[None, :, None]).repeat(window, axis=2)
+    sample_cols = (cols[:, None, None] + offsets[None, None, :]).repeat(window, axis=1)
+    # (n, window * window) samples keep the 2-dimensional shape the algorithms expect
+    sample_rows = sample_rows.reshape(len(points), window * window)
+    sample_cols = sample_cols.reshape(len(points), window * window)
+    inside = (
+        (sample_rows >= 0)
+        & (sample_rows < rows_total)
+        & (sample_cols >= 0)
+        & (sample_cols < cols_total)
+    )
+    sample_rows = np.clip(sample_rows, 0, rows_total - 1)
+    sample_cols = np.clip(sample_cols, 0, cols_total - 1)
+
+    samples = {
+        name: np.asarray(bands[name][sample_rows, sample_cols], dtype=np.float64)
+        for name in pipeline.required_bands
+    }
+    # Samples outside the scene are treated as nodata
+    samples["landsat_band_10"][~inside] = 0
+
+    lst = pipeline.compute(**samples)
+    valid = ~np.isnan(lst)
+    count = valid.sum(axis=1)
+    total = np.where(valid, lst, 0).sum(axis=1)
+    center_inside = inside[:, (window * window) // 2]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(center_inside & (count > 0), total / count, np.nan)
@@ -0,0 +1,107 @@
+import numpy as np
+
+from .pipeline import TiledPipeline
+
+
+class ProgressiveLST:
+    def __init__(
+        self,
+        lst_method: str,
+        emissivity_method: str = "avdan",
+        unit: str = "kelvin",
+        strides: tuple = (16, 8, 4, 2, 1),
+        block_rows: int = 256,
+        water_vapour=None,
+    ):
+        """Computes land surface temperature coarse to fine, for interactive display.
+
+        The first level computes every strides[0]-th pixel of every strides[0]-th row. Each
+        following level computes the pixels of its finer grid that no previous level
+        computed, so every pixel is computed exactly once and the total work is the same as
+        a full resolution run. A callback receives the image after each level.
+
+        Args:
+            lst_method (str): key of a single window or split window LST method
+            emissivity_method (str, optional): 'avdan', 'xiaolei' or 'gopinadh'. Defaults to 'avdan'.
+            unit (str, optional): 'kelvin' or 'celcius'. Defaults to 'kelvin'.
+            strides (tuple, optional): Decreasing strides of the levels, each dividing the
+                                       previous one. Defaults to (16, 8, 4, 2, 1).
+            block_rows (int, optional): Rows of a level grid computed at once, which bounds the
+                                        memory of the fine levels. Defaults to 256.
+            water_vapour (WaterVapourGrid, optional): Water vapour grid of 'jiminez-munoz'.
+                                                      Defaults to None.
+        """
+        strides = tuple(int(stride) for stride in strides)
+        if not strides or min(strides) < 1:
+            raise ValueError(f"Strides should be positive: {strides}")
+        for coarse, fine in zip(strides, strides[1:]):
+            if fine >= coarse or coarse % fine:
+                raise ValueError(
+                    f"Each stride should be smaller than and divide the previous one: {strides}"
+                )
+        self.pipeline = TiledPipeline(
+            lst_method, emissivity_method, unit=unit, water_vapour=water_vapour
+        )
+        self.strides = strides
+        self.block_rows = block_rows
+        self.computed_pixels = 0
+
+    def _compute_level(self, out: np.ndarray, stride: int, previous: int, bands: dict):
+        rows = np.arange(0, out.shape[0], stride)
+        cols = np.arange(0, out.shape[1], stride)
+        new_cols = (cols % previous != 0) if previous else np.ones(len(cols), bool)
+        for start in range(0, len(rows), self.block_rows):
+            block_rows = rows[start : start + self.block_rows]
+            # Pixels on the grid of the previous level are already computed
+            new = np.ones((len(block_rows), len(cols)), dtype=bool)
+            if previous:
+                new = (block_rows % previous != 0)[:, None] | new_cols[None, :]
+            if not new.any():
+                continue
+            window = (
+                slice(block_rows[0], block_rows[-1] + 1, stride),
+                slice(0, None, stride),
+            )
+            # Gathered pixels keep the 2-dimensional shape the algorithms expect
+            samples = {
+                name: np.asarray(bands[name][window])[new][None, :]
+                for name in self.pipeline.required_bands
+            }
+            cwv = self.pipeline.tile_water_vapour((block_rows, cols))
+            if cwv is not None:
+                cwv = cwv[new][None, :]
+            block = out[window]
+            block[new] = self.pipeline.compute(cwv=cwv, **samples)[0]
+            self.computed_pixels += int(new.sum())
+
+    def __call__(self, callback=None, cancel=None, **bands) -> np.ndarray:
+        """Computes the levels in order
+
+        Args:
+            callback (callable, optional): Called after each level as callback(stride, preview),
+                                           where preview is the strided image out[::stride, ::stride].
+                                           Returning False cancels the remaining levels.
+            cancel (threading.Event, optional): Event checked between levels, e.g set by a UI thread.
+
+        kwargs:
+        **landsat_band_10, **landsat_band_11, **landsat_band_4, **landsat_band_5 (array-like):
+            Band sources supporting strided 2-dimensional slicing (numpy arrays, memory maps...).
+
+        Returns:
+            np.ndarray: Full resolution LST. Pixels of the levels that were not computed
+                        (after a cancellation) are NaN.
+        """
+        shape = self.pipeline.scene_shape(**bands)
+        out = np.full(shape, np.nan)
+        previous = None
+        for stride in self.strides:
+            if cancel is not None and cancel.is_set():
+                break
+            self._compute_level(out, stride, previous, bands)
+            previous = stride
+            if (
+                callback is not None
+                and callback(stride, out[::stride, ::stride]) is False
+            ):
+                break
+        return out
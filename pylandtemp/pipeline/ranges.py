@@ -0,0 +1,3 @@
+# (min, max) LST range of each unit shared by the histograms, sketches and renderings of
+# the pipelines. It spans -50 to 60 °C, above the max_earth_temp cap of the LST methods.
+LST_VALUE_RANGES = {"kelvin": (223.15, 333.15), "celcius": (-50.0, 60.0)}
@@ -0,0 +1,131 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .pipeline import TiledPipeline
+from .tiles import Tile, TiledArray
+
+
+class LazyLST(TiledArray):
+    def __init__(self, pipeline: TiledPipeline, bands: dict, cache_tiles: int = 64):
+        """Land surface temperature of a scene, evaluated only for the windows that are
+            indexed. Evaluated tiles are kept in a least recently used cache, so windows
+            overlapping a previous request reuse its tiles.
+
+        Args:
+            pipeline (TiledPipeline): Pipeline computing a tile
+            bands (dict): Band sources, keyed like the TiledPipeline keyword arguments
+            cache_tiles (int, optional): Maximum number of cached tiles. Defaults to 64.
+        """
+        self.pipeline = pipeline
+        self.bands = bands
+        self.shape = pipeline.scene_shape(**bands)
+        self.chunks = pipeline.tile_shape
+        self.dtype = pipeline.dtype
+        self.cache_tiles = cache_tiles
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _tile(self, i: int, j: int) -> Tile:
+        rows, cols = self.chunks
+        return Tile(
+            i * rows,
+            j * cols,
+            min(rows, self.shape[0] - i * rows),
+            min(cols, self.shape[1] - j * cols),
+        )
+
+    def read_chunk(self, i: int, j: int) -> np.ndarray:
+        return self.read_chunks([(i, j)])[(i, j)]
+
+    def read_chunks(self, indices: list) -> dict:
+        tiles = {}
+        with self._lock:
+            for index in indices:
+                if index in self._cache:
+                    self._cache.move_to_end(index)
+                    tiles[index] = self._cache[index]
+                    self.hits += 1
+            missing = [index for index in indices if index not in tiles]
+            self.misses += len(missing)
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=self.pipeline.max_workers) as executor:
+                computed = executor.map(
+                    lambda index: self.pipeline.compute_tile(
+                        self._tile(*index), **self.bands
+                    ),
+                    missing,
+                )
+                tiles.update(zip(missing, computed))
+            with self._lock:
+                for index in missing:
+                    self._cache[index] = tiles[index]
+                    self._cache.move_to_end(index)
+                while len(self._cache) > self.cache_tiles:
+                    self._cache.popitem(last=False)
+        return tiles
+
+    def cache_info(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "cached_tiles": len(self._cache),
+            "max_tiles": self.cache_tiles,
+        }
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+
+class LSTScene:
+    def __init__(
+        self,
+        lst_method: str,
+        emissivity_method: str = "avdan",
+        unit: str = "kelvin",
+        tile_shape: tuple = (256, 256),
+        cache_tiles: int = 64,
+        max_workers: int = None,
+        quantize: bool = False,
+        **bands,
+    ):
+        """Lazy land surface temperature of a scene.
+
+        Nothing is computed at construction. Indexing scene.lst, e.g
+        scene.lst[r0:r1, c0:c1], reads the band windows of the tiles overlapping the
+        requested window, computes those tiles only and caches them for later requests.
+
+        Args:
+            lst_method (str): key of a single window or split window LST method
+            emissivity_method (str, optional): 'avdan', 'xiaolei' or 'gopinadh'. Defaults to 'avdan'.
+            unit (str, optional): 'kelvin' or 'celcius'. Defaults to 'kelvin'.
+            tile_shape (tuple, optional): (rows, columns) of the evaluated and cached tiles.
+                                          Defaults to (256, 256).
+            cache_tiles (int, optional): Maximum number of cached tiles. Defaults to 64.
+            max_workers (int, optional): Number of threads computing the tiles of a request.
+            quantize (bool, optional): If True, the LST is scaled int16. Defaults to False.
+
+        kwargs:
+        **landsat_band_10, **landsat_band_11, **landsat_band_4, **landsat_band_5 (array-like):
+            Band sources supporting 2-dimensional slicing (numpy arrays, memory maps, ChunkedArray...).
+            landsat_band_11 is only needed by split window methods.
+        """
+        self.pipeline = TiledPipeline(
+            lst_method,
+            emissivity_method,
+            unit=unit,
+            tile_shape=tile_shape,
+            max_workers=max_workers,
+            quantize=quantize,
+        )
+        self.lst = LazyLST(self.pipeline, bands, cache_tiles=cache_tiles)
+
+    @property
+    def shape(self) -> tuple:
+        return self.lst.shape
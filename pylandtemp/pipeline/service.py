@@ -0,0 +1,252 @@
+import json
+import os
+import socket
+import socketserver
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .jobs import job_pipeline_key, run_job
+from .pipeline import TiledPipeline
+
+
+def remove_socket(path: str):
+    """Removes a stale unix socket file, refusing to remove any other kind of file"""
+    if not os.path.exists(path):
+        return
+    if not stat.S_ISSOCK(os.stat(path).st_mode):
+        raise ValueError(f"Service address exists and is not a unix socket: {path}")
+    os.remove(path)
+
+
+class QueueFullError(Exception):
+    """The service already holds the maximum number of queued jobs"""
+
+    pass
+
+
+class LSTService:
+    def __init__(
+        self,
+        address,
+        max_concurrent_jobs: int = 2,
+        max_queued_jobs: int = 64,
+        tile_shape: tuple = (1024, 1024),
+        max_workers: int = None,
+    ):
+        """Long running LST worker serving jobs over a local socket.
+
+        The process keeps NumPy, pylandtemp and the configured pipelines loaded between
+        jobs, so small jobs do not pay the start up cost of a new Python process.
+        Requests and responses are single lines of JSON.
+
+        Requests:
+        {"action": "compute", "lst_method": ..., "emissivity_method": ..., "unit": ..., "quantize": ...,
+         "bands": {"landsat_band_10": BAND, ...}, "output": OUTPUT}
+            See pylandtemp.pipeline.jobs.run_job for BAND and OUTPUT. Shared memory
+            outputs are segments of the LST size created by the client.
+        {"action": "stats"}: queue depth and job counters
+        {"action": "ping"}
+
+        Args:
+            address (str or tuple): Path of a Unix domain socket, or (host, port) for TCP on localhost
+            max_concurrent_jobs (int, optional): Number of jobs computed at the same time. Defaults to 2.
+            max_queued_jobs (int, optional): Jobs waiting beyond this number are rejected. Defaults to 64.
+            tile_shape (tuple, optional): Tile shape of the pipelines. Defaults to (1024, 1024).
+            max_workers (int, optional): Threads computing the tiles of a job.
+        """
+        self.address = address
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.max_queued_jobs = max_queued_jobs
+        self.tile_shape = tuple(tile_shape)
+        self.max_workers = max_workers
+
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent_jobs)
+        self.pipelines = {}
+        self.counters = {"queued": 0, "running": 0, "completed": 0, "failed": 0}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": self.counters["queued"],
+                "running": self.counters["running"],
+                "completed": self.counters["completed"],
+                "failed": self.counters["failed"],
+                "max_concurrent_jobs": self.max_concurrent_jobs,
+                "cached_pipelines": len(self.pipelines),
+            }
+
+    def pipeline(
+        self, lst_method, emissivity_method="avdan", unit="kelvin", quantize=False
+    ):
+        """Returns the warm pipeline of a configuration, creating it on first use"""
+        key = (lst_method, emissivity_method, unit, bool(quantize))
+        with self._lock:
+            if key not in self.pipelines:
+                self.pipelines[key] = TiledPipeline(
+                    lst_method,
+                    emissivity_method,
+                    unit=unit,
+                    tile_shape=self.tile_shape,
+                    max_workers=self.max_workers,
+                    quantize=quantize,
+                )
+            return self.pipelines[key]
+
+    def submit(self, job: dict):
+        """Queues a compute job, returns a Future of its result"""
+        with self._lock:
+            if self.counters["queued"] >= self.max_queued_jobs:
+                raise QueueFullError(
+                    f"Queue is full ({self.max_queued_jobs} jobs waiting)"
+                )
+            self.counters["queued"] += 1
+        return self.executor.submit(self._run, job)
+
+    def _run(self, job: dict) -> dict:
+        with self._lock:
+            self.counters["queued"] -= 1
+            self.counters["running"] += 1
+        try:
+            result = self.compute(job)
+        except Exception:
+            with self._lock:
+                self.counters["failed"] += 1
+            raise
+        else:
+            with self._lock:
+                self.counters["completed"] += 1
+            return result
+        finally:
+            with self._lock:
+                self.counters["running"] -= 1
+
+    def compute(self, job: dict) -> dict:
+        return run_job(self.pipeline(*job_pipeline_key(job)), job)
+
+    def handle(self, request: dict) -> dict:
+        """Executes a request, blocking until compute jobs are done"""
+        action = request.get("action")
+        if action == "ping":
+            return {"status": "ok"}
+        if action == "stats":
+            return {"status": "ok", **self.stats()}
+        if action == "compute":
+            return {"status": "ok", **self.submit(request).result()}
+        raise ValueError(f"Unknown action: {action}")
+
+    def _make_server(self):
+        service = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    try:
+                        response = service.handle(json.loads(line))
+                    except Exception as error:
+                        response = {
+                            "status": "error",
+                            "error": f"{type(error).__name__}: {error}",
+                        }
+                    self.wfile.write((json.dumps(response) + "\n").encode())
+                    self.wfile.flush()
+
+        if isinstance(self.address, str):
+            remove_socket(self.address)
+
+            class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+                daemon_threads = True
+
+        else:
+
+            class Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+                daemon_threads = True
+                allow_reuse_address = True
+
+        return Server(self.address, Handler)
+
+    def serve_forever(self):
+        """Serves requests in the current thread until shutdown() is called"""
+        self._server = self._make_server()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def start(self):
+        """Serves requests from a background thread"""
+        self._server = self._make_server()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.executor.shutdown(wait=True)
+        if isinstance(self.address, str):
+            remove_socket(self.address)
+
+
+class LSTServiceClient:
+    def __init__(self, address, timeout: float = None):
+        """Client of an LSTService
+
+        Args:
+            address (str or tuple): Unix socket path or (host, port) of the service
+            timeout (float, optional): Socket timeout in seconds. Defaults to None (no timeout).
+        """
+        self.address = address
+        self.timeout = timeout
+
+    def request(self, request: dict) -> dict:
+        family = socket.AF_UNIX if isinstance(self.address, str) else socket.AF_INET
+        with socket.socket(family, socket.SOCK_STREAM) as connection:
+            connection.settimeout(self.timeout)
+            connection.connect(self.address)
+            connection.sendall((json.dumps(request) + "\n").encode())
+            with connection.makefile("rb") as response:
+                result = json.loads(response.readline())
+        if result["status"] != "ok":
+            raise RuntimeError(result["error"])
+        return result
+
+    def ping(self) -> dict:
+        return self.request({"action": "ping"})
+
+    def stats(self) -> dict:
+        return self.request({"action": "stats"})
+
+    def compute(
+        self,
+        lst_method: str,
+        bands: dict,
+        output: dict,
+        emissivity_method: str = "avdan",
+        unit: str = "kelvin",
+        quantize: bool = False,
+    ) -> dict:
+        """Runs a compute job on the service and waits for it. See LSTService for the
+        format of bands and output.
+        """
+        return self.request(
+            {
+                "action": "compute",
+                "lst_method": lst_method,
+                "emissivity_method": emissivity_method,
+                "unit": unit,
+                "quantize": quantize,
+                "bands": bands,
+                "output": output,
+            }
+        )
@@ -0,0 +1,265 @@
+import json
+import os
+import zlib
+
+import numpy as np
+
+from pylandtemp.utils import block_nanmean
+from pylandtemp.temperature.utils import dequantize_temperature
+from .tiles import TiledArray
+
+
+def _encode_fill_value(fill_value):
+    if isinstance(fill_value, float) and np.isnan(fill_value):
+        return "NaN"
+    return fill_value
+
+
+def _decode_fill_value(fill_value):
+    return np.nan if fill_value == "NaN" else fill_value
+
+
+def _write_json(path: str, content: dict):
+    with open(path, "w") as f:
+        json.dump(content, f, indent=4)
+
+
+def _read_json(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def decode_tile(data: np.ndarray, attrs: dict) -> np.ndarray:
+    """Decodes a quantized tile to float temperatures using the pipeline attrs.
+    Float tiles are returned unchanged.
+    """
+    if not attrs or "scale_factor" not in attrs:
+        return data
+    return dequantize_temperature(
+        data,
+        add_offset=attrs["add_offset"],
+        scale_factor=attrs["scale_factor"],
+        nodata=attrs["_FillValue"],
+    )
+
+
+class ArraySink:
+    def __init__(self, out: np.ndarray = None):
+        """Assembles the finished tiles into a single image
+
+        Args:
+            out (np.ndarray, optional): Preallocated output (e.g a memory map or an array
+                                        backed by shared memory) the tiles are written into.
+                                        Defaults to None, which allocates a new array.
+        """
+        self.out = out
+        self.image = None
+
+    def open(
+        self, shape: tuple, dtype, tile_shape: tuple, fill_value=np.nan, attrs=None
+    ):
+        if self.out is None:
+            self.image = np.full(shape, fill_value, dtype=dtype)
+            return
+        if tuple(self.out.shape) != tuple(shape) or self.out.dtype != dtype:
+            raise ValueError(
+                f"Output array should have shape {shape} and dtype {dtype}, not {self.out.shape} and {self.out.dtype}"
+            )
+        self.image = self.out
+
+    def write(self, tile, data: np.ndarray):
+        self.image[tile.window] = data
+
+    def close(self) -> np.ndarray:
+        return self.image
+
+
+class ChunkedArray(TiledArray):
+    def __init__(self, path: str):
+        """Lazy, read-only view of a chunked and zlib-compressed 2-dimensional array on disk.
+
+        The layout follows the zarr v2 storage specification: a '.zarray' metadata file
+        and one compressed file per chunk named '<row chunk>.<column chunk>'. Chunks are
+        only read and decompressed when a window overlapping them is requested.
+
+        Args:
+            path (str): Directory holding the array
+        """
+        self.path = path
+        metadata = _read_json(os.path.join(path, ".zarray"))
+        self.shape = tuple(metadata["shape"])
+        self.chunks = tuple(metadata["chunks"])
+        self.dtype = np.dtype(metadata["dtype"])
+        self.fill_value = _decode_fill_value(metadata["fill_value"])
+        self.compression_level = metadata["compressor"]["level"]
+        attrs_path = os.path.join(path, ".zattrs")
+        self.attrs = _read_json(attrs_path) if os.path.exists(attrs_path) else {}
+
+    @classmethod
+    def create(
+        cls,
+        path: str,
+        shape: tuple,
+        chunks: tuple,
+        dtype,
+        fill_value=np.nan,
+        compression_level: int = 5,
+        attrs: dict = None,
+    ):
+        """Writes the metadata of a new, empty array and returns it"""
+        os.makedirs(path, exist_ok=True)
+        metadata = {
+            "zarr_format": 2,
+            "shape": list(shape),
+            "chunks": list(chunks),
+            "dtype": np.dtype(dtype).str,
+            "compressor": {"id": "zlib", "level": compression_level},
+            "fill_value": _encode_fill_value(fill_value),
+            "order": "C",
+            "filters": None,
+        }
+        _write_json(os.path.join(path, ".zarray"), metadata)
+        if attrs:
+            _write_json(os.path.join(path, ".zattrs"), attrs)
+        return cls(path)
+
+    def _chunk_path(self, i: int, j: int) -> str:
+        return os.path.join(self.path, f"{i}.{j}")
+
+    def has_chunk(self, i: int, j: int) -> bool:
+        return os.path.exists(self._chunk_path(i, j))
+
+    def write_chunk(self, i: int, j: int, data: np.ndarray):
+        """Compresses and writes a chunk. Edge chunks are padded with the fill value.
+
+        Every chunk lives in its own file, so different chunks can be written
+        concurrently from several threads or processes.
+        """
+        chunk = np.full(self.chunks, self.fill_value, dtype=self.dtype)
+        chunk[: data.shape[0], : data.shape[1]] = data
+        path = self._chunk_path(i, j)
+        temporary_path = f"{path}.{os.getpid()}.{id(chunk)}.tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(zlib.compress(chunk.tobytes(), self.compression_level))
+        os.replace(temporary_path, path)
+
+    def read_chunk(self, i: int, j: int) -> np.ndarray:
+        """Reads a chunk. Chunks that were never written hold the fill value."""
+        path = self._chunk_path(i, j)
+        if not os.path.exists(path):
+            return np.full(self.chunks, self.fill_value, dtype=self.dtype)
+        with open(path, "rb") as f:
+            data = zlib.decompress(f.read())
+        return np.frombuffer(data, dtype=self.dtype).reshape(self.chunks)
+
+
+class ChunkedStore:
+    def __init__(self, path: str):
+        """Reads back the output of a ChunkedStoreSink
+
+        Args:
+            path (str): Directory of the store
+        """
+        self.path = path
+        self.attrs = _read_json(os.path.join(path, ".zattrs"))
+        self.lst = ChunkedArray(os.path.join(path, self.attrs["name"]))
+        self.overviews = {
+            factor: ChunkedArray(os.path.join(path, f"overview_{factor}"))
+            for factor in self.attrs["overviews"]
+        }
+
+    def overview(self, factor: int) -> ChunkedArray:
+        if factor == 1:
+            return self.lst
+        if factor not in self.overviews:
+            raise ValueError(
+                f"No overview with factor {factor}. Available factors: {list(self.overviews)}"
+            )
+        return self.overviews[factor]
+
+
+class ChunkedStoreSink:
+    def __init__(
+        self,
+        path: str,
+        overviews: tuple = (),
+        compression_level: int = 5,
+        name: str = "lst",
+    ):
+        """Streams finished tiles to a directory of compressed chunk files.
+
+        Each tile is written to its own chunk as soon as it is computed, so the full image
+        is never materialized. Reduced resolution overviews are computed from the same tile
+        (NaN-aware block average) and written in the same pass.
+
+        Args:
+            path (str): Directory of the store. Created if it does not exist.
+            overviews (tuple[int], optional): Downsampling factors of the overview levels,
+                                              e.g (2, 4, 8). They must divide the tile shape.
+                                              Defaults to no overviews.
+            compression_level (int, optional): zlib compression level (0-9). Defaults to 5.
+            name (str, optional): Name of the full resolution array. Defaults to 'lst'.
+        """
+        self.path = path
+        self.overview_factors = tuple(int(factor) for factor in overviews)
+        self.compression_level = compression_level
+        self.name = name
+        self.array = None
+        self.overviews = {}
+
+    def open(
+        self, shape: tuple, dtype, tile_shape: tuple, fill_value=np.nan, attrs=None
+    ):
+        for factor in self.overview_factors:
+            if factor < 2 or tile_shape[0] % factor or tile_shape[1] % factor:
+                raise ValueError(
+                    f"Overview factor {factor} should be greater than 1 and divide the tile shape {tile_shape}"
+                )
+
+        os.makedirs(self.path, exist_ok=True)
+        _write_json(os.path.join(self.path, ".zgroup"), {"zarr_format": 2})
+        _write_json(
+            os.path.join(self.path, ".zattrs"),
+            {"name": self.name, "overviews": list(self.overview_factors)},
+        )
+
+        self.array = ChunkedArray.create(
+            os.path.join(self.path, self.name),
+            shape,
+            tile_shape,
+            dtype,
+            fill_value=fill_value,
+            compression_level=self.compression_level,
+            attrs=attrs,
+        )
+        self.overviews = {
+            factor: ChunkedArray.create(
+                os.path.join(self.path, f"overview_{factor}"),
+                (-(-shape[0] // factor), -(-shape[1] // factor)),
+                (tile_shape[0] // factor, tile_shape[1] // factor),
+                dtype,
+                fill_value=fill_value,
+                compression_level=self.compression_level,
+                attrs=attrs,
+            )
+            for factor in self.overview_factors
+        }
+
+    def write(self, tile, data: np.ndarray):
+        i, j = tile.row // self.array.chunks[0], tile.col // self.array.chunks[1]
+        self.array.write_chunk(i, j, data)
+        for factor, overview in self.overviews.items():
+            overview.write_chunk(i, j, self._aggregate(data, factor))
+
+    def _aggregate(self, data: np.ndarray, factor: int) -> np.ndarray:
+        if not np.issubdtype(self.array.dtype, np.integer):
+            return block_nanmean(data, factor)
+        # Scaled integer tiles are averaged in the scaled domain and rounded back
+        fill_value = self.array.fill_value
+        mean = block_nanmean(np.where(data == fill_value, np.nan, data), factor)
+        return np.where(np.isnan(mean), fill_value, np.rint(mean)).astype(
+            self.array.dtype
+        )
+
+    def close(self) -> ChunkedStore:
+        return ChunkedStore(self.path)
@@ -0,0 +1,155 @@
+import threading
+
+import numpy as np
+
+from .ranges import LST_VALUE_RANGES
+
+# Histogram ranges of the stages. Values outside of them are counted in the edge bins.
+DEFAULT_STAGE_RANGES = {
+    "ndvi": (-1.0, 1.0),
+    "emissivity_10": (0.9, 1.0),
+    "emissivity_11": (0.9, 1.0),
+    "brightness_temperature_10": (200.0, 350.0),
+    "brightness_temperature_11": (200.0, 350.0),
+    "lst": LST_VALUE_RANGES,
+}
+
+
+class SummaryAccumulator:
+    def __init__(self, value_range: tuple, bins: int = 512):
+        """Mergeable summary of the values of an image received in pieces: count of valid
+            and NaN values, min, max, mean and variance (merged with Chan's parallel
+            algorithm) and a fixed-bin histogram, from which percentiles are interpolated.
+
+        Args:
+            value_range (tuple): (min, max) range of the histogram
+            bins (int, optional): Number of histogram bins. Defaults to 512.
+        """
+        self.value_range = tuple(value_range)
+        self.bins = bins
+        self.count = 0
+        self.nan_count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.histogram = np.zeros(bins, dtype=np.int64)
+
+    @classmethod
+    def from_values(cls, values: np.ndarray, value_range: tuple, bins: int = 512):
+        """Summary of an array of values"""
+        summary = cls(value_range, bins)
+        values = np.asarray(values, dtype=np.float64).ravel()
+        valid = values[~np.isnan(values)]
+        summary.nan_count = len(values) - len(valid)
+        summary.count = len(valid)
+        if summary.count:
+            summary.mean = float(valid.mean())
+            summary.m2 = float(((valid - summary.mean) ** 2).sum())
+            summary.min = float(valid.min())
+            summary.max = float(valid.max())
+            low, high = summary.value_range
+            indices = np.clip(
+                ((valid - low) * (bins / (high - low))).astype(np.intp), 0, bins - 1
+            )
+            summary.histogram = np.bincount(indices, minlength=bins)
+        return summary
+
+    def merge(self, other: "SummaryAccumulator"):
+        """Adds the values summarized by another accumulator with the same bins"""
+        if other.value_range != self.value_range or other.bins != self.bins:
+            raise ValueError(
+                "Only summaries with the same histogram bins can be merged"
+            )
+        count = self.count + other.count
+        if other.count:
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / count
+            self.m2 += other.m2 + delta**2 * self.count * other.count / count
+        self.count = count
+        self.nan_count += other.nan_count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.histogram += other.histogram
+        return self
+
+    def percentile(self, q: float) -> float:
+        """Percentile interpolated in the histogram, exact to a bin width"""
+        if self.count == 0:
+            return np.nan
+        cumulative = np.cumsum(self.histogram)
+        target = q / 100 * self.count
+        index = min(int(np.searchsorted(cumulative, target)), self.bins - 1)
+        below = cumulative[index] - self.histogram[index]
+        fraction = (
+            (target - below) / self.histogram[index] if self.histogram[index] else 0
+        )
+        low, high = self.value_range
+        value = low + (index + fraction) * (high - low) / self.bins
+        return float(np.clip(value, self.min, self.max))
+
+    def summary(self, percentiles: tuple = (1, 5, 25, 50, 75, 95, 99)) -> dict:
+        empty = self.count == 0
+        low, high = self.value_range
+        return {
+            "count": self.count,
+            "nan_count": self.nan_count,
+            "min": np.nan if empty else self.min,
+            "max": np.nan if empty else self.max,
+            "mean": np.nan if empty else self.mean,
+            "std": np.nan if empty else float(np.sqrt(self.m2 / self.count)),
+            "percentiles": {q: self.percentile(q) for q in percentiles},
+            "histogram": self.histogram.copy(),
+            "bin_edges": np.linspace(low, high, self.bins + 1),
+        }
+
+
+class StatsCollector:
+    def __init__(
+        self,
+        unit: str = "kelvin",
+        bins: int = 512,
+        ranges: dict = None,
+        percentiles: tuple = (1, 5, 25, 50, 75, 95, 99),
+    ):
+        """Collects per-stage summaries (NDVI, brightness temperature, emissivity, LST) of a
+            TiledPipeline run while the tiles are computed, so that no intermediate image has
+            to be kept. Tile summaries are merged under a lock in any order.
+
+        Args:
+            unit (str, optional): Unit of the LST stage. Defaults to 'kelvin'.
+            bins (int, optional): Number of histogram bins per stage. Defaults to 512.
+            ranges (dict, optional): Histogram (min, max) per stage. Defaults to DEFAULT_STAGE_RANGES.
+            percentiles (tuple, optional): Percentiles reported in the summaries.
+        """
+        self.bins = bins
+        self.percentiles = tuple(percentiles)
+        self.ranges = {
+            stage: value_range[unit] if isinstance(value_range, dict) else value_range
+            for stage, value_range in DEFAULT_STAGE_RANGES.items()
+        }
+        self.ranges.update(ranges or {})
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def update(self, stages: dict):
+        """Adds the images of the stages of a tile"""
+        tile_summaries = {
+            stage: SummaryAccumulator.from_values(image, self.ranges[stage], self.bins)
+            for stage, image in stages.items()
+            if stage in self.ranges
+        }
+        with self._lock:
+            for stage, summary in tile_summaries.items():
+                if stage in self.stages:
+                    self.stages[stage].merge(summary)
+                else:
+                    self.stages[stage] = summary
+
+    def summary(self) -> dict:
+        """Summary dict of every stage (see SummaryAccumulator.summary)"""
+        with self._lock:
+            return {
+                stage: accumulator.summary(self.percentiles)
+                for stage, accumulator in self.stages.items()
+            }
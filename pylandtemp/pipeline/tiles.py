@@ -0,0 +1,148 @@
+from collections import namedtuple
+
+import numpy as np
+
+
+class Tile(namedtuple("Tile", ("row", "col", "height", "width"))):
+    """Rectangular window of a scene, given by its top-left pixel and its size"""
+
+    __slots__ = ()
+
+    @property
+    def window(self):
+        """Tuple of slices selecting the tile from a 2-dimensional image"""
+        return (
+            slice(self.row, self.row + self.height),
+            slice(self.col, self.col + self.width),
+        )
+
+    @property
+    def shape(self):
+        return (self.height, self.width)
+
+
+def generate_tiles(shape: tuple, tile_shape: tuple) -> list:
+    """Splits an image of the given shape into a row-major list of tiles
+
+    Args:
+        shape (tuple): (rows, columns) of the full image
+        tile_shape (tuple): (rows, columns) of a tile. Tiles on the bottom and
+                            right edges are cropped to the image.
+
+    Returns:
+        list[Tile]: Tiles covering the image without overlap
+    """
+    if len(shape) != 2 or len(tile_shape) != 2:
+        raise ValueError("Image and tile shapes should be 2-dimensional")
+    if min(tile_shape) < 1:
+        raise ValueError(f"Tile shape should be positive: {tile_shape}")
+
+    rows, cols = shape
+    tile_rows, tile_cols = tile_shape
+    return [
+        Tile(row, col, min(tile_rows, rows - row), min(tile_cols, cols - col))
+        for row in range(0, rows, tile_rows)
+        for col in range(0, cols, tile_cols)
+    ]
+
+
+def normalize_window(key, shape: tuple) -> tuple:
+    """Converts a 2-dimensional basic index (ints and slices) to window bounds
+
+    Args:
+        key: Index, e.g. (slice(0, 512), slice(1024, 1536)) or 5
+        shape (tuple): (rows, columns) of the indexed image
+
+    Returns:
+        tuple: ([(start, stop, step) per axis], [axes indexed by an int, to squeeze])
+    """
+    if not isinstance(key, tuple):
+        key = (key,)
+    if len(key) > 2:
+        raise IndexError("Too many indices for a 2-dimensional array")
+    key = key + (slice(None),) * (2 - len(key))
+
+    bounds, squeeze = [], []
+    for axis, (index, size) in enumerate(zip(key, shape)):
+        if isinstance(index, (int, np.integer)):
+            index = int(index) + size if index < 0 else int(index)
+            if not 0 <= index < size:
+                raise IndexError(
+                    f"Index out of bounds for axis {axis} with size {size}"
+                )
+            bounds.append((index, index + 1, 1))
+            squeeze.append(axis)
+        elif isinstance(index, slice):
+            start, stop, step = index.indices(size)
+            if step < 0:
+                raise IndexError("Negative slice steps are not supported")
+            bounds.append((start, max(start, stop), step))
+        else:
+            raise TypeError(f"Unsupported index type: {type(index).__name__}")
+    return bounds, squeeze
+
+
+class TiledArray:
+    """Parent class of read-only 2-dimensional arrays assembled on demand from the
+    chunks of a regular grid. Concrete classes set shape, chunks and dtype and
+    implement read_chunk.
+    """
+
+    shape = None
+    chunks = None
+    dtype = None
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def chunk_grid(self) -> tuple:
+        """Number of chunks along each axis"""
+        return tuple(-(-size // chunk) for size, chunk in zip(self.shape, self.chunks))
+
+    def read_chunk(self, i: int, j: int) -> np.ndarray:
+        raise NotImplementedError("No concrete implementation of read_chunk yet")
+
+    def read_chunks(self, indices: list) -> dict:
+        """Reads several chunks, returned as a dict keyed by (i, j)"""
+        return {(i, j): self.read_chunk(i, j) for i, j in indices}
+
+    def chunks_in_window(
+        self, row_start: int, row_stop: int, col_start: int, col_stop: int
+    ) -> list:
+        """Returns the (i, j) indices of the chunks overlapping a window"""
+        chunk_rows, chunk_cols = self.chunks
+        return [
+            (i, j)
+            for i in range(row_start // chunk_rows, -(-row_stop // chunk_rows))
+            for j in range(col_start // chunk_cols, -(-col_stop // chunk_cols))
+        ]
+
+    def read_window(self, row_start: int, row_stop: int, col_start: int, col_stop: int):
+        """Reads the window [row_start:row_stop, col_start:col_stop] from the chunks overlapping it"""
+        out = np.empty((row_stop - row_start, col_stop - col_start), dtype=self.dtype)
+        chunk_rows, chunk_cols = self.chunks
+        indices = self.chunks_in_window(row_start, row_stop, col_start, col_stop)
+        for (i, j), chunk in self.read_chunks(indices).items():
+            r0 = max(row_start, i * chunk_rows)
+            r1 = min(row_stop, (i + 1) * chunk_rows)
+            c0 = max(col_start, j * chunk_cols)
+            c1 = min(col_stop, (j + 1) * chunk_cols)
+            out[r0 - row_start : r1 - row_start, c0 - col_start : c1 - col_start] = (
+                chunk[
+                    r0 - i * chunk_rows : r1 - i * chunk_rows,
+                    c0 - j * chunk_cols : c1 - j * chunk_cols,
+                ]
+            )
+        return out
+
+    def __getitem__(self, key) -> np.ndarray:
+        bounds, squeeze = normalize_window(key, self.shape)
+        (r0, r1, row_step), (c0, c1, col_step) = bounds
+        out = self.read_window(r0, r1, c0, c1)[::row_step, ::col_step]
+        return out.squeeze(axis=tuple(squeeze)) if squeeze else out
+
+    def __array__(self, dtype=None, copy=None):
+        out = self[:, :]
+        return out if dtype is None else out.astype(dtype)
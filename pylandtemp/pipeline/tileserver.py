@@ -0,0 +1,321 @@
+import io
+import math
+import re
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from pylandtemp.pylandtemp import ndvi, emissivity
+from pylandtemp.masks import nodata_mask
+from pylandtemp.utils import block_nanmean
+from .pipeline import TiledPipeline
+from .ranges import LST_VALUE_RANGES
+from .tiles import Tile
+
+# Blue - cyan - yellow - red ramp used to render tiles
+_RAMP = np.array([[0, 0, 255], [0, 255, 255], [255, 255, 0], [255, 0, 0]], dtype=float)
+PALETTE = np.stack(
+    [np.interp(np.linspace(0, 3, 255), np.arange(4), _RAMP[:, k]) for k in range(3)],
+    axis=1,
+).astype(np.uint8)
+
+DEFAULT_VALUE_RANGES = {
+    "lst": LST_VALUE_RANGES,
+    "ndvi": (-1.0, 1.0),
+    "emissivity": (0.95, 1.0),
+}
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return (
+        struct.pack(">I", len(data))
+        + kind
+        + data
+        + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+    )
+
+
+def encode_png(image: np.ndarray, value_range: tuple) -> bytes:
+    """Renders a 2-dimensional image to an 8-bit paletted PNG with the blue to red ramp.
+        NaN pixels are transparent.
+
+    Args:
+        image (np.ndarray): Image to render
+        value_range (tuple): (min, max) values mapped to the ends of the ramp
+
+    Returns:
+        bytes: PNG file content
+    """
+    low, high = value_range
+    invalid = np.isnan(image)
+    scaled = np.clip((np.where(invalid, low, image) - low) / (high - low), 0, 1)
+    # Palette index 0 is reserved for NaN
+    indices = np.where(invalid, 0, 1 + np.rint(scaled * 254)).astype(np.uint8)
+
+    rows, cols = indices.shape
+    raw = np.zeros((rows, cols + 1), dtype=np.uint8)
+    raw[:, 1:] = indices
+    palette = np.vstack([np.zeros((1, 3), dtype=np.uint8), PALETTE])
+    transparency = bytes([0] + [255] * 255)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _png_chunk(b"IHDR", struct.pack(">IIBBBBB", cols, rows, 8, 3, 0, 0, 0))
+        + _png_chunk(b"PLTE", palette.tobytes())
+        + _png_chunk(b"tRNS", transparency)
+        + _png_chunk(b"IDAT", zlib.compress(raw.tobytes(), 6))
+        + _png_chunk(b"IEND", b"")
+    )
+
+
+class ByteLRUCache:
+    def __init__(self, max_bytes: int):
+        """Thread safe least recently used cache bounded by the total size of its values
+
+        Args:
+            max_bytes (int): Maximum total size of the cached values (len() of bytes,
+                             nbytes of arrays)
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _size(value) -> int:
+        return value.nbytes if isinstance(value, np.ndarray) else len(value)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        size = self._size(value)
+        with self._lock:
+            if key in self._items:
+                self.nbytes -= self._size(self._items.pop(key))
+            if size > self.max_bytes:
+                return
+            self._items[key] = value
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.nbytes -= self._size(evicted)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key) -> bool:
+        return key in self._items
+
+    def info(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "items": len(self._items),
+            "nbytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class TileServer:
+    def __init__(
+        self,
+        lst_method: str,
+        emissivity_method: str = "avdan",
+        unit: str = "kelvin",
+        tile_size: int = 256,
+        cache_bytes: int = 256 * 2**20,
+        value_ranges: dict = None,
+        **bands,
+    ):
+        """Serves z/x/y map tiles of LST, NDVI or emissivity computed on demand.
+
+        Tiles are laid out on the pixel grid of the scene: at the maximum zoom level a tile
+        holds tile_size x tile_size scene pixels and every zoom level below halves the
+        resolution. Full resolution tiles read only their band windows. Lower zoom tiles
+        are built by averaging (NaN-aware, 2 x 2) the four tiles of the level above, which
+        are taken from the cache when available. Tile values and rendered tiles share a
+        byte-bounded least recently used cache.
+
+        Args:
+            lst_method (str): key of a single window or split window LST method
+            emissivity_method (str, optional): 'avdan', 'xiaolei' or 'gopinadh'. Defaults to 'avdan'.
+            unit (str, optional): 'kelvin' or 'celcius'. Defaults to 'kelvin'.
+            tile_size (int, optional): Tile width and height in pixels. Defaults to 256.
+            cache_bytes (int, optional): Size of the cache. Defaults to 256 MiB.
+            value_ranges (dict, optional): (min, max) rendering range per product
+                                           ('lst', 'ndvi', 'emissivity'). Defaults to DEFAULT_VALUE_RANGES.
+
+        kwargs:
+        **landsat_band_10, **landsat_band_11, **landsat_band_4, **landsat_band_5 (array-like):
+            Band sources supporting 2-dimensional slicing.
+        """
+        self.pipeline = TiledPipeline(
+            lst_method, emissivity_method, unit=unit, tile_shape=(tile_size, tile_size)
+        )
+        self.bands = bands
+        self.shape = self.pipeline.scene_shape(**bands)
+        self.tile_size = tile_size
+        self.max_zoom = max(0, math.ceil(math.log2(max(self.shape) / tile_size)))
+        self.cache = ByteLRUCache(cache_bytes)
+        self.value_ranges = {
+            "lst": DEFAULT_VALUE_RANGES["lst"][unit],
+            "ndvi": DEFAULT_VALUE_RANGES["ndvi"],
+            "emissivity": DEFAULT_VALUE_RANGES["emissivity"],
+        }
+        self.value_ranges.update(value_ranges or {})
+
+    @property
+    def products(self) -> tuple:
+        return tuple(self.value_ranges)
+
+    def tile_count(self, zoom: int) -> tuple:
+        """Number of (x, y) tiles at a zoom level"""
+        pixels = self.tile_size * 2 ** (self.max_zoom - zoom)
+        return (-(-self.shape[1] // pixels), -(-self.shape[0] // pixels))
+
+    def _check(self, product: str, zoom: int, x: int, y: int):
+        if product not in self.value_ranges:
+            raise KeyError(f"Unknown product {product}. Choose among {self.products}")
+        if not 0 <= zoom <= self.max_zoom:
+            raise KeyError(f"Zoom should be between 0 and {self.max_zoom}")
+        columns, rows = self.tile_count(zoom)
+        if not (0 <= x < columns and 0 <= y < rows):
+            raise KeyError(f"Tile {zoom}/{x}/{y} is outside the scene")
+
+    def _compute(self, product: str, tile: Tile) -> np.ndarray:
+        if product == "lst":
+            return self.pipeline.compute_tile(tile, **self.bands)
+
+        window = {
+            name: np.asarray(self.bands[name][tile.window])
+            for name in self.pipeline.required_bands
+        }
+        ndvi_image = ndvi(
+            window["landsat_band_5"],
+            window["landsat_band_4"],
+            nodata_mask(window["landsat_band_10"]),
+        )
+        if product == "ndvi":
+            return ndvi_image
+        emissivity_10, _ = emissivity(
+            ndvi_image, window["landsat_band_4"], self.pipeline.emissivity_method
+        )
+        return emissivity_10
+
+    def tile_values(self, product: str, zoom: int, x: int, y: int) -> np.ndarray:
+        """Returns the values of a tile as a tile_size x tile_size read-only float array
+        (NaN beyond the edges of the scene)
+        """
+        self._check(product, zoom, x, y)
+        key = ("values", product, zoom, x, y)
+        values = self.cache.get(key)
+        if values is not None:
+            return values
+
+        size = self.tile_size
+        values = np.full((size, size), np.nan)
+        if zoom == self.max_zoom:
+            row, col = y * size, x * size
+            tile = Tile(
+                row, col, min(size, self.shape[0] - row), min(size, self.shape[1] - col)
+            )
+            values[: tile.height, : tile.width] = self._compute(product, tile)
+        else:
+            children = np.full((2 * size, 2 * size), np.nan)
+            columns, rows = self.tile_count(zoom + 1)
+            for dy in range(2):
+                for dx in range(2):
+                    if 2 * x + dx < columns and 2 * y + dy < rows:
+                        children[
+                            dy * size : (dy + 1) * size, dx * size : (dx + 1) * size
+                        ] = self.tile_values(product, zoom + 1, 2 * x + dx, 2 * y + dy)
+            values = block_nanmean(children, 2)
+        # Cached values are shared by every caller
+        values.flags.writeable = False
+        self.cache.put(key, values)
+        return values
+
+    def get_tile(
+        self, product: str, zoom: int, x: int, y: int, format: str = "png"
+    ) -> bytes:
+        """Returns a rendered tile
+
+        Args:
+            product (str): 'lst', 'ndvi' or 'emissivity'
+            zoom (int): Zoom level, from 0 (whole scene in one tile) to max_zoom (full resolution)
+            x (int): Tile column
+            y (int): Tile row
+            format (str, optional): 'png' (rendered with the product value range) or 'npy'
+                                    (float values as a .npy file). Defaults to 'png'.
+
+        Returns:
+            bytes: Tile content
+        """
+        if format not in ("png", "npy"):
+            raise ValueError(f"Format should be 'png' or 'npy', not {format}")
+        key = (format, product, zoom, x, y)
+        content = self.cache.get(key)
+        if content is not None:
+            return content
+
+        values = self.tile_values(product, zoom, x, y)
+        if format == "png":
+            content = encode_png(values, self.value_ranges[product])
+        else:
+            buffer = io.BytesIO()
+            np.save(buffer, values)
+            content = buffer.getvalue()
+        self.cache.put(key, content)
+        return content
+
+    def make_http_server(self, host: str = "127.0.0.1", port: int = 8000):
+        """Creates an HTTP server answering GET /<product>/<z>/<x>/<y>.<png|npy>"""
+        tile_server = self
+        pattern = re.compile(r"^/(\w+)/(\d+)/(\d+)/(\d+)\.(png|npy)$")
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                match = pattern.match(self.path)
+                if match is None:
+                    self.send_error(404, "Expected /<product>/<z>/<x>/<y>.<png|npy>")
+                    return
+                product, zoom, x, y, format = match.groups()
+                try:
+                    content = tile_server.get_tile(
+                        product, int(zoom), int(x), int(y), format
+                    )
+                except KeyError as error:
+                    self.send_error(404, str(error))
+                    return
+                except Exception as error:
+                    self.send_error(500, f"{type(error).__name__}: {error}")
+                    return
+                self.send_response(200)
+                self.send_header(
+                    "Content-Type",
+                    "image/png" if format == "png" else "application/octet-stream",
+                )
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        return ThreadingHTTPServer((host, port), Handler)
+
+    def serve_forever(self, host: str = "127.0.0.1", port: int = 8000):
+        with self.make_http_server(host, port) as server:
+            server.serve_forever()
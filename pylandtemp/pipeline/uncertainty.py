@@ -0,0 +1,288 @@
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from pylandtemp.emissivity import default_algorithms as emissivity_algorithms
+from pylandtemp.masks import nodata_mask
+from pylandtemp.pylandtemp import CELCIUS_SCALER, ndvi
+from pylandtemp.temperature import BrightnessTemperatureLandsat
+from pylandtemp.temperature import default_algorithms as temperature_algorithms
+from pylandtemp.temperature.utils import compute_brightness_temperature
+from .pipeline import TiledPipeline
+from .sinks import ArraySink
+from .tiles import generate_tiles
+
+# Standard deviations of the perturbed inputs
+DEFAULT_UNCERTAINTIES = {
+    # Digital number noise of each band
+    "landsat_band_10": 20.0,
+    "landsat_band_11": 20.0,
+    "landsat_band_4": 20.0,
+    "landsat_band_5": 20.0,
+    # Emissivity coefficients of the Emissivity subclasses (absolute)
+    "emissivity": 0.005,
+    # Column water vapour of 'jiminez-munoz' (relative, log-normal so it stays positive)
+    "cwv": 0.2,
+    # K1 and K2 calibration constants (relative)
+    "k1": 0.001,
+    "k2": 0.001,
+}
+
+EMISSIVITY_COEFFICIENTS = (
+    "emissivity_soil_10",
+    "emissivity_veg_10",
+    "emissivity_soil_11",
+    "emissivity_veg_11",
+)
+
+# Bytes held per (pixel, sample) pair while a batch is computed, about 16 float64
+# intermediates (bands, NDVI, brightness temperatures, emissivities, LST...)
+BYTES_PER_SAMPLE = 128
+
+
+class MonteCarloLST:
+    def __init__(
+        self,
+        lst_method: str,
+        emissivity_method: str = "avdan",
+        unit: str = "kelvin",
+        samples: int = 100,
+        uncertainties: dict = None,
+        percentiles: tuple = (5, 95),
+        seed: int = 0,
+        memory_budget: int = 64 * 2**20,
+        tile_shape: tuple = (256, 256),
+        max_workers: int = None,
+        water_vapour=None,
+    ):
+        """Per-pixel LST uncertainty by Monte Carlo propagation of the input uncertainties:
+            digital number noise, emissivity coefficients, water vapour ('jiminez-munoz')
+            and the K1/K2 calibration constants.
+
+        The samples of a batch of pixels are evaluated at once, as a (pixels, samples) image
+        given to the existing NDVI, brightness temperature, emissivity and LST functions, and
+        reduced to per-pixel statistics before the next batch. The batch size follows from
+        memory_budget, so memory does not depend on the number of pixels.
+
+        The calibration, emissivity and water vapour perturbations of a sample are drawn once
+        from the seed and shared by every pixel: sample k is one realisation of these
+        systematic errors over the whole scene. Digital number noise is drawn independently
+        per pixel and sample from streams derived from the seed and the position of the
+        batch, so results are reproducible for a given tile shape and memory budget.
+
+        Args:
+            lst_method (str): key of a single window or split window LST method
+            emissivity_method (str, optional): 'avdan', 'xiaolei' or 'gopinadh'. Defaults to 'avdan'.
+            unit (str, optional): 'kelvin' or 'celcius'. Defaults to 'kelvin'.
+            samples (int, optional): Number of Monte Carlo samples. Defaults to 100.
+            uncertainties (dict, optional): Standard deviations overriding DEFAULT_UNCERTAINTIES.
+                                            0 disables the perturbation of an input.
+            percentiles (tuple, optional): Percentiles of the samples to report. Defaults to (5, 95).
+            seed (int, optional): Seed of the random streams. Defaults to 0.
+            memory_budget (int, optional): Bytes of a batch. Defaults to 64 MiB.
+            tile_shape (tuple, optional): (rows, columns) of a tile. Defaults to (256, 256).
+            max_workers (int, optional): Number of threads processing tiles concurrently.
+            water_vapour (WaterVapourGrid, optional): Water vapour grid of 'jiminez-munoz',
+                                                      perturbed around its values. Defaults to None.
+        """
+        if samples < 2:
+            raise ValueError(f"At least 2 samples are required: {samples}")
+        self.uncertainties = dict(DEFAULT_UNCERTAINTIES)
+        unknown = set(uncertainties or {}) - set(self.uncertainties)
+        if unknown:
+            raise ValueError(
+                f"Unknown uncertainties {sorted(unknown)}. Choose among {list(self.uncertainties)}"
+            )
+        self.uncertainties.update(uncertainties or {})
+        self.pipeline = TiledPipeline(
+            lst_method,
+            emissivity_method,
+            unit=unit,
+            tile_shape=tile_shape,
+            max_workers=max_workers,
+            water_vapour=water_vapour,
+        )
+        self.samples = samples
+        self.percentiles = tuple(percentiles)
+        self.seed = seed
+        self.batch_pixels = max(1, memory_budget // (samples * BYTES_PER_SAMPLE))
+        self.parameters = self._draw_parameters()
+
+    @property
+    def statistics(self) -> tuple:
+        return ("mean", "std") + tuple(f"p{q:g}" for q in self.percentiles)
+
+    def _draw_parameters(self) -> dict:
+        # Systematic perturbations shared by all the pixels, (1, samples) to broadcast
+        # over the pixels of a batch
+        rng = np.random.default_rng([self.seed, 0])
+        normal = lambda: rng.standard_normal((1, self.samples))
+        constants = BrightnessTemperatureLandsat()
+        parameters = {}
+        for band in (10, 11):
+            for name in ("k1", "k2"):
+                value = getattr(constants, f"{name}_constant_{band}")
+                parameters[f"{name}_{band}"] = value * (
+                    1 + self.uncertainties[name] * normal()
+                )
+        emissivity = emissivity_algorithms[self.pipeline.emissivity_method]
+        for name in EMISSIVITY_COEFFICIENTS:
+            value = getattr(emissivity, name)
+            if value is not None:
+                parameters[name] = value + self.uncertainties["emissivity"] * normal()
+        # Log-normal factors of mean 1, so the perturbed water vapour keeps its mean and
+        # is never clipped at 0
+        sigma = self.uncertainties["cwv"]
+        parameters["cwv"] = np.exp(sigma * normal() - sigma**2 / 2)
+        return parameters
+
+    def compute_samples(self, cwv=None, rng=None, **bands) -> np.ndarray:
+        """Computes the LST samples of a batch of pixels
+
+        Args:
+            cwv (float or np.ndarray, optional): Water vapour of the pixels, (pixels,) or scalar.
+                                                 Defaults to None, the constant of the method.
+            rng (np.random.Generator, optional): Stream of the digital number noise.
+
+        kwargs:
+            1-dimensional band values of the pixels, keyed like the TiledPipeline arguments
+
+        Returns:
+            np.ndarray: (pixels, samples) LST in kelvin
+        """
+        rng = np.random.default_rng(self.seed) if rng is None else rng
+        shape = (len(bands["landsat_band_10"]), self.samples)
+        images = {}
+        for name in self.pipeline.required_bands:
+            images[name] = np.asarray(bands[name], dtype=np.float64)[:, None] + (
+                self.uncertainties[name] * rng.standard_normal(shape)
+            )
+        p = self.parameters
+        mask = nodata_mask(images["landsat_band_10"])
+        constants = BrightnessTemperatureLandsat()
+        brightness_temperature = {
+            band: compute_brightness_temperature(
+                images[f"landsat_band_{band}"],
+                constants.mult_factor,
+                constants.add_factor,
+                p[f"k1_{band}"],
+                p[f"k2_{band}"],
+                mask,
+            )
+            for band in ((10,) if self.pipeline.is_single_window else (10, 11))
+        }
+        ndvi_image = ndvi(images.pop("landsat_band_5"), images["landsat_band_4"], mask)
+
+        emissivity = emissivity_algorithms[self.pipeline.emissivity_method]()
+        for name in EMISSIVITY_COEFFICIENTS:
+            if name in p:
+                # Coefficient images, selected per landcover class like the bands
+                setattr(emissivity, name, np.broadcast_to(p[name], shape))
+        emissivity_10, emissivity_11 = emissivity(
+            ndvi=ndvi_image, red_band=images.pop("landsat_band_4")
+        )
+
+        arguments = dict(
+            emissivity_10=emissivity_10,
+            brightness_temperature_10=brightness_temperature[10],
+            mask=mask,
+            ndvi=ndvi_image,
+        )
+        if self.pipeline.is_single_window:
+            algorithm = temperature_algorithms.single_window[self.pipeline.lst_method]
+            return algorithm()(**arguments)
+
+        algorithm = temperature_algorithms.split_window[self.pipeline.lst_method]
+        if hasattr(algorithm, "cwv"):
+            cwv = algorithm.cwv if cwv is None else np.reshape(cwv, (-1, 1))
+            arguments["cwv"] = cwv * p["cwv"]
+        return algorithm()(
+            emissivity_11=emissivity_11,
+            brightness_temperature_11=brightness_temperature[11],
+            **arguments,
+        )
+
+    def _reduce(self, lst: np.ndarray) -> list:
+        if self.pipeline.unit == "celcius":
+            lst = lst - CELCIUS_SCALER
+        with warnings.catch_warnings():
+            # Pixels whose samples are all NaN (e.g above the temperature cap)
+            warnings.simplefilter("ignore", RuntimeWarning)
+            reduced = [np.nanmean(lst, axis=1), np.nanstd(lst, axis=1)]
+        if not self.percentiles:
+            return reduced
+        # np.nanpercentile loops over the rows, percentiles are interpolated in the
+        # sorted rows (NaN last) instead
+        ordered = np.sort(lst, axis=1)
+        count = (~np.isnan(lst)).sum(axis=1)
+        last = np.maximum(count - 1, 0)
+        for q in self.percentiles:
+            position = q / 100 * last
+            lower = np.floor(position).astype(np.intp)
+            upper = np.minimum(lower + 1, last)
+            fraction = position - lower
+            low = np.take_along_axis(ordered, lower[:, None], axis=1)[:, 0]
+            high = np.take_along_axis(ordered, upper[:, None], axis=1)[:, 0]
+            reduced.append(np.where(count > 0, low + (high - low) * fraction, np.nan))
+        return reduced
+
+    def compute_tile(self, tile, **bands) -> dict:
+        """Computes the statistics of the samples of every pixel of a tile"""
+        windows = {
+            name: np.asarray(bands[name][tile.window])
+            for name in self.pipeline.required_bands
+        }
+        cwv = self.pipeline.tile_water_vapour(tile.window)
+        rows, cols = np.nonzero(windows["landsat_band_10"] != 0)
+        outputs = {name: np.full(tile.shape, np.nan) for name in self.statistics}
+        for start in range(0, len(rows), self.batch_pixels):
+            batch = (
+                rows[start : start + self.batch_pixels],
+                cols[start : start + self.batch_pixels],
+            )
+            rng = np.random.default_rng([self.seed, 1, tile.row, tile.col, start])
+            lst = self.compute_samples(
+                cwv=None if cwv is None else cwv[batch],
+                rng=rng,
+                **{name: window[batch] for name, window in windows.items()},
+            )
+            for name, values in zip(self.statistics, self._reduce(lst)):
+                outputs[name][batch] = values
+        return outputs
+
+    def __call__(self, sinks: dict = None, **bands) -> dict:
+        """Computes the per-pixel statistics of the LST samples over the scene
+
+        Args:
+            sinks (dict, optional): Sink of each statistic ('mean', 'std', 'p<percentile>').
+                                    Defaults to an ArraySink per statistic.
+
+        kwargs:
+            Bands keyed like the TiledPipeline arguments, supporting 2-dimensional slicing
+
+        Returns:
+            dict: Output of the sink of each statistic (images for ArraySinks), NaN at nodata pixels
+        """
+        shape = self.pipeline.scene_shape(**bands)
+        sinks = dict(sinks or {})
+        for name in self.statistics:
+            sinks.setdefault(name, ArraySink())
+            sinks[name].open(
+                shape,
+                np.float64,
+                self.pipeline.tile_shape,
+                fill_value=np.nan,
+                attrs={"units": self.pipeline.unit, "samples": self.samples},
+            )
+
+        def process(tile):
+            for name, data in self.compute_tile(tile, **bands).items():
+                sinks[name].write(tile, data)
+
+        with ThreadPoolExecutor(max_workers=self.pipeline.max_workers) as executor:
+            for _ in executor.map(
+                process, generate_tiles(shape, self.pipeline.tile_shape)
+            ):
+                pass
+        return {name: sinks[name].close() for name in self.statistics}
@@ -0,0 +1,157 @@
+import threading
+
+import numpy as np
+
+from .sinks import decode_tile
+from .ranges import LST_VALUE_RANGES
+
+
+class ZonalStatsSink:
+    def __init__(
+        self,
+        zones,
+        zone_count: int = None,
+        value_range: tuple = None,
+        bins: int = 32,
+    ):
+        """Sink reducing the LST tiles to per-zone statistics as they are computed, so the
+            LST raster is never assembled.
+
+        Every tile is reduced with np.bincount over the zones present in its window (count,
+        sum, histogram) and unbuffered ufunc.at reductions (min, max). The tile moments are
+        merged into the running moments with Chan's parallel algorithm, which keeps the
+        standard deviation stable and the result independent of the order of the tiles.
+
+        Args:
+            zones (array-like): Integer zone label raster of the scene shape, supporting
+                                2-dimensional slicing (numpy array, memory map...).
+                                Negative labels are ignored.
+            zone_count (int, optional): Number of zones (labels 0 to zone_count - 1).
+                                        Defaults to None, which grows with the largest label seen.
+            value_range (tuple, optional): (min, max) range of the histograms. Values outside
+                                           of it are counted in the edge bins. Defaults to None,
+                                           the LST_VALUE_RANGES entry of the 'units' of
+                                           the pipeline, e.g (223.15, 333.15) in kelvin.
+            bins (int, optional): Number of histogram bins. 0 disables the histograms. Defaults to 32.
+        """
+        self.zones = zones
+        self._value_range = value_range
+        self.value_range = self._default_range("kelvin")
+        self.bins = bins
+        self.attrs = {}
+        self.zone_count = zone_count or 0
+        self._lock = threading.Lock()
+        self._allocate(self.zone_count)
+
+    def _default_range(self, unit: str) -> tuple:
+        if self._value_range is not None:
+            return tuple(self._value_range)
+        if unit not in LST_VALUE_RANGES:
+            raise ValueError(
+                f"No default histogram range for units '{unit}'. Pass a value_range."
+            )
+        return LST_VALUE_RANGES[unit]
+
+    def _allocate(self, zone_count: int):
+        self.count = np.zeros(zone_count, dtype=np.int64)
+        self.mean = np.zeros(zone_count)
+        self.m2 = np.zeros(zone_count)
+        self.min = np.full(zone_count, np.inf)
+        self.max = np.full(zone_count, -np.inf)
+        self.histogram = np.zeros((zone_count, self.bins), dtype=np.int64)
+
+    def _grow(self, zone_count: int):
+        extra = zone_count - len(self.count)
+        if extra <= 0:
+            return
+        # Grows at least geometrically, so that increasing labels do not copy every tile
+        extra = max(extra, len(self.count))
+        self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+        self.mean = np.concatenate([self.mean, np.zeros(extra)])
+        self.m2 = np.concatenate([self.m2, np.zeros(extra)])
+        self.min = np.concatenate([self.min, np.full(extra, np.inf)])
+        self.max = np.concatenate([self.max, np.full(extra, -np.inf)])
+        self.histogram = np.concatenate(
+            [self.histogram, np.zeros((extra, self.bins), dtype=np.int64)]
+        )
+
+    def open(
+        self, shape: tuple, dtype, tile_shape: tuple, fill_value=np.nan, attrs=None
+    ):
+        if tuple(self.zones.shape) != tuple(shape):
+            raise ValueError(
+                f"Zone raster shape {tuple(self.zones.shape)} does not match the scene shape {tuple(shape)}"
+            )
+        self.attrs = attrs or {}
+        if self.bins:
+            self.value_range = self._default_range(self.attrs.get("units", "kelvin"))
+
+    def write(self, tile, data: np.ndarray):
+        values = decode_tile(data, self.attrs).ravel()
+        labels = np.asarray(self.zones[tile.window]).ravel()
+        valid = ~np.isnan(values) & (labels >= 0)
+        values = values[valid]
+        labels = labels[valid].astype(np.intp)
+        if len(labels) == 0:
+            return
+
+        # Reductions run over the zones present in the tile only, so their cost does
+        # not depend on the total number of zones
+        present, local = np.unique(labels, return_inverse=True)
+        local_count = len(present)
+        count = np.bincount(local, minlength=local_count)
+        mean = np.bincount(local, weights=values, minlength=local_count) / count
+        m2 = np.bincount(
+            local, weights=(values - mean[local]) ** 2, minlength=local_count
+        )
+        minimum = np.full(local_count, np.inf)
+        maximum = np.full(local_count, -np.inf)
+        np.minimum.at(minimum, local, values)
+        np.maximum.at(maximum, local, values)
+        histogram = None
+        if self.bins:
+            low, high = self.value_range
+            bin_index = np.clip(
+                ((values - low) * (self.bins / (high - low))).astype(np.intp),
+                0,
+                self.bins - 1,
+            )
+            histogram = np.bincount(
+                local * self.bins + bin_index, minlength=local_count * self.bins
+            ).reshape(local_count, self.bins)
+
+        with self._lock:
+            self.zone_count = max(self.zone_count, int(present[-1]) + 1)
+            self._grow(self.zone_count)
+            # Chan et al. merge of (count, mean, m2)
+            previous = self.count[present]
+            merged = previous + count
+            delta = mean - self.mean[present]
+            weight = count / merged
+            self.mean[present] += delta * weight
+            self.m2[present] += m2 + delta**2 * previous * weight
+            self.count[present] = merged
+            self.min[present] = np.minimum(self.min[present], minimum)
+            self.max[present] = np.maximum(self.max[present], maximum)
+            if histogram is not None:
+                self.histogram[present] += histogram
+
+    def close(self) -> dict:
+        """Returns the statistics as arrays indexed by zone label. Zones without valid
+        pixels have a count of 0 and NaN statistics. std is the population standard deviation.
+        """
+        zones = slice(0, self.zone_count)
+        count = self.count[zones]
+        present = count > 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(self.m2[zones] / count)
+        low, high = self.value_range
+        return {
+            "count": count,
+            "mean": np.where(present, self.mean[zones], np.nan),
+            "min": np.where(present, self.min[zones], np.nan),
+            "max": np.where(present, self.max[zones], np.nan),
+            "std": np.where(present, std, np.nan),
+            "histogram": self.histogram[zones],
+            "bin_edges": np.linspace(low, high, self.bins + 1),
+        }
@@ -4,7 +4,8 @@ from .temperature import default_algorithms as temperature_algorithms
 from .emissivity import default_algorithms as emissivity_algorithms
 from .temperature import BrightnessTemperatureLandsat
 from .runner import Runner
-from .utils import compute_ndvi
+from .utils import block_sum, compute_ndvi, repeat_blocks
+from .masks import BLOCK_ROWS, apply_mask, mask_rows, nodata_mask, is_valid_mask
 from .exceptions import *
 
 
@@ -19,6 +20,10 @@ def split_window(
     lst_method: str,
     emissivity_method: str,
     unit: str = "kelvin",
+    quantize: bool = False,
+    cwv=None,
+    fast_math: bool = False,
+    thermal_factor: int = None,
 ) -> np.ndarray:
     """Provides an interface to compute land surface temperature
         from landsat 8 imagery using split window method
@@ -45,11 +50,30 @@ def split_window(
 
         unit (str, optional): 'kelvin' or 'celcius'. Defaults to 'kelvin'.
 
+        quantize (bool, optional): If True, the LST is returned as scaled int16 hundredths of a degree
+                                    (value = stored * 0.01 + offset, with offset 273.15 for 'kelvin'
+                                    and 0 for 'celcius') and -32768 as nodata. Defaults to False.
+
+        cwv (float or np.ndarray, optional): Column water vapour (g/cm²) used by 'jiminez-munoz', a scalar
+                                    or an image of the shape of the bands (see
+                                    pylandtemp.temperature.WaterVapourGrid to interpolate a coarse grid).
+                                    Defaults to None, the constant of the method.
+
+        fast_math (bool, optional): If True, the brightness temperatures are computed in float32
+                                    (see pylandtemp.temperature.utils.compute_brightness_temperature),
+                                    which changes the LST by less than 1e-3 K. The LST is still
+                                    returned as float64. Defaults to False.
+
+        thermal_factor (int, optional): If set, the brightness temperatures are computed once per
+                                    thermal_factor x thermal_factor block and repeated over it
+                                    (see brightness_temperature), e.g 3 for the native 100 m
+                                    resolution of the thermal bands. Defaults to None.
+
     Returns:
         np.ndarray: Land surface temperature (numpy array)
     """
 
-    assert_temperature_unit()
+    assert_temperature_unit(unit)
 
     if not (
         landsat_band_10.shape
@@ -61,26 +85,21 @@ def split_window(
             f"Shapes of input images should be equal: {landsat_band_10.shape}, {landsat_band_5.shape}, {landsat_band_4.shape}"
         )
 
-    mask = landsat_band_10 == 0
-    ndvi_image = ndvi(landsat_band_5, landsat_band_4, mask)
-
-    brightness_temp_10, brightness_temp_11 = brightness_temperature(
-        landsat_band_10, landsat_band_11=landsat_band_11, mask=mask
-    )
-
-    emissivity_10, emissivity_11 = Runner(algorithms=emissivity_algorithms)(
-        emissivity_method, ndvi=ndvi_image, red_band=landsat_band_4
-    )
-
-    lst_image = Runner(algorithms=temperature_algorithms.split_window)(
+    lst_image = lst_stages(
+        landsat_band_10,
+        landsat_band_11,
+        landsat_band_4,
+        landsat_band_5,
         lst_method,
-        emissivity_10=emissivity_10,
-        emissivity_11=emissivity_11,
-        brightness_temperature_10=brightness_temp_10,
-        brightness_temperature_11=brightness_temp_11,
-        mask=mask,
-        ndvi=ndvi_image,
-    )
+        emissivity_method,
+        quantize=quantize,
+        cwv=cwv,
+        fast_math=fast_math,
+        thermal_factor=thermal_factor,
+    )["lst"]
+    if quantize:
+        # The scaled integers are unit independent, only the decoding offset differs
+        return lst_image
     return lst_image if unit == "kelvin" else lst_image - CELCIUS_SCALER
 
 
@@ -91,6 +110,9 @@ def single_window(
     lst_method: str = "mono-window",
     emissivity_method: str = "avdan",
     unit: str = "kelvin",
+    quantize: bool = False,
+    fast_math: bool = False,
+    thermal_factor: int = None,
 ) -> np.ndarray:
     """Provides an interface to compute land surface temperature
         from landsat 8 imagery using single window method
@@ -115,32 +137,137 @@ def single_window(
 
         unit (str, optional): 'celcius' or 'kelvin'. Defaults to 'kelvin'.
 
+        quantize (bool, optional): If True, the LST is returned as scaled int16 hundredths of a degree
+                                    (value = stored * 0.01 + offset, with offset 273.15 for 'kelvin'
+                                    and 0 for 'celcius') and -32768 as nodata. Defaults to False.
+
+        fast_math (bool, optional): If True, the brightness temperatures are computed in float32
+                                    (see pylandtemp.temperature.utils.compute_brightness_temperature),
+                                    which changes the LST by less than 1e-3 K. The LST is still
+                                    returned as float64. Defaults to False.
+
+        thermal_factor (int, optional): If set, the brightness temperatures are computed once per
+                                    thermal_factor x thermal_factor block and repeated over it
+                                    (see brightness_temperature), e.g 3 for the native 100 m
+                                    resolution of the thermal bands. Defaults to None.
+
     Returns:
         np.ndarray: Land surface temperature (numpy array)
     """
-    assert_temperature_unit()
+    assert_temperature_unit(unit)
 
     if not landsat_band_10.shape == landsat_band_5.shape == landsat_band_4.shape:
         raise InputShapesNotEqual(
             f"Shapes of input images should be equal: {landsat_band_10.shape}, {landsat_band_5.shape}, {landsat_band_4.shape}"
         )
 
-    mask = landsat_band_10 == 0
+    lst_image = lst_stages(
+        landsat_band_10,
+        None,
+        landsat_band_4,
+        landsat_band_5,
+        lst_method,
+        emissivity_method,
+        quantize=quantize,
+        fast_math=fast_math,
+        thermal_factor=thermal_factor,
+    )["lst"]
+    if quantize:
+        # The scaled integers are unit independent, only the decoding offset differs
+        return lst_image
+    return lst_image if unit == "kelvin" else lst_image - CELCIUS_SCALER
+
+
+def lst_stages(
+    landsat_band_10: np.ndarray,
+    landsat_band_11: np.ndarray,
+    landsat_band_4: np.ndarray,
+    landsat_band_5: np.ndarray,
+    lst_method: str,
+    emissivity_method: str,
+    quantize: bool = False,
+    cwv=None,
+    fast_math: bool = False,
+    thermal_factor: int = None,
+) -> dict:
+    """Computes the land surface temperature (in kelvin) and the intermediate images it
+        is derived from. Inputs are not validated, see split_window and single_window.
+
+    Args:
+        landsat_band_10 (np.ndarray): Band 10 of the Landsat 8 image
+        landsat_band_11 (np.ndarray): Band 11 of the Landsat 8 image for split window methods,
+                                      None for single window methods
+        landsat_band_4 (np.ndarray): Band 4 of the Landsat 8 image (Red band)
+        landsat_band_5 (np.ndarray): Band 5 of the Landsat 8 image (Near-Infrared band)
+        lst_method (str): key of a single window or split window LST method
+        emissivity_method (str): key of an emissivity method
+        quantize (bool, optional): If True, 'lst' is scaled int16. Defaults to False.
+        cwv (float or np.ndarray, optional): Column water vapour of split window methods using it.
+                                             Defaults to None, the constant of the method.
+        fast_math (bool, optional): Brightness temperatures in float32 ('lst' stays float64).
+                                    Defaults to False.
+        thermal_factor (int, optional): Block size of the brightness temperatures. Defaults to None.
+
+    Returns:
+        dict: 'ndvi', 'brightness_temperature_10', 'emissivity_10' and 'lst' images, and
+              'brightness_temperature_11' and 'emissivity_11' for split window methods
+    """
+    mask = nodata_mask(landsat_band_10)
     ndvi_image = ndvi(landsat_band_5, landsat_band_4, mask)
-    brightness_temp_10, _ = brightness_temperature(landsat_band_10, mask=mask)
 
-    emissivity_10, _ = Runner(algorithms=emissivity_algorithms)(
+    brightness_temp_10, brightness_temp_11 = brightness_temperature(
+        landsat_band_10,
+        landsat_band_11=landsat_band_11,
+        mask=mask,
+        fast_math=fast_math,
+        thermal_factor=thermal_factor,
+    )
+
+    emissivity_10, emissivity_11 = Runner(algorithms=emissivity_algorithms)(
         emissivity_method, ndvi=ndvi_image, red_band=landsat_band_4
     )
 
-    lst_image = Runner(algorithms=temperature_algorithms.single_window)(
+    stages = {
+        "ndvi": ndvi_image,
+        "brightness_temperature_10": brightness_temp_10,
+        "emissivity_10": emissivity_10,
+    }
+    if landsat_band_11 is None:
+        stages["lst"] = Runner(algorithms=temperature_algorithms.single_window)(
+            lst_method,
+            emissivity_10=emissivity_10,
+            brightness_temperature_10=brightness_temp_10,
+            mask=mask,
+            ndvi=ndvi_image,
+            quantize=quantize,
+        )
+        stages["lst"] = fast_math_lst(stages["lst"], fast_math)
+        return stages
+
+    stages["brightness_temperature_11"] = brightness_temp_11
+    stages["emissivity_11"] = emissivity_11
+    stages["lst"] = Runner(algorithms=temperature_algorithms.split_window)(
         lst_method,
         emissivity_10=emissivity_10,
+        emissivity_11=emissivity_11,
         brightness_temperature_10=brightness_temp_10,
+        brightness_temperature_11=brightness_temp_11,
         mask=mask,
         ndvi=ndvi_image,
+        quantize=quantize,
+        cwv=cwv,
     )
-    return lst_image if unit == "kelvin" else lst_image - CELCIUS_SCALER
+    stages["lst"] = fast_math_lst(stages["lst"], fast_math)
+    return stages
+
+
+def fast_math_lst(lst, fast_math: bool):
+    """Returns the LST of a fast math computation as float64, like the exact one. Only the
+    intermediate images (e.g the brightness temperatures) are float32.
+    """
+    if fast_math and lst.dtype == np.float32:
+        return lst.astype(np.float64)
+    return lst
 
 
 def emissivity(
@@ -187,7 +314,7 @@ def ndvi(landsat_band_5: np.ndarray, landsat_band_4: np.ndarray, mask: np.ndarra
     Args:
         landsat_band_5 (np.ndarray): Band 5 of landsat 8 image
         landsat_band_4 (np.ndarray): Band 4 of landsat 8 image
-        mask (np.ndarray[bool]): output is NaN where Mask == True
+        mask (np.ndarray[bool] or CompactMask): output is NaN where Mask == True
 
     Returns:
         np.ndarray: NVDI numpy array
@@ -197,9 +324,9 @@ def ndvi(landsat_band_5: np.ndarray, landsat_band_4: np.ndarray, mask: np.ndarra
             f"Shapes of input images should be equal: {landsat_band_5.shape}, {landsat_band_4.shape}"
         )
 
-    if mask.dtype != "bool":
+    if not is_valid_mask(mask):
         raise InvalidMaskError(
-            f"image passed in as 'mask' must be a numpy array with bool dtype values"
+            f"image passed in as 'mask' must be a numpy array with bool dtype values or a CompactMask"
         )
     return compute_ndvi(landsat_band_5, landsat_band_4, mask=mask)
 
@@ -208,13 +335,24 @@ def brightness_temperature(
     landsat_band_10: np.ndarray,
     landsat_band_11: np.ndarray = None,
     mask: np.ndarray = None,
+    fast_math: bool = False,
+    thermal_factor: int = None,
 ):
     """Compute brightness temperature
 
     Args:
         landsat_band_10 (np.ndarray): Band 10 of landsat 8 image
         landsat_band_11 (np.ndarray): Band 11 of landsat 8 image. Defaults to None.
-        mask (np.ndarray[bool]): output is NaN where Mask == True. Defaults to None.
+        mask (np.ndarray[bool] or CompactMask): output is NaN where Mask == True. Defaults to None.
+        fast_math (bool, optional): Compute in float32. Defaults to False.
+        thermal_factor (int, optional): If set, the brightness temperatures are computed once per
+                                        thermal_factor x thermal_factor block, from the mean digital
+                                        number of its unmasked pixels, and repeated over the block.
+                                        The thermal bands are resampled from 100 m pixels, so a
+                                        factor of 3 computes them about at their native resolution.
+                                        Only the conversion of the digital numbers is saved: the
+                                        bands are still read whole and the outputs are full
+                                        resolution images. Defaults to None, every pixel is computed.
 
     Returns:
         np.ndarray: Brightness temperature numpy array
@@ -227,12 +365,67 @@ def brightness_temperature(
             f"Shapes of input images should be equal: {landsat_band_10.shape}, {landsat_band_11.shape}"
         )
 
-    if mask.dtype != "bool":
+    if mask is not None and not is_valid_mask(mask):
         raise InvalidMaskError(
-            f"image passed in as 'mask' must be a numpy array with bool dtype values"
+            f"image passed in as 'mask' must be a numpy array with bool dtype values or a CompactMask"
+        )
+
+    if thermal_factor is not None:
+        return _block_brightness_temperature(
+            landsat_band_10, landsat_band_11, mask, thermal_factor, fast_math
         )
 
     brightness_temp_10, brightness_temp_11 = BrightnessTemperatureLandsat()(
-        landsat_band_10, landsat_band_11, mask=mask
+        landsat_band_10, landsat_band_11, mask=mask, fast_math=fast_math
     )
     return brightness_temp_10, brightness_temp_11
+
+
+def _block_brightness_temperature(
+    landsat_band_10, landsat_band_11, mask, factor: int, fast_math: bool
+):
+    if int(factor) != factor or factor < 1:
+        raise ValueError(f"Thermal factor should be a positive integer: {factor}")
+    factor = int(factor)
+    shape = landsat_band_10.shape
+    bands = (landsat_band_10, landsat_band_11)
+    # Mean digital number of the unmasked pixels of each block
+    count = np.outer(
+        np.minimum(factor, shape[0] - np.arange(0, shape[0], factor)),
+        np.minimum(factor, shape[1] - np.arange(0, shape[1], factor)),
+    ).astype(np.float64)
+    sums = [None if band is None else block_sum(band, factor) for band in bands]
+    if mask is not None and mask.any():
+        # Blocks holding masked pixels are summed again a block of rows at a time,
+        # so the mask and the bands are never expanded or copied whole
+        block_rows = factor * max(1, BLOCK_ROWS // factor)
+        for row_start in range(0, shape[0], block_rows):
+            row_stop = min(row_start + block_rows, shape[0])
+            rows_mask = mask_rows(mask, row_start, row_stop)
+            if not rows_mask.any():
+                continue
+            blocks = slice(row_start // factor, -(-row_stop // factor))
+            count[blocks] -= block_sum(rows_mask, factor)
+            for total, band in zip(sums, bands):
+                if total is not None:
+                    total[blocks] = block_sum(
+                        np.where(rows_mask, 0, band[row_start:row_stop]), factor
+                    )
+    empty = count == 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        blocks = [None if total is None else total / count for total in sums]
+
+    temperatures = BrightnessTemperatureLandsat()(
+        blocks[0],
+        blocks[1],
+        mask=empty if mask is not None else None,
+        fast_math=fast_math,
+    )
+    upsampled = []
+    for temperature in temperatures:
+        if temperature is not None:
+            temperature = repeat_blocks(temperature, factor, shape)
+            if mask is not None:
+                temperature = apply_mask(temperature, mask)
+        upsampled.append(temperature)
+    return tuple(upsampled)
@@ -1,10 +1,12 @@
 from .temperature import default_algorithms
 from .brightness_temperature import BrightnessTemperatureLandsat
+from .water_vapour import WaterVapourGrid
+from .lookup import MonoWindowLUT
 from .algorithms.mono_window import MonoWindowLST
 from .algorithms.split_window.algorithms import (
     SplitWindowJiminezMunozLST,
     SplitWindowKerrLST,
-    SplitWindowMcClainLST,
+    SplitWindowMcMillinLST,
     SplitWindowPriceLST,
     SplitWindowSobrino1993LST,
 )
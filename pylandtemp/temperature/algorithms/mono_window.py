@@ -1,6 +1,8 @@
 import numpy as np
 
 from pylandtemp.exceptions import assert_required_keywords_provided
+from pylandtemp.masks import apply_mask
+from pylandtemp.temperature.utils import quantize_temperature
 
 
 class MonoWindowLST:
@@ -19,14 +21,18 @@ class MonoWindowLST:
 
         **emissivity_10 (np.ndarray): Emissivity image obtained for band 10
         **brightness_temperature_10 (np.ndarray): Brightness temperature image obtained for band 10
-        **mask (np.ndarray[bool]): Mask image. Output will have NaN value where mask is True.
+        **mask (np.ndarray[bool] or CompactMask): Mask image. Output will have NaN value where mask is True.
+        **quantize (bool, optional): If True, return the LST encoded as scaled int16
+                                     (see pylandtemp.temperature.utils.quantize_temperature). Defaults to False.
 
         Returns:
             np.ndarray: Land surface temperature image
         """
 
         lst = self._compute_lst_mono_window(**kwargs)
-        lst[lst > self.max_earth_temp] = np.nan
+        lst = apply_mask(lst, lst > self.max_earth_temp)
+        if kwargs.get("quantize", False):
+            return quantize_temperature(lst)
         return lst
 
     def _compute_lst_mono_window(self, **kwargs) -> np.ndarray:
@@ -37,7 +43,7 @@ class MonoWindowLST:
 
         **emissivity_10 (np.ndarray): Emissivity image obtained for band 10
         **brightness_temperature_10 (np.ndarray): Brightness temperature image obtained for band 10
-        **mask (np.ndarray[bool]): Mask image. Output will have NaN value where mask is True.
+        **mask (np.ndarray[bool] or CompactMask): Mask image. Output will have NaN value where mask is True.
 
         Returns:
             np.ndarray: Land surface temperature image
@@ -55,5 +61,5 @@ class MonoWindowLST:
         land_surface_temp = temperature_band / (
             1 + (((0.0000115 * temperature_band) / 14380) * np.log(emissivity))
         )
-        land_surface_temp[mask] = np.nan
+        land_surface_temp = apply_mask(land_surface_temp, mask)
         return land_surface_temp
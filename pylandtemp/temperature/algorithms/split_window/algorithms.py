@@ -2,6 +2,8 @@ import numpy as np
 
 from pylandtemp.utils import fractional_vegetation_cover
 from pylandtemp.exceptions import assert_required_keywords_provided
+from pylandtemp.masks import apply_mask
+from pylandtemp.temperature.utils import quantize_temperature
 
 
 class SplitWindowParentLST:
@@ -13,8 +15,20 @@ class SplitWindowParentLST:
         self.max_earth_temp = 273.15 + 56.7
 
     def __call__(self, **kwargs) -> np.ndarray:
+        """Computes the LST and caps it at max_earth_temp
+
+        kwargs:
+        Keyword arguments of the concrete method, and
+        **quantize (bool, optional): If True, return the LST encoded as scaled int16
+                                     (see pylandtemp.temperature.utils.quantize_temperature). Defaults to False.
+
+        Returns:
+            np.ndarray: Land surface temperature image
+        """
         lst = self._compute_lst(**kwargs)
-        lst[lst > self.max_earth_temp] = np.nan
+        lst = apply_mask(lst, lst > self.max_earth_temp)
+        if kwargs.get("quantize", False):
+            return quantize_temperature(lst)
         return lst
 
     def _compute_lst(self, **kwargs):
@@ -42,7 +56,9 @@ class SplitWindowJiminezMunozLST(SplitWindowParentLST):
         **emissivity_11 (np.ndarray): Emissivity image obtained for band 11
         **brightness_temperature_10 (np.ndarray): Brightness temperature image obtained for band 10
         **brightness_temperature_11 (np.ndarray): Brightness temperature image obtained for band 11
-        **mask (np.ndarray[bool]): Mask image. Output will have NaN value where mask is True.
+        **mask (np.ndarray[bool] or CompactMask): Mask image. Output will have NaN value where mask is True.
+        **cwv (float or np.ndarray, optional): Column water vapour (g/cm²), a scalar or an image of
+                                               the shape of the bands. Defaults to the class constant cwv.
 
         Returns:
             np.ndarray: Land surface temperature image
@@ -62,6 +78,8 @@ class SplitWindowJiminezMunozLST(SplitWindowParentLST):
         emissivity_10 = kwargs["emissivity_10"]
         emissivity_11 = kwargs["emissivity_11"]
         mask = kwargs["mask"]
+        cwv = kwargs.get("cwv")
+        cwv = self.cwv if cwv is None else cwv
 
         mean_e = (emissivity_10 + emissivity_11) / 2
         diff_e = emissivity_10 - emissivity_11
@@ -72,10 +90,10 @@ class SplitWindowJiminezMunozLST(SplitWindowParentLST):
             + (1.387 * diff_tb)
             + (0.183 * (diff_tb**2))
             - 0.268
-            + ((54.3 - (2.238 * self.cwv)) * (1 - mean_e))
-            + ((-129.2 + (16.4 * self.cwv)) * diff_e)
+            + ((54.3 - (2.238 * cwv)) * (1 - mean_e))
+            + ((-129.2 + (16.4 * cwv)) * diff_e)
         )
-        lst[mask] = np.nan
+        lst = apply_mask(lst, mask)
         return lst
 
 
@@ -99,7 +117,7 @@ class SplitWindowKerrLST(SplitWindowParentLST):
         **brightness_temperature_10 (np.ndarray): Brightness temperature image obtained for band 10
         **brightness_temperature_11 (np.ndarray): Brightness temperature image obtained for band 11
         **ndvi (np.ndarray): NDVI image
-        **mask (np.ndarray[bool]): Mask image. Output will have NaN value where mask is True.
+        **mask (np.ndarray[bool] or CompactMask): Mask image. Output will have NaN value where mask is True.
 
         Returns:
             np.ndarray: Land surface temperature image
@@ -125,7 +143,7 @@ class SplitWindowKerrLST(SplitWindowParentLST):
             + (tb_11 * ((-0.5 * pv) - 2.1))
             - ((5.5 * pv) + 3.1)
         )
-        lst[mask] = np.nan
+        lst = apply_mask(lst, mask)
         return lst
 
 
@@ -146,7 +164,7 @@ class SplitWindowMcMillinLST(SplitWindowParentLST):
         kwargs:
         **brightness_temperature_10 (np.ndarray): Brightness temperature image obtained for band 10
         **brightness_temperature_11 (np.ndarray): Brightness temperature image obtained for band 11
-        **mask (np.ndarray[bool]): Mask image. Output will have NaN value where mask is True.
+        **mask (np.ndarray[bool] or CompactMask): Mask image. Output will have NaN value where mask is True.
 
         Returns:
             np.ndarray: Land surface temperature image
@@ -163,7 +181,7 @@ class SplitWindowMcMillinLST(SplitWindowParentLST):
         mask = kwargs["mask"]
 
         lst = (1.035 * tb_10) + (3.046 * (tb_10 - tb_11)) - 10.93
-        lst[mask] = np.nan
+        lst = apply_mask(lst, mask)
         return lst
 
 
@@ -185,7 +203,7 @@ class SplitWindowPriceLST(SplitWindowParentLST):
         **emissivity_11 (np.ndarray): Emissivity image obtained for band 11
         **brightness_temperature_10 (np.ndarray): Brightness temperature image obtained for band 10
         **brightness_temperature_11 (np.ndarray): Brightness temperature image obtained for band 11
-        **mask (np.ndarray[bool]): Mask image. Output will have NaN value where mask is True.
+        **mask (np.ndarray[bool] or CompactMask): Mask image. Output will have NaN value where mask is True.
 
         Returns:
             np.ndarray: Land surface temperature image
@@ -208,7 +226,7 @@ class SplitWindowPriceLST(SplitWindowParentLST):
         lst = (tb_10 + 3.33 * (tb_10 - tb_11)) * ((5.5 - emm_10) / 4.5) + (
             0.75 * tb_11 * (emm_10 - emm_11)
         )
-        lst[mask] = np.nan
+        lst = apply_mask(lst, mask)
         return lst
 
 
@@ -231,7 +249,7 @@ class SplitWindowSobrino1993LST(SplitWindowParentLST):
         **emissivity_11 (np.ndarray): Emissivity image obtained for band 11
         **brightness_temperature_10 (np.ndarray): Brightness temperature image obtained for band 10
         **brightness_temperature_11 (np.ndarray): Brightness temperature image obtained for band 11
-        **mask (np.ndarray[bool]): Mask image. Output will have NaN value where mask is True.
+        **mask (np.ndarray[bool] or CompactMask): Mask image. Output will have NaN value where mask is True.
 
         Returns:
             np.ndarray: Land surface temperature image
@@ -261,5 +279,5 @@ class SplitWindowSobrino1993LST(SplitWindowParentLST):
             + (53 * (1 - emm_10))
             - (53 * (diff_e))
         )
-        lst[mask] = np.nan
+        lst = apply_mask(lst, mask)
         return lst
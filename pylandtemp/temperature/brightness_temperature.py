@@ -14,7 +14,11 @@ class BrightnessTemperatureLandsat:
         self.k2_constant_11 = 1201.14
 
     def __call__(
-        self, band_10: np.ndarray, band_11: np.ndarray = None, mask=None
+        self,
+        band_10: np.ndarray,
+        band_11: np.ndarray = None,
+        mask=None,
+        fast_math: bool = False,
     ) -> np.ndarray:
         """
 
@@ -23,25 +27,31 @@ class BrightnessTemperatureLandsat:
             band_11 (np.ndarray): Level 1 quantized and calibrated scaled Digital Numbers (DN) TIR band data  for Band 11 landsat 8 data
             unit (str): 'kelvin' or 'celcius'
             mask (bool): Mask zero or NaN values. Defaults to True.
+            fast_math (bool): Compute in float32 (see compute_brightness_temperature). Defaults to False.
 
 
         Returns:
             Tuple(np.ndarray, np.ndarray) -> Band 10 brightness temperature, Band 11 brightness temperature
         """
         tb_band_10 = self._compute_brightness_temp(
-            band_10, self.k1_constant_10, self.k2_constant_10, mask
+            band_10, self.k1_constant_10, self.k2_constant_10, mask, fast_math
         )
 
         tb_band_11 = None
         if band_11 is not None:
             tb_band_11 = self._compute_brightness_temp(
-                band_11, self.k1_constant_11, self.k2_constant_11, mask
+                band_11, self.k1_constant_11, self.k2_constant_11, mask, fast_math
             )
 
         return tb_band_10, tb_band_11
 
     def _compute_brightness_temp(
-        self, image: np.ndarray, k1: float, k2: float, mask: np.ndarray
+        self,
+        image: np.ndarray,
+        k1: float,
+        k2: float,
+        mask: np.ndarray,
+        fast_math: bool = False,
     ) -> np.ndarray:
 
         """Converts image raw digital numbers to brightness temperature
@@ -57,11 +67,12 @@ class BrightnessTemperatureLandsat:
                                     from the image folder metadata (K2_CONSTANT_BAND_x, where x is the thermal band index
             unit (str):  'kelvin' or 'celcius'. Defaults to 'kelvin'
             mask (n.ndarray[bool]): Truie for pixels to mask out
+            fast_math (bool): Compute in float32. Defaults to False.
 
 
         Returns:
             np.ndarray: Brightness temperature corrected image.
         """
         return compute_brightness_temperature(
-            image, self.mult_factor, self.add_factor, k1, k2, mask
+            image, self.mult_factor, self.add_factor, k1, k2, mask, fast_math=fast_math
         )
@@ -0,0 +1,161 @@
+import functools
+import threading
+
+import numpy as np
+
+from pylandtemp.emissivity import default_algorithms as emissivity_algorithms
+from .algorithms.mono_window import MonoWindowLST
+from .brightness_temperature import BrightnessTemperatureLandsat
+
+NDVI_RANGE = (-1.0, 1.0)
+
+_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=4)
+def _build_table(calibration: tuple, ndvi_step: float, dn_range: tuple) -> np.ndarray:
+    mult_factor, add_factor, k1, k2 = calibration
+    constants = BrightnessTemperatureLandsat()
+    constants.mult_factor, constants.add_factor = mult_factor, add_factor
+    constants.k1_constant_10, constants.k2_constant_10 = k1, k2
+
+    ndvi = _ndvi_grid(ndvi_step)[None, :]
+    digital_numbers = np.arange(dn_range[0], dn_range[1] + 1, dtype=np.float64)
+    table = np.empty((len(digital_numbers), ndvi.shape[1]), dtype=np.float32)
+    emissivity = emissivity_algorithms["avdan"]()(ndvi=ndvi, red_band=None)[0]
+    # The exact chain, in blocks of digital numbers to bound the temporary images
+    for start in range(0, len(digital_numbers), 4096):
+        block = digital_numbers[start : start + 4096, None]
+        brightness_temperature = constants(block)[0] + np.zeros_like(emissivity)
+        table[start : start + len(block)] = MonoWindowLST()(
+            emissivity_10=emissivity + np.zeros_like(brightness_temperature),
+            brightness_temperature_10=brightness_temperature,
+            mask=block + np.zeros_like(emissivity) == 0,
+        )
+    return table
+
+
+def _ndvi_grid(ndvi_step: float) -> np.ndarray:
+    cells = int(round((NDVI_RANGE[1] - NDVI_RANGE[0]) / ndvi_step))
+    return np.linspace(NDVI_RANGE[0], NDVI_RANGE[1], cells + 1)
+
+
+class MonoWindowLUT:
+    def __init__(
+        self,
+        ndvi_step: float = 0.01,
+        interpolate: bool = True,
+        brightness_temperature: BrightnessTemperatureLandsat = None,
+        dn_range: tuple = (0, 65535),
+    ):
+        """Lookup table of the 'mono-window' LST with the 'avdan' emissivity, indexed by
+            the band 10 digital number and the NDVI.
+
+        With these methods, the LST only depends on the band 10 digital number (through the
+        brightness temperature) and on the NDVI (through the emissivity). The table holds
+        the exact chain (BrightnessTemperatureLandsat, ComputeMonoWindowEmissivity,
+        MonoWindowLST) on a grid of every digital number and NDVI values spaced ndvi_step
+        apart, so the LST of a pixel is a single gather (two with interpolation).
+
+        Tables are cached per calibration, NDVI step and range of digital numbers. A table
+        of the full 16 bit range with a 0.01 NDVI step holds 65536 x 201 float32 (53 MB).
+        The difference to the exact chain is given by error_bound().
+
+        Args:
+            ndvi_step (float, optional): NDVI resolution of the table, which should divide 0.1
+                                         so that the landcover thresholds of the emissivity
+                                         fall on the grid. Defaults to 0.01.
+            interpolate (bool, optional): Interpolate linearly along the NDVI axis instead of
+                                          taking the nearest NDVI. Defaults to True.
+            brightness_temperature (BrightnessTemperatureLandsat, optional): Calibration of band 10.
+                                                                             Defaults to the Landsat 8 constants.
+            dn_range (tuple, optional): (min, max) digital numbers of the table. Defaults to (0, 65535).
+        """
+        if ndvi_step <= 0 or not np.isclose(0.1 / ndvi_step, round(0.1 / ndvi_step)):
+            raise ValueError(
+                f"NDVI step should be positive and divide 0.1: {ndvi_step}"
+            )
+        constants = brightness_temperature or BrightnessTemperatureLandsat()
+        self.calibration = (
+            constants.mult_factor,
+            constants.add_factor,
+            constants.k1_constant_10,
+            constants.k2_constant_10,
+        )
+        # Snapped to a whole number of cells over the NDVI range
+        self.ndvi_step = (NDVI_RANGE[1] - NDVI_RANGE[0]) / round(
+            (NDVI_RANGE[1] - NDVI_RANGE[0]) / ndvi_step
+        )
+        self.interpolate = interpolate
+        self.dn_range = (int(dn_range[0]), int(dn_range[1]))
+        with _lock:
+            self.table = _build_table(self.calibration, self.ndvi_step, self.dn_range)
+
+    def __call__(
+        self, landsat_band_10: np.ndarray, ndvi_image: np.ndarray
+    ) -> np.ndarray:
+        """Looks up the LST (in kelvin) of every pixel
+
+        Args:
+            landsat_band_10 (np.ndarray): Band 10 digital numbers (integers, floats are rounded)
+            ndvi_image (np.ndarray): NDVI image of the same shape
+
+        Returns:
+            np.ndarray: Land surface temperature, NaN where the digital number is 0 or outside
+                        dn_range, where the NDVI is NaN or outside [-1, 1], and above the
+                        max_earth_temp cap
+        """
+        if landsat_band_10.shape != ndvi_image.shape:
+            raise ValueError(
+                f"Shapes of input images should be equal: {landsat_band_10.shape}, {ndvi_image.shape}"
+            )
+        digital_numbers = np.asarray(landsat_band_10)
+        if digital_numbers.dtype.kind == "f":
+            digital_numbers = np.rint(digital_numbers)
+        rows = digital_numbers.astype(np.intp) - self.dn_range[0]
+        position = (np.asarray(ndvi_image) - NDVI_RANGE[0]) / self.ndvi_step
+        last = self.table.shape[1] - 1
+        valid = (
+            (rows >= 0)
+            & (rows < self.table.shape[0])
+            & (position >= 0)
+            & (position <= last)
+        )
+        # Flat indices of the table, a single gather per pixel (two with interpolation)
+        flat = self.table.reshape(-1)
+        index = np.where(valid, rows, 0) * self.table.shape[1]
+        position = np.where(valid, position, 0)
+        if self.interpolate:
+            lower = np.minimum(position.astype(np.intp), last - 1)
+            fraction = position - lower
+            index += lower
+            low = flat.take(index)
+            lst = low + (flat.take(index + 1) - low) * fraction
+        else:
+            index += np.rint(position).astype(np.intp)
+            lst = flat.take(index).astype(np.float64)
+        lst[~valid] = np.nan
+        return lst
+
+    def error_bound(self, samples: int = 1_000_000, seed: int = 0) -> float:
+        """Maximum absolute difference (in kelvin) between the table and the exact chain,
+        over random digital numbers of dn_range and NDVI values in [-1, 1], ignoring the
+        pixels masked at the max_earth_temp cap. It is dominated by the float32 storage of
+        the table (about 2e-5 K).
+        """
+        rng = np.random.default_rng(seed)
+        digital_numbers = rng.integers(
+            max(self.dn_range[0], 1), self.dn_range[1] + 1, (1, samples)
+        ).astype(np.float64)
+        ndvi = rng.uniform(NDVI_RANGE[0], NDVI_RANGE[1], (1, samples))
+        mult_factor, add_factor, k1, k2 = self.calibration
+        constants = BrightnessTemperatureLandsat()
+        constants.mult_factor, constants.add_factor = mult_factor, add_factor
+        constants.k1_constant_10, constants.k2_constant_10 = k1, k2
+        exact = MonoWindowLST()(
+            emissivity_10=emissivity_algorithms["avdan"]()(ndvi=ndvi, red_band=None)[0],
+            brightness_temperature_10=constants(digital_numbers)[0],
+            mask=np.zeros(ndvi.shape, dtype=bool),
+        )
+        difference = np.abs(self(digital_numbers, ndvi) - exact)
+        return float(np.nanmax(difference))
@@ -1,8 +1,16 @@
 import numpy as np
 
+from pylandtemp.masks import apply_mask
+
 
 def compute_brightness_temperature(
-    image: np.ndarray, M: float, A: float, k1: float, k2: float, mask: np.ndarray = None
+    image: np.ndarray,
+    M: float,
+    A: float,
+    k1: float,
+    k2: float,
+    mask: np.ndarray = None,
+    fast_math: bool = False,
 ) -> np.ndarray:
 
     """Converts image raw digital numbers to brightness temperature
@@ -20,14 +28,94 @@ def compute_brightness_temperature(
                     folder metadata (K1_CONSTANT_BAND_x, where x is the thermal band number)
         k2 (float): Band-specific thermal conversion constant from the image
                     folder metadata (K2_CONSTANT_BAND_x, where x is the thermal band number.
-        mask (bool): True if you want to mask NaN, O or irregular values from the computation
+        mask (np.ndarray[bool] or CompactMask): Output is NaN where mask is True
+        fast_math (bool, optional): If True, numpy images are converted in place in float32,
+                                    whose SIMD log is about twice as fast and which halves the
+                                    memory traffic. Over the 1-65535 range of the digital
+                                    numbers the brightness temperature differs from the float64
+                                    result by less than 1e-4 K. Defaults to False.
 
     Returns:
-        np.ndarray: Brightness temperature corrected landsat image
+        np.ndarray: Brightness temperature corrected landsat image (float32 with fast_math)
     """
-    toa_radiance = (M * image) + A
-    brightness_temp = k2 / (np.log((k1 / toa_radiance) + 1))
+    if fast_math and isinstance(image, np.ndarray) and np.ndim(k1) == np.ndim(k2) == 0:
+        brightness_temp = _fast_brightness_temperature(image, M, A, k1, k2)
+    else:
+        toa_radiance = (M * image) + A
+        brightness_temp = k2 / (np.log((k1 / toa_radiance) + 1))
 
     if mask is not None:
-        brightness_temp[mask] = np.nan
+        brightness_temp = apply_mask(brightness_temp, mask)
+    return brightness_temp
+
+
+def _fast_brightness_temperature(
+    image: np.ndarray, M: float, A: float, k1: float, k2: float
+) -> np.ndarray:
+    # Every step is computed in place in a single float32 buffer
+    brightness_temp = np.multiply(image, np.float32(M), dtype=np.float32)
+    brightness_temp += np.float32(A)
+    np.divide(np.float32(k1), brightness_temp, out=brightness_temp)
+    brightness_temp += np.float32(1)
+    np.log(brightness_temp, out=brightness_temp)
+    np.divide(np.float32(k2), brightness_temp, out=brightness_temp)
     return brightness_temp
+
+
+# Scaled int16 encoding of temperatures. A stored value q decodes to
+# q * LST_SCALE_FACTOR + add_offset, where add_offset is LST_ADD_OFFSET for kelvin and
+# 0 for celcius (the stored integers are hundredths of a degree Celsius in both cases).
+# The encoding covers -54.52 K to 600.82 K in 0.01 K steps, which contains every
+# temperature below the max_earth_temp cap of the LST methods.
+LST_SCALE_FACTOR = 0.01
+LST_ADD_OFFSET = 273.15
+LST_NODATA = -32768
+
+
+def quantize_temperature(
+    image: np.ndarray,
+    add_offset: float = LST_ADD_OFFSET,
+    scale_factor: float = LST_SCALE_FACTOR,
+    nodata: int = LST_NODATA,
+) -> np.ndarray:
+    """Encodes a temperature image as scaled int16
+
+    Args:
+        image (np.ndarray): Temperature image. NaN values are encoded as nodata.
+        add_offset (float, optional): Offset of the encoding. Defaults to LST_ADD_OFFSET (kelvin input).
+        scale_factor (float, optional): Scale of the encoding. Defaults to LST_SCALE_FACTOR.
+        nodata (int, optional): Sentinel for NaN values. Defaults to LST_NODATA.
+
+    Returns:
+        np.ndarray: int16 image such that image ~= output * scale_factor + add_offset
+    """
+    scaled = (image - add_offset) / scale_factor
+    invalid = np.isnan(scaled)
+    if isinstance(scaled, np.ndarray):
+        np.rint(scaled, out=scaled)
+        np.clip(scaled, -32767, 32767, out=scaled)
+    else:
+        # Chunked arrays (e.g dask) have no in-place operations
+        scaled = np.clip(np.rint(scaled), -32767, 32767)
+    return apply_mask(scaled, invalid, nodata).astype(np.int16)
+
+
+def dequantize_temperature(
+    image: np.ndarray,
+    add_offset: float = LST_ADD_OFFSET,
+    scale_factor: float = LST_SCALE_FACTOR,
+    nodata: int = LST_NODATA,
+) -> np.ndarray:
+    """Decodes a scaled int16 temperature image produced by quantize_temperature
+
+    Args:
+        image (np.ndarray): Scaled int16 image
+        add_offset (float, optional): Offset of the encoding. Defaults to LST_ADD_OFFSET (kelvin output).
+        scale_factor (float, optional): Scale of the encoding. Defaults to LST_SCALE_FACTOR.
+        nodata (int, optional): Sentinel decoded as NaN. Defaults to LST_NODATA.
+
+    Returns:
+        np.ndarray: Temperature image (float64)
+    """
+    temperature = (image * scale_factor) + add_offset
+    return apply_mask(temperature, image == nodata)
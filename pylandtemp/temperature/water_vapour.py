@@ -0,0 +1,85 @@
+import numpy as np
+
+
+def _axis(transform) -> tuple:
+    a, b, c, d, e, f = tuple(transform)[:6]
+    if b != 0 or d != 0:
+        raise ValueError("Only north-up transforms (without rotation) are supported")
+    if a == 0 or e == 0:
+        raise ValueError("Transform is not invertible")
+    return (e, f), (a, c)
+
+
+def _indices(index, name: str) -> np.ndarray:
+    if isinstance(index, slice):
+        if index.stop is None:
+            raise ValueError(f"The {name} slice of the window should have a stop")
+        return np.arange(index.start or 0, index.stop, index.step or 1)
+    return np.asarray(index).ravel()
+
+
+def _bilinear_weights(positions: np.ndarray, size: int) -> tuple:
+    # Positions outside of the grid take the value of its edge
+    positions = np.clip(positions, 0, size - 1)
+    lower = np.minimum(np.floor(positions).astype(np.intp), max(size - 2, 0))
+    upper = np.minimum(lower + 1, size - 1)
+    return lower, upper, positions - lower
+
+
+class WaterVapourGrid:
+    def __init__(self, values, transform, scene_transform):
+        """Column water vapour (g/cm²) on a coarse grid, e.g from a reanalysis, interpolated
+            bilinearly on the pixels of a scene on request. Windows of the scene are
+            interpolated one at a time, so no full resolution water vapour image is needed.
+
+        Both grids should be north-up. Values are interpolated between the pixel centers of
+        the coarse grid and take the value of its edge outside of them. NaN values propagate
+        to the scene pixels they contribute to.
+
+        Args:
+            values (array-like): 2-dimensional coarse water vapour grid
+            transform: Affine transform of the coarse grid in the (a, b, c, d, e, f) order used by
+                       rasterio/affine (see pylandtemp.pipeline.rowcol_from_xy)
+            scene_transform: Affine transform of the Landsat scene, in the same coordinate
+                             reference system
+        """
+        self.values = np.asarray(values, dtype=np.float64)
+        if self.values.ndim != 2:
+            raise ValueError("Water vapour grid should be 2-dimensional")
+        # Position in the coarse grid (in pixels, 0 at the first pixel center) of the
+        # scene pixel centers, as scale * index + offset along each axis
+        self._mapping = []
+        for (scene_step, scene_origin), (step, origin) in zip(
+            _axis(scene_transform), _axis(transform)
+        ):
+            scale = scene_step / step
+            self._mapping.append(
+                (scale, (scene_origin - origin) / step + scale / 2 - 0.5)
+            )
+
+    def __call__(self, window) -> np.ndarray:
+        """Interpolates the water vapour on a window of the scene
+
+        Args:
+            window (tuple): (rows, columns) of the scene, each a slice with a stop
+                            (e.g Tile.window) or a 1-dimensional array of indices
+
+        Returns:
+            np.ndarray: Water vapour of the window, (rows, columns)
+        """
+        (row_scale, row_offset), (col_scale, col_offset) = self._mapping
+        rows = _indices(window[0], "row") * row_scale + row_offset
+        cols = _indices(window[1], "column") * col_scale + col_offset
+        row_low, row_high, row_weight = _bilinear_weights(rows, self.values.shape[0])
+        col_low, col_high, col_weight = _bilinear_weights(cols, self.values.shape[1])
+
+        # Interpolated along the rows on the grid columns covering the window first,
+        # then along the columns
+        first, last = col_low.min(), col_high.max() + 1
+        grid = self.values[:, first:last]
+        row_weight = row_weight[:, None]
+        along_rows = grid[row_low] * (1 - row_weight) + grid[row_high] * row_weight
+        return (
+            along_rows[:, col_low - first] * (1 - col_weight)
+            + along_rows[:, col_high - first] * col_weight
+        )
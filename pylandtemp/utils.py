@@ -1,5 +1,7 @@
 import numpy as np
 
+from .masks import apply_mask
+
 
 def generate_mask(image: np.ndarray) -> np.ndarray:
     """
@@ -23,15 +25,21 @@ def compute_ndvi(
         nir (np.ndarray): Near-infrared band image
         red (np.ndarray): Red-band image
         eps (float): Epsilon to avoid ZeroDivisionError in numpy
-        use_mask (bool): If True, mask NaN and 0 values in input images.
+        mask (np.ndarray[bool] or CompactMask): output is NaN where mask is True. Defaults to None.
 
     Returns:
         np.ndarray: Normalized difference vegetation index
     """
-    ndvi = (nir - red) / (nir + red + eps)
-    ndvi[abs(ndvi) > 1] = np.nan
+    if any(getattr(band, "dtype", np.dtype(float)).kind in "ui" for band in (nir, red)):
+        # Unsigned digital numbers (e.g views of a uint16 band cube) would wrap around
+        ndvi = np.subtract(nir, red, dtype=np.float64) / (
+            np.add(nir, red, dtype=np.float64) + eps
+        )
+    else:
+        ndvi = (nir - red) / (nir + red + eps)
+    ndvi = apply_mask(ndvi, abs(ndvi) > 1)
     if mask is not None:
-        ndvi[mask] = np.nan
+        ndvi = apply_mask(ndvi, mask)
     return ndvi
 
 
@@ -88,3 +96,77 @@ def rescale_band(
         np.ndarray: rescaled image of same size as input
     """
     return (mult * image) + add
+
+
+def block_nanmean(image: np.ndarray, factor: int) -> np.ndarray:
+    """Averages an image over non-overlapping factor x factor blocks, ignoring NaN values
+
+    Args:
+        image (np.ndarray): 2-dimensional image. Edges are padded with NaN when the
+                            shape is not a multiple of the factor.
+        factor (int): Size of the blocks
+
+    Returns:
+        np.ndarray: Block averaged image (NaN where a block holds no valid pixel)
+    """
+    if len(image.shape) != 2:
+        raise ValueError("Image should be 2-dimensional")
+    rows, cols = image.shape
+    padded = np.pad(
+        np.asarray(image, dtype=np.float64),
+        ((0, -rows % factor), (0, -cols % factor)),
+        constant_values=np.nan,
+    )
+    blocks = padded.reshape(
+        padded.shape[0] // factor, factor, padded.shape[1] // factor, factor
+    )
+    valid = ~np.isnan(blocks)
+    count = valid.sum(axis=(1, 3))
+    total = np.where(valid, blocks, 0).sum(axis=(1, 3))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def block_sum(image: np.ndarray, factor: int) -> np.ndarray:
+    """Sums an image over non-overlapping factor x factor blocks, in float64. Blocks on
+        the bottom and right edges are cropped to the image.
+
+    Args:
+        image (np.ndarray): 2-dimensional image
+        factor (int): Size of the blocks
+
+    Returns:
+        np.ndarray: Block sums
+    """
+    if len(image.shape) != 2:
+        raise ValueError("Image should be 2-dimensional")
+    rows, cols = image.shape
+    # Strided additions of the rows, then of the columns, of each block
+    row_sums = np.zeros((-(-rows // factor), cols))
+    for offset in range(min(factor, rows)):
+        strided = image[offset::factor]
+        row_sums[: len(strided)] += strided
+    total = np.zeros((row_sums.shape[0], -(-cols // factor)))
+    for offset in range(min(factor, cols)):
+        strided = row_sums[:, offset::factor]
+        total[:, : strided.shape[1]] += strided
+    return total
+
+
+def repeat_blocks(image: np.ndarray, factor: int, shape: tuple) -> np.ndarray:
+    """Upsamples a block image (e.g from block_nanmean) by repeating every pixel over a
+        factor x factor block, the inverse grid of block_nanmean
+
+    Args:
+        image (np.ndarray): 2-dimensional block image
+        factor (int): Size of the blocks
+        shape (tuple): (rows, columns) of the output, at most factor times the image shape
+
+    Returns:
+        np.ndarray: Upsampled image
+    """
+    rows, cols = image.shape
+    repeated = np.broadcast_to(
+        image[:, None, :, None], (rows, factor, cols, factor)
+    ).reshape(rows * factor, cols * factor)
+    return np.ascontiguousarray(repeated[: shape[0], : shape[1]])
@@ -18,6 +18,13 @@ setup(
     install_requires=[
         "numpy",
     ],
+    extras_require={
+        "xarray": ["xarray"],
+        "dask": ["dask[array]"],
+    },
+    entry_points={
+        "console_scripts": ["pylandtemp=pylandtemp.cli:main"],
+    },
     keywords="Image processing, Landsat, Satellite images",
     classifiers=[
         "Development Status :: 3 - Alpha",
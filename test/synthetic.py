@@ -0,0 +1,42 @@
+import numpy as np
+
+
+def synthetic_bands(
+    shape=(70, 90),
+    seed=0,
+    nodata=np.s_[:5],
+    split_window=True,
+    dtype=None,
+    dn_range=(20000, 30000),
+) -> dict:
+    """Random Landsat 8 digital numbers of land surfaces, keyed like the TiledPipeline
+        arguments
+
+    Args:
+        shape (tuple, optional): (rows, columns) of the bands. Defaults to (70, 90).
+        seed (int, optional): Seed of the values. Defaults to 0.
+        nodata (optional): Index of the band 10 pixels set to 0, or the fraction of pixels
+                           set to 0 at random. Defaults to the first 5 rows.
+        split_window (bool, optional): Include band 11. Defaults to True.
+        dtype (optional): dtype of the bands, rounded for integers. Defaults to float64.
+        dn_range (tuple, optional): Range of the band 10 digital numbers. Defaults to
+                                    (20000, 30000), about 270 K to 310 K.
+
+    Returns:
+        dict: landsat_band_10, landsat_band_11 (with split_window), landsat_band_4 and
+              landsat_band_5
+    """
+    rng = np.random.default_rng(seed)
+    band_10 = rng.uniform(*dn_range, shape)
+    bands = {"landsat_band_10": band_10}
+    if split_window:
+        bands["landsat_band_11"] = band_10 - rng.uniform(200, 800, shape)
+    bands["landsat_band_4"] = rng.uniform(5000, 15000, shape)
+    bands["landsat_band_5"] = rng.uniform(5000, 20000, shape)
+    if isinstance(nodata, float):
+        band_10[rng.random(shape) < nodata] = 0
+    elif nodata is not None:
+        band_10[nodata] = 0
+    if dtype is not None and np.dtype(dtype).kind in "ui":
+        return {name: np.rint(band).astype(dtype) for name, band in bands.items()}
+    return bands
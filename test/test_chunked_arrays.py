@@ -0,0 +1,121 @@
+import importlib.util
+import unittest
+
+import numpy as np
+
+from pylandtemp import split_window, single_window, ndvi, brightness_temperature
+
+from synthetic import synthetic_bands
+
+has_dask = importlib.util.find_spec("dask") is not None
+has_xarray = importlib.util.find_spec("xarray") is not None
+
+
+class ChunkedArrayTestCase(unittest.TestCase):
+    shape = (60, 70)
+    bands = synthetic_bands(shape, seed=10)
+    band_10 = bands["landsat_band_10"]
+    band_11 = bands["landsat_band_11"]
+    band_4 = bands["landsat_band_4"]
+    band_5 = bands["landsat_band_5"]
+
+
+@unittest.skipUnless(has_dask, "dask is not installed")
+class TestDaskArrays(ChunkedArrayTestCase):
+    def chunked(self, image):
+        import dask.array as da
+
+        return da.from_array(image, chunks=(25, 30))
+
+    def test_that_split_window_is_lazy_and_matches_numpy(self):
+        import dask.array as da
+
+        for lst_method in [
+            "jiminez-munoz",
+            "kerr",
+            "mc-millin",
+            "price",
+            "sobrino-1993",
+        ]:
+            for emissivity_method in ["avdan", "xiaolei", "gopinadh"]:
+                lst = split_window(
+                    self.chunked(self.band_10),
+                    self.chunked(self.band_11),
+                    self.chunked(self.band_4),
+                    self.chunked(self.band_5),
+                    lst_method,
+                    emissivity_method,
+                )
+                self.assertIsInstance(lst, da.Array)
+                expected = split_window(
+                    self.band_10,
+                    self.band_11,
+                    self.band_4,
+                    self.band_5,
+                    lst_method,
+                    emissivity_method,
+                )
+                np.testing.assert_allclose(lst.compute(), expected, equal_nan=True)
+
+    def test_that_quantized_single_window_matches_numpy(self):
+        lst = single_window(
+            self.chunked(self.band_10),
+            self.chunked(self.band_4),
+            self.chunked(self.band_5),
+            unit="celcius",
+            quantize=True,
+        )
+        expected = single_window(
+            self.band_10, self.band_4, self.band_5, unit="celcius", quantize=True
+        )
+        self.assertEqual(lst.dtype, np.int16)
+        np.testing.assert_array_equal(lst.compute(scheduler="threads"), expected)
+
+    def test_that_inputs_are_not_modified(self):
+        band_10 = self.chunked(self.band_10)
+        temperature, _ = brightness_temperature(band_10, mask=band_10 == 0)
+        temperature.compute()
+        np.testing.assert_array_equal(band_10.compute(), self.band_10)
+
+
+@unittest.skipUnless(has_dask and has_xarray, "dask and xarray are not installed")
+class TestDataArrays(ChunkedArrayTestCase):
+    def test_that_coordinates_are_preserved(self):
+        import xarray as xr
+        from pylandtemp import dataarray
+
+        coords = {
+            "y": np.arange(self.shape[0]) * -30.0,
+            "x": np.arange(self.shape[1]) * 30.0,
+        }
+
+        def data_array(image):
+            return xr.DataArray(image, coords=coords, dims=("y", "x")).chunk(
+                {"y": 25, "x": 30}
+            )
+
+        lst = dataarray.single_window(
+            data_array(self.band_10), data_array(self.band_4), data_array(self.band_5)
+        )
+        self.assertIsInstance(lst, xr.DataArray)
+        self.assertIsNotNone(lst.chunks)
+        np.testing.assert_array_equal(lst["x"], coords["x"])
+        np.testing.assert_allclose(
+            lst.values,
+            single_window(self.band_10, self.band_4, self.band_5),
+            equal_nan=True,
+        )
+
+        mask = data_array(self.band_10) == 0
+        ndvi_image = dataarray.ndvi(
+            data_array(self.band_5), data_array(self.band_4), mask
+        )
+        np.testing.assert_allclose(
+            ndvi_image.values,
+            ndvi(self.band_5, self.band_4, self.band_10 == 0),
+            equal_nan=True,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from pylandtemp.cli import main
+from pylandtemp.pipeline import Checkpoint, ChunkedStore, Tile, TiledPipeline
+
+from synthetic import synthetic_bands
+
+
+class TestBatchCLI(unittest.TestCase):
+    shape = (30, 40)
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        self.expected = {}
+        scenes = []
+        for k in range(3):
+            bands = synthetic_bands(
+                self.shape, seed=9 + k, nodata=None, split_window=False
+            )
+            for name, band in bands.items():
+                np.save(os.path.join(self.root, f"{k}_{name}.npy"), band)
+            self.expected[f"scene-{k}"] = TiledPipeline("mono-window")(**bands)
+            scenes.append(
+                {
+                    "id": f"scene-{k}",
+                    "bands": {name: f"{k}_{name}.npy" for name in bands},
+                    "output": f"{k}_lst.npy",
+                }
+            )
+        scenes[2]["output"] = {"store": "2_lst", "overviews": [2]}
+        self.manifest = os.path.join(self.root, "manifest.json")
+        with open(self.manifest, "w") as f:
+            json.dump({"lst_method": "mono-window", "scenes": scenes}, f)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_cli(self, *args):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            code = main([self.manifest, "--tile-size", "16", "16", *args])
+        return code, output.getvalue()
+
+    def read_output(self, k):
+        if k == 2:
+            return ChunkedStore(os.path.join(self.root, "2_lst")).lst[:, :]
+        return np.load(os.path.join(self.root, f"{k}_lst.npy"))
+
+    def test_that_run_processes_all_scenes(self):
+        code, output = self.run_cli("--jobs", "2", "--threads", "2")
+        self.assertEqual(code, 0)
+        self.assertIn("3 processed", output)
+        self.assertIn("Mpixel/s", output)
+        for k in range(3):
+            np.testing.assert_allclose(
+                self.read_output(k), self.expected[f"scene-{k}"], equal_nan=True
+            )
+
+        code, output = self.run_cli()
+        self.assertIn("0 processed, 3 already done", output)
+
+    def test_that_interrupted_run_resumes_tiles(self):
+        self.run_cli()
+        # Simulate a run interrupted in the middle of scene-0: the first tile is
+        # recorded and its values are marked, the scene is not completed
+        checkpoint_path = f"{self.manifest}.checkpoint"
+        with open(checkpoint_path) as f:
+            events = [json.loads(line) for line in f]
+        config = next(
+            event["config"] for event in events if event["scene"] == "scene-0"
+        )
+        os.remove(checkpoint_path)
+        lst = np.load(os.path.join(self.root, "0_lst.npy"), mmap_mode="r+")
+        lst[:16, :16] = -1
+        lst.flush()
+        del lst
+
+        checkpoint = Checkpoint(checkpoint_path)
+        checkpoint.start_scene("scene-0", config)
+        checkpoint.tile_done("scene-0", Tile(0, 0, 16, 16))
+        checkpoint.close()
+        with open(checkpoint_path, "a") as f:
+            f.write('{"scene": "scene-0", "tile": [0, 1')
+
+        code, output = self.run_cli()
+        self.assertEqual(code, 0)
+        self.assertIn("17 computed, 1 resumed", output)
+        result = self.read_output(0)
+        self.assertTrue(np.all(result[:16, :16] == -1))
+        np.testing.assert_allclose(
+            result[16:], self.expected["scene-0"][16:], equal_nan=True
+        )
+
+    def test_that_failed_scenes_are_reported(self):
+        os.remove(os.path.join(self.root, "1_landsat_band_4.npy"))
+        code, output = self.run_cli()
+        self.assertEqual(code, 1)
+        self.assertIn("Failed scene-1", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import datetime
+import os
+import tempfile
+import unittest
+import warnings
+
+import numpy as np
+
+from pylandtemp.pipeline import (
+    ClimatologySink,
+    ClimatologyStore,
+    TiledPipeline,
+)
+
+from synthetic import synthetic_bands
+
+
+class TestClimatology(unittest.TestCase):
+    rng = np.random.default_rng(12)
+    shape = (30, 40)
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "climatology")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_bands(self):
+        return synthetic_bands(
+            self.shape, seed=self.rng.integers(2**32), nodata=0.1, split_window=False
+        )
+
+    def test_that_anomalies_use_the_history_before_the_scene(self):
+        store = ClimatologyStore.create(self.path, self.shape)
+        pipeline = TiledPipeline("mono-window", tile_shape=(16, 16))
+        date = datetime.date(2021, 7, 14)
+
+        history = []
+        for _ in range(8):
+            bands = self.make_bands()
+            history.append(pipeline(**bands))
+            pipeline(sink=ClimatologySink(store, date), **bands)
+        bands = self.make_bands()
+        outputs = pipeline(
+            sink=ClimatologySink(store, date, lst_sink=None, update=False), **bands
+        )
+
+        stack = np.stack(history)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            mean = np.nanmean(stack, axis=0)
+            std = np.nanstd(stack, axis=0, ddof=1)
+        count = (~np.isnan(stack)).sum(axis=0)
+        expected = np.where(count >= 2, (pipeline(**bands) - mean) / std, np.nan)
+        np.testing.assert_allclose(outputs["anomaly"], expected, equal_nan=True)
+
+        reopened = ClimatologyStore(self.path)
+        climatology_mean, climatology_std = reopened.statistics(6)
+        valid = count >= 2
+        np.testing.assert_allclose(climatology_mean[valid], mean[valid])
+        np.testing.assert_allclose(climatology_std[valid], std[valid])
+        np.testing.assert_array_equal(reopened.count[6], count)
+        self.assertEqual(reopened.count[5].max(), 0)
+
+    def test_that_quantized_scenes_are_decoded(self):
+        store = ClimatologyStore.create(self.path, self.shape, periods=1)
+        pipeline = TiledPipeline("mono-window", tile_shape=(16, 16), quantize=True)
+        scenes = [self.make_bands() for _ in range(3)]
+        for bands in scenes:
+            outputs = pipeline(sink=ClimatologySink(store, 0, lst_sink=None), **bands)
+        mean, _ = store.statistics(0)
+        float_pipeline = TiledPipeline("mono-window")
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            expected = np.nanmean(
+                np.stack([float_pipeline(**bands) for bands in scenes]), axis=0
+            )
+        valid = ~np.isnan(mean)
+        np.testing.assert_allclose(mean[valid], expected[valid], atol=0.006)
+
+    def test_that_grid_mismatch_is_rejected(self):
+        store = ClimatologyStore.create(self.path, (10, 10))
+        with self.assertRaises(ValueError):
+            TiledPipeline("mono-window")(
+                sink=ClimatologySink(store, 0), **self.make_bands()
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
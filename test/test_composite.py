@@ -0,0 +1,104 @@
+import unittest
+import unittest.mock
+import warnings
+
+import numpy as np
+
+from pylandtemp.pipeline import CompositeAccumulator, TemporalComposite, TiledPipeline
+from pylandtemp.pipeline import composite
+
+from synthetic import synthetic_bands
+
+
+class TestTemporalComposite(unittest.TestCase):
+    rng = np.random.default_rng(11)
+    shape = (40, 50)
+
+    def make_dates(self, count):
+        return [
+            synthetic_bands(
+                self.shape,
+                seed=self.rng.integers(2**32),
+                nodata=0.2,
+                split_window=False,
+            )
+            for _ in range(count)
+        ]
+
+    def test_that_composites_match_stacked_statistics(self):
+        dates = self.make_dates(25)
+        composite = TemporalComposite(
+            "mono-window",
+            statistics=("max", "min", "mean", "count", "median", "p90"),
+            tile_shape=(16, 16),
+        )
+        result = composite(dates)
+
+        stack = np.stack([TiledPipeline("mono-window")(**bands) for bands in dates])
+        count = (~np.isnan(stack)).sum(axis=0)
+        np.testing.assert_array_equal(result["count"], count)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            np.testing.assert_allclose(result["max"], np.nanmax(stack, axis=0))
+            np.testing.assert_allclose(result["min"], np.nanmin(stack, axis=0))
+            np.testing.assert_allclose(result["mean"], np.nanmean(stack, axis=0))
+            for name, q in (("median", 50), ("p90", 90)):
+                lower = np.nanpercentile(stack, q, axis=0, method="lower")
+                higher = np.nanpercentile(stack, q, axis=0, method="higher")
+                valid = count > 0
+                # The sketch finds the order statistic up to a bin width
+                self.assertTrue(
+                    np.all(result[name][valid] >= lower[valid] - 0.5 - 1e-9)
+                )
+                self.assertTrue(
+                    np.all(result[name][valid] <= higher[valid] + 0.5 + 1e-9)
+                )
+                self.assertTrue(np.isnan(result[name][~valid]).all())
+
+    def test_that_quantile_error_is_bounded_by_bin_width(self):
+        accumulator = CompositeAccumulator((1, 1000), (0.0, 100.0), bin_width=0.25)
+        samples = self.rng.uniform(10, 90, (2001, 1000))
+        for k, image in enumerate(samples):
+            accumulator.update(image)
+            if k == 254:
+                self.assertEqual(accumulator.histogram.dtype, np.uint8)
+        # Promoted once the pixels hold more values than uint8 counts
+        self.assertEqual(accumulator.histogram.dtype, np.uint16)
+        expected = accumulator.quantile(0.5)
+        np.testing.assert_allclose(expected[0], np.median(samples, axis=0), atol=0.25)
+        # Quantiles are computed a chunk of pixels at a time
+        with unittest.mock.patch.object(composite, "QUANTILE_CHUNK_PIXELS", 7):
+            np.testing.assert_array_equal(accumulator.quantile(0.5), expected)
+
+    def test_that_workers_are_bounded_by_the_memory_budget(self):
+        dates = self.make_dates(3)
+        options = dict(statistics=("median", "count"), tile_shape=(16, 16))
+        expected = TemporalComposite("mono-window", **options)(dates)
+        composite_lst = TemporalComposite(
+            "mono-window", max_workers=8, memory_budget=1, **options
+        )
+        with unittest.mock.patch.object(
+            composite, "ThreadPoolExecutor", wraps=composite.ThreadPoolExecutor
+        ) as executor:
+            result = composite_lst(dates)
+        self.assertEqual(executor.call_args.kwargs["max_workers"], 1)
+        for name in options["statistics"]:
+            np.testing.assert_array_equal(result[name], expected[name])
+
+    def test_that_pixels_without_values_are_nan(self):
+        accumulator = CompositeAccumulator((2, 2), (0.0, 10.0))
+        accumulator.update(np.array([[1.0, np.nan], [2.0, np.nan]]))
+        accumulator.update(np.array([[3.0, np.nan], [np.nan, np.nan]]))
+        np.testing.assert_array_equal(accumulator.statistic("count"), [[2, 0], [1, 0]])
+        np.testing.assert_allclose(
+            accumulator.statistic("mean"), [[2.0, np.nan], [2.0, np.nan]]
+        )
+        self.assertTrue(np.isnan(accumulator.statistic("median")[:, 1]).all())
+
+    def test_that_unknown_statistics_are_rejected(self):
+        with self.assertRaises(ValueError):
+            TemporalComposite("mono-window", statistics=("mode",))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+
+import numpy as np
+
+from pylandtemp.exceptions import KeywordArgumentError
+from pylandtemp.pipeline import BandCube, TiledPipeline, cube_lst
+
+from synthetic import synthetic_bands
+
+BAND_INDICES = {
+    "landsat_band_4": 0,
+    "landsat_band_5": 1,
+    "landsat_band_10": 2,
+    "landsat_band_11": 3,
+}
+
+
+class TestBandCube(unittest.TestCase):
+    def setUp(self):
+        self.bands = synthetic_bands(
+            (60, 90), seed=10, nodata=np.s_[:4, :7], dtype=np.int64
+        )
+        self.cube = np.stack([self.bands[name] for name in BAND_INDICES]).astype(
+            np.uint16
+        )
+
+    def test_that_bands_are_views_of_the_cube(self):
+        for cube, layout in (
+            (self.cube, "bands-first"),
+            (np.moveaxis(self.cube, 0, -1).copy(), "bands-last"),
+        ):
+            bands = BandCube(cube, BAND_INDICES, layout)
+            self.assertEqual(bands.shape, (60, 90))
+            for name, band in bands.bands.items():
+                self.assertTrue(np.shares_memory(band, cube))
+                np.testing.assert_array_equal(band, self.bands[name])
+
+    def test_that_tiles_follow_memory_order(self):
+        bands = BandCube(self.cube, BAND_INDICES)
+        self.assertEqual(bands.tile_shape(900), (10, 90))
+        self.assertEqual(bands.tile_shape(10**6), (60, 90))
+        self.assertEqual(bands.tile_shape(10), (1, 90))
+
+        pixel_interleaved = np.moveaxis(self.cube, 0, -1).copy()
+        self.assertEqual(
+            BandCube(pixel_interleaved, BAND_INDICES, "bands-last").tile_shape(900),
+            (10, 90),
+        )
+        column_major = np.asfortranarray(pixel_interleaved)
+        self.assertEqual(
+            BandCube(column_major, BAND_INDICES, "bands-last").tile_shape(900),
+            (60, 15),
+        )
+
+    def test_that_cube_lst_matches_separate_bands(self):
+        for lst_method in ("mono-window", "kerr"):
+            expected = TiledPipeline(lst_method)(**self.bands)
+            for cube, layout in (
+                (self.cube, "bands-first"),
+                (np.moveaxis(self.cube, 0, -1).copy(), "bands-last"),
+                (np.moveaxis(self.cube, 0, -1), "bands-last"),
+            ):
+                lst = cube_lst(
+                    cube, BAND_INDICES, lst_method, layout=layout, tile_pixels=1000
+                )
+                np.testing.assert_array_equal(lst, expected)
+
+        quantized = cube_lst(self.cube, BAND_INDICES, "mono-window", quantize=True)
+        self.assertEqual(quantized.dtype, np.int16)
+
+    def test_that_invalid_cubes_raise(self):
+        with self.assertRaises(ValueError):
+            BandCube(self.cube, BAND_INDICES, "interleaved")
+        with self.assertRaises(ValueError):
+            BandCube(self.cube[0], BAND_INDICES)
+        with self.assertRaises(ValueError):
+            BandCube(self.cube, {"landsat_band_10": 4})
+        with self.assertRaises(KeywordArgumentError):
+            cube_lst(self.cube, {"landsat_band_10": 2}, "mono-window")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+import unittest.mock
+
+import numpy as np
+
+from pylandtemp.pipeline import SQLiteJobQueue, TiledPipeline, Worker
+
+from synthetic import synthetic_bands
+
+
+def run_worker(path, worker_id):
+    queue = SQLiteJobQueue(path)
+    Worker(
+        queue, worker_id, lease_seconds=5, poll_interval=0.05, tile_shape=(16, 16)
+    ).run()
+
+
+class TestDistributedRunner(unittest.TestCase):
+    shape = (30, 40)
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.queue = SQLiteJobQueue(os.path.join(self.directory.name, "jobs.db"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_jobs(self, count):
+        jobs, expected = [], []
+        for k in range(count):
+            bands = synthetic_bands(
+                self.shape, seed=8 + k, nodata=None, split_window=False
+            )
+            for name, band in bands.items():
+                np.save(os.path.join(self.directory.name, f"{k}_{name}.npy"), band)
+            expected.append(TiledPipeline("mono-window")(**bands))
+            jobs.append(
+                {
+                    "lst_method": "mono-window",
+                    "bands": {
+                        name: {
+                            "path": os.path.join(self.directory.name, f"{k}_{name}.npy")
+                        }
+                        for name in bands
+                    },
+                    "output": {
+                        "path": os.path.join(self.directory.name, f"{k}_lst.npy")
+                    },
+                }
+            )
+        return jobs, expected
+
+    def test_that_lease_is_exclusive_and_expires(self):
+        self.queue.put([{"lst_method": "mono-window"}])
+        job = self.queue.lease("a", lease_seconds=0.1)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNone(self.queue.lease("b", lease_seconds=0.1))
+        self.assertTrue(self.queue.heartbeat(job.id, "a", 0.1))
+
+        time.sleep(0.2)
+        self.assertFalse(self.queue.heartbeat(job.id, "a", 0.1))
+        retried = self.queue.lease("b", lease_seconds=10)
+        self.assertEqual((retried.id, retried.attempts), (job.id, 2))
+        self.assertFalse(self.queue.complete(job.id, "a", {"shape": [1, 1]}))
+
+    def test_that_failing_jobs_are_retried_then_failed(self):
+        queue = SQLiteJobQueue(self.queue.path, max_attempts=2)
+        queue.put([{"lst_method": "not-a-method", "bands": {}, "output": {}}])
+        report = Worker(queue, "a", poll_interval=0.01).run()
+        self.assertEqual(report["failed"], 2)
+        self.assertEqual(queue.counts()["failed"], 1)
+        self.assertIn("ValueError", queue.job(1)["error"])
+
+    def test_that_connections_are_closed(self):
+        connections = []
+        connect = SQLiteJobQueue._connect
+
+        def record(queue):
+            connections.append(connect(queue))
+            return connections[-1]
+
+        with unittest.mock.patch.object(SQLiteJobQueue, "_connect", record):
+            queue = SQLiteJobQueue(self.queue.path)
+            queue.put([{"lst_method": "mono-window"}])
+            queue.job(1)
+            queue.throughput()
+        self.assertEqual(len(connections), 4)
+        for connection in connections:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                connection.execute("SELECT 1")
+
+    @unittest.skipUnless(hasattr(os, "fork"), "fork is required")
+    def test_that_local_processes_complete_all_jobs(self):
+        jobs, expected = self.make_jobs(6)
+        ids = self.queue.put(jobs)
+        # A node that leased a job and died before finishing it
+        self.queue.lease("dead-node", lease_seconds=0.5)
+
+        context = multiprocessing.get_context("fork")
+        processes = [
+            context.Process(target=run_worker, args=(self.queue.path, f"node-{k}"))
+            for k in range(3)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=60)
+            self.assertEqual(process.exitcode, 0)
+
+        self.assertEqual(self.queue.counts()["done"], 6)
+        self.assertEqual(self.queue.job(ids[0])["attempts"], 2)
+        for k, lst in enumerate(expected):
+            np.testing.assert_allclose(
+                np.load(jobs[k]["output"]["path"]), lst, equal_nan=True
+            )
+        throughput = self.queue.throughput()
+        self.assertEqual(throughput["jobs"], 6)
+        self.assertEqual(throughput["pixels"], 6 * 30 * 40)
+        self.assertGreater(throughput["pixels_per_second"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
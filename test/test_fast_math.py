@@ -0,0 +1,83 @@
+import unittest
+
+import numpy as np
+
+from pylandtemp import single_window, split_window
+from pylandtemp.pipeline import TiledPipeline
+from pylandtemp.temperature import BrightnessTemperatureLandsat
+from pylandtemp.temperature.utils import compute_brightness_temperature
+
+from synthetic import synthetic_bands
+
+
+class TestFastMath(unittest.TestCase):
+    def bands(self, shape=(200, 300)):
+        # Digital numbers of land surfaces, brightness temperatures of about 240 K to 330 K
+        return synthetic_bands(shape, seed=8, nodata=None, dn_range=(16000, 36000))
+
+    def test_that_brightness_temperature_error_is_bounded(self):
+        digital_numbers = np.arange(1, 65536, dtype=np.float64).reshape(1, -1)
+        constants = BrightnessTemperatureLandsat()
+        for k1, k2 in (
+            (constants.k1_constant_10, constants.k2_constant_10),
+            (constants.k1_constant_11, constants.k2_constant_11),
+        ):
+            arguments = (digital_numbers, constants.mult_factor, constants.add_factor)
+            exact = compute_brightness_temperature(*arguments, k1, k2)
+            fast = compute_brightness_temperature(*arguments, k1, k2, fast_math=True)
+            self.assertEqual(fast.dtype, np.float32)
+            self.assertLess(np.abs(fast - exact).max(), 1e-4)
+
+        # Integer digital numbers give the same result
+        np.testing.assert_array_equal(
+            compute_brightness_temperature(
+                digital_numbers.astype(np.uint16),
+                *arguments[1:],
+                k1,
+                k2,
+                fast_math=True,
+            ),
+            fast,
+        )
+
+    def test_that_lst_error_is_bounded(self):
+        bands = self.bands()
+        split_bands = [bands[f"landsat_band_{band}"] for band in (10, 11, 4, 5)]
+        single_bands = [bands[f"landsat_band_{band}"] for band in (10, 4, 5)]
+        for method in ("jiminez-munoz", "kerr", "mc-millin", "price", "sobrino-1993"):
+            for emissivity_method in ("avdan", "xiaolei", "gopinadh"):
+                exact = split_window(*split_bands, method, emissivity_method)
+                fast = split_window(
+                    *split_bands, method, emissivity_method, fast_math=True
+                )
+                self.assertEqual(fast.dtype, np.float64)
+                valid = ~np.isnan(exact) & ~np.isnan(fast)
+                # Only pixels within the error of the max_earth_temp cap may differ
+                self.assertLess(np.sum(np.isnan(exact) != np.isnan(fast)), 5)
+                self.assertLess(np.abs(fast - exact)[valid].max(), 1e-3)
+        exact = single_window(*single_bands)
+        fast = single_window(*single_bands, fast_math=True)
+        self.assertEqual(fast.dtype, np.float64)
+        np.testing.assert_allclose(fast, exact, atol=1e-4, rtol=0)
+
+    def test_that_pipeline_uses_fast_math(self):
+        bands = self.bands((64, 64))
+        for stage_workers in (None, 2):
+            pipeline = TiledPipeline(
+                "mono-window", fast_math=True, stage_workers=stage_workers
+            )
+            self.assertEqual(pipeline.compute(**bands).dtype, np.float64)
+        exact = TiledPipeline("mono-window", tile_shape=(32, 32))(**bands)
+        for stage_workers in (None, 2):
+            fast = TiledPipeline(
+                "mono-window",
+                tile_shape=(32, 32),
+                fast_math=True,
+                stage_workers=stage_workers,
+            )(**bands)
+            self.assertFalse(np.array_equal(fast, exact, equal_nan=True))
+            np.testing.assert_allclose(fast, exact, atol=1e-4, rtol=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
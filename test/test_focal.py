@@ -0,0 +1,99 @@
+import unittest
+import warnings
+
+import numpy as np
+
+from pylandtemp import single_window
+from pylandtemp.pipeline import FocalStatistics, TiledPipeline, focal_statistics
+
+from synthetic import synthetic_bands
+
+
+def brute_force(image, window, min_count=1):
+    rows, cols = image.shape
+    half_rows, half_cols = window[0] // 2, window[1] // 2
+    outputs = {name: np.full(image.shape, np.nan) for name in ("mean", "std")}
+    outputs["count"] = np.zeros(image.shape, dtype=np.int64)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for row in range(rows):
+            for col in range(cols):
+                values = image[
+                    max(row - half_rows, 0) : row + half_rows + 1,
+                    max(col - half_cols, 0) : col + half_cols + 1,
+                ]
+                count = int((~np.isnan(values)).sum())
+                outputs["count"][row, col] = count
+                if count >= min_count:
+                    outputs["mean"][row, col] = np.nanmean(values)
+                    outputs["std"][row, col] = np.nanstd(values)
+    return outputs
+
+
+class TestFocalStatistics(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(15)
+        self.image = 290 + 10 * rng.standard_normal((37, 45))
+        self.image[rng.uniform(size=self.image.shape) < 0.2] = np.nan
+        self.image[5:15, 10:25] = np.nan
+
+    def test_that_statistics_match_brute_force(self):
+        for window, min_count in ((5, 1), ((7, 3), 1), (11, 20)):
+            shape = (window, window) if np.ndim(window) == 0 else window
+            expected = brute_force(self.image, shape, min_count)
+            outputs = focal_statistics(
+                self.image,
+                window,
+                ("mean", "std", "count", "anomaly"),
+                min_count=min_count,
+            )
+            np.testing.assert_array_equal(outputs["count"], expected["count"])
+            for name in ("mean", "std"):
+                np.testing.assert_allclose(
+                    outputs[name], expected[name], atol=1e-9, equal_nan=True
+                )
+            np.testing.assert_allclose(
+                outputs["anomaly"],
+                self.image - expected["mean"],
+                atol=1e-9,
+                equal_nan=True,
+            )
+
+    def test_that_tiles_match_the_whole_image(self):
+        expected = focal_statistics(self.image, 9, ("mean", "std", "count"))
+        outputs = FocalStatistics(9, tile_shape=(10, 16))(self.image)
+        np.testing.assert_array_equal(outputs["count"], expected["count"])
+        for name in ("mean", "std"):
+            np.testing.assert_allclose(
+                outputs[name], expected[name], atol=1e-9, equal_nan=True
+            )
+
+    def test_that_quantized_pipeline_outputs_are_decoded(self):
+        bands = synthetic_bands(
+            (40, 50), seed=16, nodata=None, split_window=False, dn_range=(16000, 36000)
+        )
+        pipeline = TiledPipeline("mono-window", quantize=True, tile_shape=(16, 16))
+        quantized = pipeline(**bands)
+        lst = single_window(
+            bands["landsat_band_10"], bands["landsat_band_4"], bands["landsat_band_5"]
+        )
+        outputs = FocalStatistics(7, ("mean",), tile_shape=(16, 16))(
+            quantized, attrs=pipeline.attrs
+        )
+        expected = focal_statistics(lst, 7, ("mean",))
+        np.testing.assert_allclose(
+            outputs["mean"], expected["mean"], atol=0.01, equal_nan=True
+        )
+
+    def test_that_invalid_arguments_raise(self):
+        for window in (4, (3, 4), 0, (3, 3, 3), 2.5):
+            with self.assertRaises(ValueError):
+                FocalStatistics(window)
+        with self.assertRaises(ValueError):
+            FocalStatistics(3, ("median",))
+        with self.assertRaises(ValueError):
+            focal_statistics(self.image[0], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import threading
+import unittest
+import weakref
+
+import numpy as np
+
+from pylandtemp.pipeline import Stage, StageGraph, TiledPipeline, lst_graph
+from pylandtemp.pylandtemp import lst_stages
+
+from synthetic import synthetic_bands
+
+
+class Image(np.ndarray):
+    """ndarray subclass supporting weak references"""
+
+
+class TestStageGraph(unittest.TestCase):
+    def bands(self, shape=(40, 50)):
+        return synthetic_bands(shape, seed=9, nodata=np.s_[:4, :6])
+
+    def test_that_lst_graph_matches_lst_stages(self):
+        bands = self.bands()
+        for lst_method in ("mono-window", "jiminez-munoz", "kerr"):
+            split = lst_method != "mono-window"
+            expected = lst_stages(
+                bands["landsat_band_10"],
+                bands["landsat_band_11"] if split else None,
+                bands["landsat_band_4"],
+                bands["landsat_band_5"],
+                lst_method,
+                "xiaolei",
+            )
+            inputs = dict(bands, quantize=False, cwv=None)
+            if not split:
+                del inputs["landsat_band_11"]
+            values = lst_graph(lst_method, "xiaolei")(
+                outputs=tuple(expected), max_workers=4, **inputs
+            )
+            self.assertEqual(set(values), set(expected))
+            for name, image in expected.items():
+                np.testing.assert_array_equal(values[name], image)
+
+    def test_that_pipeline_stage_workers_match_sequential_stages(self):
+        bands = self.bands()
+        for lst_method, unit, quantize in (
+            ("jiminez-munoz", "kelvin", False),
+            ("mono-window", "celcius", False),
+            ("sobrino-1993", "celcius", True),
+        ):
+            options = dict(unit=unit, quantize=quantize, tile_shape=(16, 16))
+            expected = TiledPipeline(lst_method, **options)(stats=True, **bands)
+            result = TiledPipeline(lst_method, stage_workers=3, **options)(
+                stats=True, **bands
+            )
+            np.testing.assert_array_equal(result[0], expected[0])
+            self.assertAlmostEqual(
+                result[1]["ndvi"]["mean"], expected[1]["ndvi"]["mean"]
+            )
+            np.testing.assert_array_equal(
+                TiledPipeline(lst_method, stage_workers=3, **options)(**bands),
+                expected[0],
+            )
+
+    def test_that_independent_stages_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def meet(value):
+            barrier.wait()
+            return value
+
+        graph = StageGraph(
+            [
+                Stage(("a",), meet, {"value": "x"}),
+                Stage(("b",), meet, {"value": "x"}),
+                Stage(("c",), lambda a, b: a + b, {"a": "a", "b": "b"}),
+            ]
+        )
+        self.assertEqual(graph(outputs=("c",), max_workers=2, x=2), {"c": 4})
+
+    def test_that_intermediates_are_released(self):
+        released = []
+
+        def produce(x):
+            image = np.full(3, x).view(Image)
+            weakref.finalize(image, released.append, "a")
+            return image
+
+        def consume(a):
+            return a.sum()
+
+        def check(b):
+            # 'a' is released once its only consumer finished
+            return list(released)
+
+        graph = StageGraph(
+            [
+                Stage(("a",), produce, {"x": "x"}),
+                Stage(("b",), consume, {"a": "a"}),
+                Stage(("c",), check, {"b": "b"}),
+            ]
+        )
+        self.assertEqual(graph(outputs=("c",), max_workers=1, x=1), {"c": ["a"]})
+
+    def test_that_invalid_graphs_are_rejected(self):
+        identity = lambda value: value
+        with self.assertRaises(ValueError):
+            StageGraph(
+                [
+                    Stage(("a",), identity, {"value": "b"}),
+                    Stage(("b",), identity, {"value": "a"}),
+                ]
+            )
+        graph = StageGraph([Stage(("a",), identity, {"value": "x"})])
+        with self.assertRaises(ValueError):
+            graph()
+        with self.assertRaises(ValueError):
+            graph(outputs=("z",), x=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+
+import numpy as np
+
+from pylandtemp import single_window
+from pylandtemp.pipeline import TiledPipeline
+from pylandtemp.temperature import BrightnessTemperatureLandsat, MonoWindowLUT
+from pylandtemp.temperature.utils import dequantize_temperature
+
+from synthetic import synthetic_bands
+
+
+class TestMonoWindowLUT(unittest.TestCase):
+    def bands(self, shape=(120, 150)):
+        bands = synthetic_bands(shape, seed=9, nodata=np.s_[:3, :5], split_window=False)
+        bands["landsat_band_10"] = bands["landsat_band_10"].astype(np.uint16)
+        return bands
+
+    def test_that_lookup_matches_exact_chain(self):
+        bands = self.bands()
+        exact = single_window(
+            bands["landsat_band_10"],
+            bands["landsat_band_4"],
+            bands["landsat_band_5"],
+            lst_method="mono-window",
+            emissivity_method="avdan",
+        )
+        for interpolate in (True, False):
+            lut = MonoWindowLUT(interpolate=interpolate)
+            pipeline = TiledPipeline(
+                "mono-window", tile_shape=(50, 64), lookup_table=lut
+            )
+            lst = pipeline(**bands)
+            np.testing.assert_array_equal(np.isnan(lst), np.isnan(exact))
+            self.assertLess(np.nanmax(np.abs(lst - exact)), 1e-4)
+            self.assertLess(lut.error_bound(samples=10000), 1e-4)
+
+        quantized = TiledPipeline(
+            "mono-window", unit="celcius", quantize=True, lookup_table=lut
+        )(**bands)
+        np.testing.assert_allclose(
+            dequantize_temperature(quantized), exact, atol=0.01, equal_nan=True
+        )
+
+    def test_that_stats_summarize_the_looked_up_lst(self):
+        bands = self.bands()
+        pipeline = TiledPipeline(
+            "mono-window", tile_shape=(50, 64), lookup_table=MonoWindowLUT()
+        )
+        looked_up = pipeline(**bands)
+        lst, summary = pipeline(stats=True, **bands)
+        np.testing.assert_array_equal(lst, looked_up)
+        self.assertAlmostEqual(summary["lst"]["mean"], np.nanmean(looked_up))
+        self.assertEqual(summary["lst"]["max"], np.nanmax(looked_up))
+        self.assertEqual(
+            set(summary), {"ndvi", "brightness_temperature_10", "emissivity_10", "lst"}
+        )
+
+    def test_that_tables_are_cached_per_calibration(self):
+        lut = MonoWindowLUT(ndvi_step=0.05)
+        self.assertIs(MonoWindowLUT(ndvi_step=0.05).table, lut.table)
+        self.assertEqual(lut.table.shape, (65536, 41))
+
+        calibration = BrightnessTemperatureLandsat()
+        calibration.mult_factor = 0.0003
+        other = MonoWindowLUT(ndvi_step=0.05, brightness_temperature=calibration)
+        self.assertIsNot(other.table, lut.table)
+        self.assertFalse(np.array_equal(other.table, lut.table, equal_nan=True))
+
+    def test_that_invalid_pixels_are_nan(self):
+        lut = MonoWindowLUT(ndvi_step=0.1, dn_range=(10000, 40000))
+        digital_numbers = np.array([[0, 9999, 20000, 20000, 20000, 40001]])
+        ndvi = np.array([[0.3, 0.3, np.nan, 1.2, 0.3, 0.3]])
+        lst = lut(digital_numbers, ndvi)
+        np.testing.assert_array_equal(
+            np.isnan(lst), [[True, True, True, True, False, True]]
+        )
+
+    def test_that_invalid_arguments_raise(self):
+        for ndvi_step in (0.03, 0, -0.01):
+            with self.assertRaises(ValueError):
+                MonoWindowLUT(ndvi_step=ndvi_step)
+        with self.assertRaises(ValueError):
+            TiledPipeline("kerr", lookup_table=MonoWindowLUT())
+        with self.assertRaises(ValueError):
+            TiledPipeline(
+                "mono-window", emissivity_method="xiaolei", lookup_table=MonoWindowLUT()
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
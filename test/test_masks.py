@@ -0,0 +1,119 @@
+import unittest
+
+import numpy as np
+
+from pylandtemp import ndvi
+from pylandtemp.masks import (
+    BitMask,
+    RunLengthMask,
+    apply_mask,
+    compact_mask,
+    nodata_mask,
+)
+from pylandtemp.temperature import SplitWindowKerrLST
+
+
+class TestCompactMasks(unittest.TestCase):
+    rng = np.random.default_rng(2)
+    border = np.zeros((300, 1000), dtype=bool)
+    border[:, :7] = True
+    border[:20] = True
+    border[150:160, 400:] = True
+    clouds = rng.random((300, 1000)) < 0.05
+
+    def test_that_representations_round_trip(self):
+        for mask in (self.border, self.clouds):
+            np.testing.assert_array_equal(
+                np.asarray(RunLengthMask.from_array(mask)), mask
+            )
+            np.testing.assert_array_equal(np.asarray(BitMask.from_array(mask)), mask)
+
+    def test_that_compact_mask_picks_smaller_representation(self):
+        self.assertIsInstance(compact_mask(self.border), RunLengthMask)
+        self.assertIsInstance(compact_mask(self.clouds), BitMask)
+        self.assertLess(compact_mask(self.border).nbytes, self.border.nbytes // 8)
+
+    def test_that_nodata_mask_matches_comparison(self):
+        image = self.rng.uniform(1, 10, self.border.shape)
+        image[self.border] = 0
+        mask = nodata_mask(image)
+        self.assertIsInstance(mask, RunLengthMask)
+        np.testing.assert_array_equal(np.asarray(mask), self.border)
+        self.assertEqual(mask.count(), self.border.sum())
+
+    def test_that_logical_operations_match_bool_arrays(self):
+        border = RunLengthMask.from_array(self.border)
+        clouds = BitMask.from_array(self.clouds)
+        np.testing.assert_array_equal(
+            np.asarray(border | clouds), self.border | self.clouds
+        )
+        np.testing.assert_array_equal(
+            np.asarray(border & clouds), self.border & self.clouds
+        )
+        np.testing.assert_array_equal(
+            np.asarray(clouds ^ border), self.clouds ^ self.border
+        )
+        np.testing.assert_array_equal(np.asarray(~border), ~self.border)
+        np.testing.assert_array_equal(
+            np.asarray(self.clouds & border), self.clouds & self.border
+        )
+        self.assertEqual((~clouds).count(), (~self.clouds).sum())
+
+    def test_that_windows_match_bool_arrays(self):
+        window = (slice(10, 170), slice(3, 500))
+        for mask in (
+            RunLengthMask.from_array(self.border),
+            BitMask.from_array(self.border),
+        ):
+            np.testing.assert_array_equal(np.asarray(mask[window]), self.border[window])
+
+    def test_that_apply_matches_boolean_assignment(self):
+        image = self.rng.random(self.border.shape)
+        expected = image.copy()
+        expected[self.border | self.clouds] = np.nan
+        for mask in (
+            RunLengthMask.from_array(self.border | self.clouds),
+            BitMask.from_array(self.border | self.clouds),
+            self.border | self.clouds,
+        ):
+            np.testing.assert_array_equal(apply_mask(image.copy(), mask), expected)
+        # Few long runs
+        expected = image.copy()
+        expected[self.border] = np.nan
+        np.testing.assert_array_equal(
+            apply_mask(image.copy(), RunLengthMask.from_array(self.border)), expected
+        )
+
+    def test_that_runs_at_the_edges_are_kept(self):
+        mask = self.clouds.copy()
+        mask[0, 0] = mask[:, -1] = mask[-1, -1] = True
+        run_length = RunLengthMask.from_array(mask)
+        np.testing.assert_array_equal(np.asarray(run_length), mask)
+        for rows, expected in zip(run_length.nonzero(), np.nonzero(mask)):
+            np.testing.assert_array_equal(rows, expected)
+
+
+class TestAlgorithmsAcceptCompactMasks(unittest.TestCase):
+    rng = np.random.default_rng(3)
+    band = rng.uniform(5000, 15000, (40, 30))
+    mask = np.zeros((40, 30), dtype=bool)
+    mask[:, :4] = True
+
+    def test_that_ndvi_accepts_compact_mask(self):
+        expected = ndvi(self.band, self.band / 2, self.mask)
+        output = ndvi(self.band, self.band / 2, compact_mask(self.mask))
+        np.testing.assert_array_equal(output, expected)
+
+    def test_that_lst_accepts_compact_mask(self):
+        kwargs = {
+            "brightness_temperature_10": np.full((40, 30), 300.0),
+            "brightness_temperature_11": np.full((40, 30), 299.0),
+            "ndvi": np.full((40, 30), 0.3),
+        }
+        expected = SplitWindowKerrLST()(mask=self.mask, **kwargs)
+        output = SplitWindowKerrLST()(mask=compact_mask(self.mask), **kwargs)
+        np.testing.assert_array_equal(output, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import datetime
+import unittest
+import warnings
+
+import numpy as np
+
+from pylandtemp.pipeline import MosaicBuilder, MosaicScene, TiledPipeline
+
+from synthetic import synthetic_bands
+
+
+class TestMosaic(unittest.TestCase):
+    shape = (100, 140)
+
+    def scene(self, seed, offset, size, **kwargs):
+        bands = synthetic_bands(size, seed=seed, nodata=np.s_[:5, :5])
+        return MosaicScene(bands, offset, **kwargs)
+
+    def scenes(self):
+        return [
+            self.scene(1, (0, 0), (60, 80), cloud=0.1, date=datetime.date(2021, 1, 1)),
+            self.scene(
+                2, (30, 50), (60, 80), cloud=0.5, date=datetime.date(2021, 3, 1)
+            ),
+            self.scene(
+                3, (50, 10), (50, 60), cloud=0.3, date=datetime.date(2021, 2, 1)
+            ),
+        ]
+
+    def expected(self, scenes, rule):
+        stack = np.full((len(scenes),) + self.shape, np.nan)
+        for i, scene in enumerate(scenes):
+            lst = TiledPipeline("mono-window")(**scene.bands)
+            top, left = scene.offset
+            stack[i, top : top + lst.shape[0], left : left + lst.shape[1]] = lst
+        if rule == "mean":
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                return np.nanmean(stack, axis=0)
+        out = np.full(self.shape, np.nan)
+        for layer in stack[::-1]:
+            out = np.where(np.isnan(layer), out, layer)
+        return out
+
+    def test_that_overlap_rules_are_applied(self):
+        scenes = self.scenes()
+        by_date = [scenes[0], scenes[2], scenes[1]]
+        by_cloud = [scenes[1], scenes[2], scenes[0]]
+        for rule, ordered in (
+            ("latest", by_date[::-1]),
+            ("min-cloud", by_cloud[::-1]),
+            ("mean", scenes),
+        ):
+            builder = MosaicBuilder(
+                "mono-window", rule=rule, tile_shape=(32, 32), max_workers=3
+            )
+            mosaic = builder(scenes, self.shape)
+            np.testing.assert_allclose(mosaic, self.expected(ordered, rule))
+
+    def test_that_covered_pixels_are_not_computed(self):
+        scenes = self.scenes()
+        builder = MosaicBuilder("mono-window", tile_shape=(32, 32))
+        mosaic = builder(scenes, self.shape)
+        self.assertEqual(builder.computed_pixels, int((~np.isnan(mosaic)).sum()))
+
+        builder = MosaicBuilder("mono-window", rule="mean", tile_shape=(32, 32))
+        builder(scenes, self.shape)
+        valid = sum(
+            int((scene.bands["landsat_band_10"] != 0).sum()) for scene in scenes
+        )
+        self.assertEqual(builder.computed_pixels, valid)
+
+    def test_that_scenes_are_placed_with_transforms(self):
+        bands = self.scene(1, (0, 0), (10, 10)).bands
+        mosaic_transform = (30.0, 0.0, 1000.0, 0.0, -30.0, 5000.0)
+        scene = MosaicScene.from_transform(
+            bands, (30.0, 0.0, 1300.0, 0.0, -30.0, 4400.0), mosaic_transform
+        )
+        self.assertEqual(scene.offset, (20, 10))
+        with self.assertRaises(ValueError):
+            MosaicScene.from_transform(
+                bands, (30.0, 0.0, 1315.0, 0.0, -30.0, 4400.0), mosaic_transform
+            )
+        with self.assertRaises(ValueError):
+            MosaicBuilder("mono-window", rule="max")
+
+
+if __name__ == "__main__":
+    unittest.main()
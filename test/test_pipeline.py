@@ -0,0 +1,91 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from pylandtemp import split_window, single_window
+from pylandtemp.pipeline import (
+    ChunkedStoreSink,
+    TiledPipeline,
+    generate_tiles,
+)
+from pylandtemp.utils import block_nanmean
+
+from synthetic import synthetic_bands
+
+
+class TestGenerateTiles(unittest.TestCase):
+    def test_that_tiles_cover_image_once(self):
+        coverage = np.zeros((70, 90), dtype=int)
+        for tile in generate_tiles(coverage.shape, (32, 40)):
+            coverage[tile.window] += 1
+        self.assertTrue((coverage == 1).all())
+
+
+class TestTiledPipeline(unittest.TestCase):
+    bands = synthetic_bands()
+
+    def test_that_split_window_output_equals_untiled_output(self):
+        expected = split_window(
+            self.bands["landsat_band_10"],
+            self.bands["landsat_band_11"],
+            self.bands["landsat_band_4"],
+            self.bands["landsat_band_5"],
+            lst_method="jiminez-munoz",
+            emissivity_method="xiaolei",
+        )
+        output = TiledPipeline(
+            "jiminez-munoz", "xiaolei", tile_shape=(32, 40), max_workers=3
+        )(**self.bands)
+        np.testing.assert_allclose(output, expected, equal_nan=True)
+
+    def test_that_single_window_output_equals_untiled_output(self):
+        expected = single_window(
+            self.bands["landsat_band_10"],
+            self.bands["landsat_band_4"],
+            self.bands["landsat_band_5"],
+            unit="celcius",
+        )
+        output = TiledPipeline("mono-window", unit="celcius", tile_shape=(32, 40))(
+            **self.bands
+        )
+        np.testing.assert_allclose(output, expected, equal_nan=True)
+
+    def test_that_invalid_method_raises(self):
+        with self.assertRaises(ValueError):
+            TiledPipeline("not-a-method")
+
+
+class TestChunkedStoreSink(unittest.TestCase):
+    bands = synthetic_bands()
+
+    def test_that_store_round_trips_and_writes_overviews(self):
+        pipeline = TiledPipeline("kerr", tile_shape=(32, 40))
+        expected = pipeline(**self.bands)
+        with tempfile.TemporaryDirectory() as path:
+            store = pipeline(
+                sink=ChunkedStoreSink(path, overviews=(2, 4)), **self.bands
+            )
+
+            self.assertEqual(store.lst.shape, expected.shape)
+            np.testing.assert_allclose(store.lst[:, :], expected, equal_nan=True)
+            np.testing.assert_allclose(
+                store.lst[10:50, 33:81:2], expected[10:50, 33:81:2], equal_nan=True
+            )
+            np.testing.assert_allclose(store.lst[-1, 5], expected[-1, 5])
+            for factor in (2, 4):
+                np.testing.assert_allclose(
+                    np.asarray(store.overview(factor)),
+                    block_nanmean(expected, factor),
+                    equal_nan=True,
+                )
+
+    def test_that_overview_factor_must_divide_tile_shape(self):
+        pipeline = TiledPipeline("kerr", tile_shape=(30, 40))
+        with tempfile.TemporaryDirectory() as path:
+            with self.assertRaises(ValueError):
+                pipeline(sink=ChunkedStoreSink(path, overviews=(4,)), **self.bands)
+
+
+if __name__ == "__main__":
+    unittest.main()
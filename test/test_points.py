@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+
+from pylandtemp.pipeline import TiledPipeline, rowcol_from_xy, sample_points
+
+from synthetic import synthetic_bands
+
+
+class TestSamplePoints(unittest.TestCase):
+    bands = synthetic_bands((60, 80), seed=5, nodata=np.s_[:, :3])
+    points = np.array([[0, 0], [10, 20], [59, 79], [30, 3], [5, 1]])
+
+    def test_that_points_match_full_scene(self):
+        for method in ("kerr", "jiminez-munoz", "mono-window"):
+            expected = TiledPipeline(method, "xiaolei")(**self.bands)
+            output = sample_points(method, self.points, "xiaolei", **self.bands)
+            np.testing.assert_allclose(
+                output, expected[self.points[:, 0], self.points[:, 1]], equal_nan=True
+            )
+
+    def test_that_window_averages_neighborhood(self):
+        expected = TiledPipeline("kerr")(**self.bands)
+        output = sample_points("kerr", self.points, window=3, **self.bands)
+        for (row, col), value in zip(self.points, output):
+            neighborhood = expected[
+                max(row - 1, 0) : row + 2, max(col - 1, 0) : col + 2
+            ]
+            if np.isnan(neighborhood).all():
+                self.assertTrue(np.isnan(value))
+            else:
+                self.assertAlmostEqual(value, np.nanmean(neighborhood))
+
+    def test_that_transform_maps_coordinates_to_pixels(self):
+        transform = (30.0, 0.0, 204285.0, 0.0, -30.0, 4000000.0)
+        xs = 204285.0 + (self.points[:, 1] + 0.5) * 30.0
+        ys = 4000000.0 - (self.points[:, 0] + 0.5) * 30.0
+        rows, cols = rowcol_from_xy(xs, ys, transform)
+        np.testing.assert_array_equal(rows, self.points[:, 0])
+        np.testing.assert_array_equal(cols, self.points[:, 1])
+        np.testing.assert_allclose(
+            sample_points(
+                "kerr", np.stack([xs, ys], axis=1), transform=transform, **self.bands
+            ),
+            sample_points("kerr", self.points, **self.bands),
+            equal_nan=True,
+        )
+
+    def test_that_points_outside_scene_are_nan(self):
+        output = sample_points("kerr", [[-1, 10], [10, 80]], window=3, **self.bands)
+        self.assertTrue(np.isnan(output).all())
+
+    def test_that_no_points_give_an_empty_result(self):
+        for window in (1, 3):
+            output = sample_points(
+                "kerr", np.empty((0, 2)), window=window, **self.bands
+            )
+            self.assertEqual(output.shape, (0,))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import threading
+import unittest
+
+import numpy as np
+
+from pylandtemp.pipeline import ProgressiveLST, TiledPipeline
+
+from synthetic import synthetic_bands
+
+
+class TestProgressive(unittest.TestCase):
+    def bands(self, shape=(70, 90)):
+        return synthetic_bands(shape, seed=3, nodata=np.s_[5:9, 3:40])
+
+    def test_that_final_level_matches_full_resolution(self):
+        bands = self.bands()
+        for lst_method in ("mono-window", "jiminez-munoz"):
+            progressive = ProgressiveLST(lst_method, block_rows=7)
+            lst = progressive(**bands)
+            np.testing.assert_array_equal(lst, TiledPipeline(lst_method)(**bands))
+            # Every pixel is computed exactly once
+            self.assertEqual(progressive.computed_pixels, lst.size)
+
+    def test_that_levels_are_emitted_coarse_to_fine(self):
+        bands = self.bands()
+        full = TiledPipeline("mono-window")(**bands)
+        levels = []
+
+        def callback(stride, preview):
+            levels.append(stride)
+            np.testing.assert_array_equal(preview, full[::stride, ::stride])
+
+        ProgressiveLST("mono-window", strides=(8, 4, 1))(callback=callback, **bands)
+        self.assertEqual(levels, [8, 4, 1])
+
+    def test_that_levels_can_be_cancelled(self):
+        bands = self.bands()
+        progressive = ProgressiveLST("mono-window")
+        lst = progressive(callback=lambda stride, preview: stride > 8, **bands)
+        self.assertEqual(progressive.computed_pixels, 9 * 12)
+        self.assertFalse(np.isnan(lst[::8, ::8]).all())
+        self.assertTrue(np.isnan(lst[1::2]).all())
+
+        cancel = threading.Event()
+        progressive = ProgressiveLST("mono-window")
+        lst = progressive(
+            callback=lambda stride, preview: cancel.set(), cancel=cancel, **bands
+        )
+        self.assertEqual(progressive.computed_pixels, 5 * 6)
+
+    def test_that_invalid_strides_are_rejected(self):
+        for strides in ((8, 3, 1), (4, 8), (2, 0), ()):
+            with self.assertRaises(ValueError):
+                ProgressiveLST("mono-window", strides=strides)
+
+
+if __name__ == "__main__":
+    unittest.main()
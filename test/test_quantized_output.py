@@ -0,0 +1,94 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from pylandtemp import split_window, single_window
+from pylandtemp.pipeline import ChunkedStoreSink, TiledPipeline
+from pylandtemp.temperature import MonoWindowLST, SplitWindowPriceLST
+from pylandtemp.temperature.utils import (
+    LST_NODATA,
+    dequantize_temperature,
+    quantize_temperature,
+)
+
+from synthetic import synthetic_bands
+
+
+class TestQuantizeTemperature(unittest.TestCase):
+    image = np.array([[250.0, 273.15, np.nan], [300.004, 329.85, 180.0]])
+
+    def test_that_round_trip_error_is_within_half_a_step(self):
+        output = quantize_temperature(self.image)
+        self.assertEqual(output.dtype, np.int16)
+        self.assertEqual(output[0, 2], LST_NODATA)
+        np.testing.assert_allclose(
+            dequantize_temperature(output), self.image, atol=0.005, equal_nan=True
+        )
+
+
+class TestQuantizedLST(unittest.TestCase):
+    bands = synthetic_bands((20, 30), seed=1, nodata=np.s_[:2])
+    band_10 = bands["landsat_band_10"]
+    band_11 = bands["landsat_band_11"]
+    band_4 = bands["landsat_band_4"]
+    band_5 = bands["landsat_band_5"]
+
+    def test_that_lst_classes_emit_int16(self):
+        kwargs = {
+            "emissivity_10": np.full((4, 4), 0.97),
+            "emissivity_11": np.full((4, 4), 0.98),
+            "brightness_temperature_10": np.full((4, 4), 300.0),
+            "brightness_temperature_11": np.full((4, 4), 299.0),
+            "mask": np.zeros((4, 4), dtype=bool),
+        }
+        for algorithm in (MonoWindowLST(), SplitWindowPriceLST()):
+            expected = algorithm(**kwargs)
+            output = algorithm(quantize=True, **kwargs)
+            self.assertEqual(output.dtype, np.int16)
+            np.testing.assert_allclose(
+                dequantize_temperature(output), expected, atol=0.005
+            )
+
+    def test_that_public_functions_emit_unit_specific_encoding(self):
+        expected = single_window(self.band_10, self.band_4, self.band_5, unit="celcius")
+        output = single_window(
+            self.band_10, self.band_4, self.band_5, unit="celcius", quantize=True
+        )
+        np.testing.assert_allclose(
+            dequantize_temperature(output, add_offset=0.0),
+            expected,
+            atol=0.005,
+            equal_nan=True,
+        )
+
+    def test_that_pipeline_writes_int16_store(self):
+        expected = split_window(
+            self.band_10,
+            self.band_11,
+            self.band_4,
+            self.band_5,
+            "sobrino-1993",
+            "avdan",
+        )
+        pipeline = TiledPipeline("sobrino-1993", tile_shape=(8, 8), quantize=True)
+        np.testing.assert_array_equal(
+            pipeline(**self.bands), quantize_temperature(expected)
+        )
+
+        with tempfile.TemporaryDirectory() as path:
+            store = pipeline(sink=ChunkedStoreSink(path, overviews=(2,)), **self.bands)
+            self.assertEqual(store.lst.dtype, np.int16)
+            self.assertEqual(store.lst.attrs["_FillValue"], LST_NODATA)
+            np.testing.assert_allclose(
+                dequantize_temperature(store.lst[:, :]),
+                expected,
+                atol=0.005,
+                equal_nan=True,
+            )
+            self.assertEqual(store.overview(2).dtype, np.int16)
+            self.assertTrue((store.overview(2)[0, :] == LST_NODATA).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
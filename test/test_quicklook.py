@@ -0,0 +1,80 @@
+import unittest
+
+import numpy as np
+
+from pylandtemp.pipeline import (
+    QuicklookPipeline,
+    TiledPipeline,
+    aggregate_bands,
+    generate_tiles,
+)
+from pylandtemp.utils import block_nanmean
+
+
+class TestQuicklook(unittest.TestCase):
+    rows, cols = np.mgrid[0:200, 0:300]
+
+    def smooth(self, low, high, phase):
+        wave = np.sin(self.cols / 40 + phase) * np.cos(self.rows / 35)
+        return low + (high - low) * (0.5 + 0.5 * wave)
+
+    def bands(self):
+        return {
+            "landsat_band_10": self.smooth(22000, 28000, 0),
+            "landsat_band_11": self.smooth(21000, 27000, 0.3),
+            "landsat_band_4": self.smooth(6000, 9000, 1),
+            "landsat_band_5": self.smooth(9000, 18000, 2),
+        }
+
+    def test_that_quicklook_is_close_to_aggregated_lst(self):
+        bands = self.bands()
+        for lst_method in ("mono-window", "jiminez-munoz"):
+            quicklook = QuicklookPipeline(lst_method, 10, tile_shape=(100, 100))(
+                **bands
+            )
+            aggregated = block_nanmean(TiledPipeline(lst_method)(**bands), 10)
+            self.assertEqual(quicklook.shape, (20, 30))
+            difference = np.abs(quicklook - aggregated)
+            self.assertLess(difference.mean(), 0.05)
+            self.assertLess(difference.max(), 1.0)
+
+    def test_that_masked_pixels_are_ignored(self):
+        bands = self.bands()
+        bands["landsat_band_10"][:10, :10] = 0
+        bands["landsat_band_10"][10:20, :5] = 0
+        aggregated = aggregate_bands(bands, 10)
+        self.assertEqual(aggregated["landsat_band_10"][0, 0], 0)
+        self.assertEqual(aggregated["landsat_band_4"][0, 0], 0)
+        self.assertAlmostEqual(
+            aggregated["landsat_band_10"][1, 0],
+            self.bands()["landsat_band_10"][10:20, 5:10].mean(),
+        )
+
+        lst = QuicklookPipeline("mono-window", 10, tile_shape=(100, 100))(**bands)
+        self.assertTrue(np.isnan(lst[0, 0]))
+        self.assertFalse(np.isnan(lst[1, 0]))
+
+    def test_that_partial_blocks_and_factor_are_handled(self):
+        bands = {name: band[:195, :293] for name, band in self.bands().items()}
+        pipeline = QuicklookPipeline("mono-window", 4, tile_shape=(64, 64))
+        self.assertEqual(pipeline(**bands).shape, (49, 74))
+        with self.assertRaises(ValueError):
+            QuicklookPipeline("mono-window", 3, tile_shape=(64, 64))
+
+    def test_that_tiles_and_stats_are_passed_through(self):
+        bands = self.bands()
+        pipeline = QuicklookPipeline("mono-window", 10, tile_shape=(100, 100))
+        expected = pipeline(**bands)
+        lst, summary = pipeline(stats=True, **bands)
+        np.testing.assert_array_equal(lst, expected)
+        self.assertEqual(summary["lst"]["count"], np.sum(~np.isnan(expected)))
+        self.assertAlmostEqual(summary["lst"]["mean"], np.nanmean(expected))
+
+        tiles = generate_tiles((200, 300), (100, 100))[:2]
+        partial = pipeline(tiles=tiles, **bands)
+        np.testing.assert_array_equal(partial[:10, :20], expected[:10, :20])
+        self.assertTrue(np.isnan(partial[10:]).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
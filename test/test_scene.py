@@ -0,0 +1,61 @@
+import unittest
+
+import numpy as np
+
+from pylandtemp.pipeline import LSTScene, TiledPipeline
+
+from synthetic import synthetic_bands
+
+
+class CountingBand:
+    """Band source recording the windows read from it"""
+
+    def __init__(self, image):
+        self.image = image
+        self.shape = image.shape
+        self.windows = []
+
+    def __getitem__(self, window):
+        self.windows.append(window)
+        return self.image[window]
+
+
+class TestLSTScene(unittest.TestCase):
+    shape = (100, 130)
+    bands = synthetic_bands(shape, seed=4, nodata=np.s_[:, :6])
+    expected = TiledPipeline("price", "gopinadh")(**bands)
+
+    def test_that_windows_match_full_scene(self):
+        scene = LSTScene("price", "gopinadh", tile_shape=(32, 32), **self.bands)
+        np.testing.assert_allclose(
+            scene.lst[10:70, 5:99], self.expected[10:70, 5:99], equal_nan=True
+        )
+        np.testing.assert_allclose(scene.lst[99, 129], self.expected[99, 129])
+        np.testing.assert_allclose(np.asarray(scene.lst), self.expected, equal_nan=True)
+
+    def test_that_only_needed_band_windows_are_read(self):
+        bands = {name: CountingBand(band) for name, band in self.bands.items()}
+        scene = LSTScene("price", "gopinadh", tile_shape=(32, 32), **bands)
+        scene.lst[0:20, 40:60]
+        self.assertEqual(
+            bands["landsat_band_10"].windows, [(slice(0, 32), slice(32, 64))]
+        )
+
+    def test_that_overlapping_requests_reuse_cached_tiles(self):
+        scene = LSTScene("price", "gopinadh", tile_shape=(32, 32), **self.bands)
+        scene.lst[0:40, 0:40]
+        self.assertEqual(scene.lst.cache_info()["misses"], 4)
+        scene.lst[10:70, 10:30]
+        self.assertEqual(scene.lst.cache_info()["hits"], 2)
+        self.assertEqual(scene.lst.cache_info()["misses"], 5)
+
+    def test_that_cache_is_bounded(self):
+        scene = LSTScene(
+            "price", "gopinadh", tile_shape=(32, 32), cache_tiles=3, **self.bands
+        )
+        np.asarray(scene.lst)
+        self.assertEqual(scene.lst.cache_info()["cached_tiles"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
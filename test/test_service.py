@@ -0,0 +1,130 @@
+import os
+import tempfile
+import threading
+import unittest
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from pylandtemp.pipeline import LSTService, LSTServiceClient, QueueFullError
+from pylandtemp.exceptions import InputShapesNotEqual
+from pylandtemp.pipeline import TiledPipeline
+from pylandtemp.pipeline.jobs import run_job
+
+from synthetic import synthetic_bands
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "Unix domain sockets are required")
+class TestLSTService(unittest.TestCase):
+    shape = (40, 50)
+    bands = synthetic_bands(shape, seed=6, nodata=np.s_[:, :2])
+    expected = TiledPipeline("jiminez-munoz")(**bands)
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.address = os.path.join(self.directory.name, "lst.sock")
+        self.service = LSTService(self.address, tile_shape=(16, 16)).start()
+        self.client = LSTServiceClient(self.address, timeout=30)
+
+    def tearDown(self):
+        self.service.shutdown()
+        self.directory.cleanup()
+
+    def test_that_file_job_writes_output(self):
+        paths = {}
+        for name, band in self.bands.items():
+            paths[name] = {"path": os.path.join(self.directory.name, f"{name}.npy")}
+            np.save(paths[name]["path"], band)
+        output = os.path.join(self.directory.name, "lst.npy")
+
+        self.client.compute("jiminez-munoz", paths, {"path": output})
+        np.testing.assert_allclose(np.load(output), self.expected, equal_nan=True)
+
+        stats = self.client.stats()
+        self.assertEqual(stats["completed"], 1)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertEqual(stats["cached_pipelines"], 1)
+
+    def test_that_shared_memory_job_writes_output(self):
+        segments, bands = [], {}
+        try:
+            for name, band in self.bands.items():
+                segments.append(
+                    shared_memory.SharedMemory(create=True, size=band.nbytes)
+                )
+                np.ndarray(band.shape, band.dtype, buffer=segments[-1].buf)[:] = band
+                bands[name] = {
+                    "shm": segments[-1].name,
+                    "shape": list(band.shape),
+                    "dtype": band.dtype.str,
+                }
+            segments.append(
+                shared_memory.SharedMemory(create=True, size=self.expected.nbytes)
+            )
+            self.client.compute("jiminez-munoz", bands, {"shm": segments[-1].name})
+            output = np.ndarray(self.shape, np.float64, buffer=segments[-1].buf)
+            np.testing.assert_allclose(output, self.expected, equal_nan=True)
+            del output
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+
+    def test_that_errors_are_reported(self):
+        with self.assertRaises(RuntimeError):
+            self.client.compute("not-a-method", {}, {"path": "unused.npy"})
+        self.assertEqual(self.client.stats()["failed"], 1)
+
+
+class TestLSTServiceResources(unittest.TestCase):
+    def test_that_job_errors_are_not_hidden_by_shared_memory(self):
+        segments, bands = [], {}
+        try:
+            for name, shape in (
+                ("landsat_band_10", (4, 5)),
+                ("landsat_band_4", (5, 5)),
+            ):
+                segments.append(shared_memory.SharedMemory(create=True, size=200))
+                bands[name] = {"shm": segments[-1].name, "shape": shape, "dtype": "<f8"}
+            bands["landsat_band_5"] = bands["landsat_band_4"]
+            with self.assertRaises(InputShapesNotEqual):
+                run_job(
+                    TiledPipeline("mono-window"),
+                    {"bands": bands, "output": {"path": "unused.npy"}},
+                )
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+
+    def test_that_other_files_at_the_address_are_kept(self):
+        with tempfile.TemporaryDirectory() as directory:
+            address = os.path.join(directory, "lst.sock")
+            with open(address, "w") as file:
+                file.write("not a socket")
+            with self.assertRaises(ValueError):
+                LSTService(address).start()
+            self.assertTrue(os.path.isfile(address))
+
+
+class TestLSTServiceQueue(unittest.TestCase):
+    def test_that_full_queue_rejects_jobs(self):
+        service = LSTService("unused.sock", max_concurrent_jobs=1, max_queued_jobs=1)
+        release = threading.Event()
+        service.compute = lambda job: release.wait()
+        try:
+            service.submit({})
+            # Wait until the first job runs, so that the second one is queued
+            while service.stats()["running"] == 0:
+                pass
+            service.submit({})
+            self.assertEqual(service.stats()["queue_depth"], 1)
+            with self.assertRaises(QueueFullError):
+                service.submit({})
+        finally:
+            release.set()
+            service.executor.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
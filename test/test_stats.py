@@ -0,0 +1,79 @@
+import unittest
+
+import numpy as np
+
+from pylandtemp import ndvi, brightness_temperature, emissivity
+from pylandtemp.pipeline import StatsCollector, SummaryAccumulator, TiledPipeline
+
+from synthetic import synthetic_bands
+
+
+class TestStageStatistics(unittest.TestCase):
+    rng = np.random.default_rng(14)
+    shape = (50, 60)
+    bands = synthetic_bands(shape, seed=14, nodata=np.s_[:3])
+    band_10 = bands["landsat_band_10"]
+
+    def test_that_stage_summaries_match_full_images(self):
+        pipeline = TiledPipeline(
+            "jiminez-munoz", "xiaolei", tile_shape=(16, 16), max_workers=4
+        )
+        lst, summary = pipeline(stats=True, **self.bands)
+        np.testing.assert_array_equal(lst, pipeline(**self.bands))
+
+        mask = self.band_10 == 0
+        ndvi_image = ndvi(
+            self.bands["landsat_band_5"], self.bands["landsat_band_4"], mask
+        )
+        temperature_10, temperature_11 = brightness_temperature(
+            self.band_10, self.bands["landsat_band_11"], mask
+        )
+        emissivity_10, _ = emissivity(
+            ndvi_image, self.bands["landsat_band_4"], "xiaolei"
+        )
+        expected = {
+            "ndvi": ndvi_image,
+            "brightness_temperature_10": temperature_10,
+            "brightness_temperature_11": temperature_11,
+            "emissivity_10": emissivity_10,
+            "lst": lst,
+        }
+        for stage, image in expected.items():
+            values = image[~np.isnan(image)]
+            self.assertEqual(summary[stage]["count"], len(values))
+            self.assertEqual(summary[stage]["nan_count"], image.size - len(values))
+            self.assertAlmostEqual(summary[stage]["mean"], values.mean())
+            self.assertAlmostEqual(summary[stage]["std"], values.std())
+            self.assertEqual(summary[stage]["min"], values.min())
+            self.assertEqual(summary[stage]["max"], values.max())
+            edges = summary[stage]["bin_edges"]
+            width = edges[1] - edges[0]
+            self.assertLessEqual(
+                abs(summary[stage]["percentiles"][50] - np.median(values)), 2 * width
+            )
+
+    def test_that_merging_is_exact_for_counts_and_histograms(self):
+        values = self.rng.normal(300, 5, 10000)
+        whole = SummaryAccumulator.from_values(values, (250, 350), bins=100)
+        merged = SummaryAccumulator((250, 350), bins=100)
+        for part in np.array_split(values, 7):
+            merged.merge(SummaryAccumulator.from_values(part, (250, 350), bins=100))
+        np.testing.assert_array_equal(merged.histogram, whole.histogram)
+        self.assertEqual(merged.count, whole.count)
+        self.assertAlmostEqual(merged.mean, whole.mean)
+        self.assertAlmostEqual(merged.m2, whole.m2, places=6)
+
+    def test_that_quantized_celcius_output_is_unchanged(self):
+        pipeline = TiledPipeline(
+            "mono-window", unit="celcius", tile_shape=(16, 16), quantize=True
+        )
+        collector = StatsCollector(unit="celcius", bins=64)
+        lst, summary = pipeline(stats=collector, **self.bands)
+        np.testing.assert_array_equal(lst, pipeline(**self.bands))
+        self.assertNotIn("emissivity_11", summary)
+        self.assertLess(summary["lst"]["max"], 60)
+        self.assertEqual(len(summary["lst"]["histogram"]), 64)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import unittest
+
+import numpy as np
+
+from pylandtemp import brightness_temperature, single_window, split_window
+from pylandtemp.masks import nodata_mask
+from pylandtemp.pipeline import TiledPipeline
+from pylandtemp.utils import block_nanmean, block_sum, repeat_blocks
+
+
+def resampled_thermal_band(shape, spread, seed):
+    # 100 m digital numbers linearly resampled to 30 m, like the delivered thermal bands
+    rng = np.random.default_rng(seed)
+    native = rng.normal(25000, spread, (shape[0] // 3 + 2, shape[1] // 3 + 2))
+    rows = np.arange(shape[0]) / 3
+    cols = np.arange(shape[1]) / 3
+    native = np.array(
+        [np.interp(cols, np.arange(native.shape[1]), row) for row in native]
+    )
+    return np.array(
+        [np.interp(rows, np.arange(native.shape[0]), col) for col in native.T]
+    ).T
+
+
+class TestThermalFactor(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        self.shape = (150, 181)
+        self.red = rng.uniform(6000, 12000, self.shape)
+        self.nir = rng.uniform(4000, 25000, self.shape)
+
+    def test_that_block_helpers_match_block_nanmean(self):
+        image = np.random.default_rng(0).uniform(0, 100, (10, 11))
+        np.testing.assert_allclose(
+            block_sum(image, 3) / block_sum(np.ones_like(image), 3),
+            block_nanmean(image, 3),
+        )
+        repeated = repeat_blocks(block_nanmean(image, 3), 3, image.shape)
+        self.assertEqual(repeated.shape, image.shape)
+        np.testing.assert_array_equal(repeated[3:6, 6:9], block_nanmean(image, 3)[1, 2])
+
+    def test_that_native_resolution_bands_are_exact(self):
+        # Thermal bands constant over 3 x 3 blocks, with nodata pixels within blocks
+        rng = np.random.default_rng(12)
+        band_10 = repeat_blocks(
+            rng.uniform(18000, 30000, (50, 61)).round(), 3, self.shape
+        )
+        band_10[10:14, 20:25] = 0
+        band_11 = band_10 * 0.95
+        exact = split_window(band_10, band_11, self.red, self.nir, "kerr", "avdan")
+        blocks = split_window(
+            band_10, band_11, self.red, self.nir, "kerr", "avdan", thermal_factor=3
+        )
+        np.testing.assert_array_equal(np.isnan(blocks), np.isnan(exact))
+        np.testing.assert_allclose(blocks, exact, rtol=1e-12, equal_nan=True)
+
+        mask = nodata_mask(band_10)
+        for exact_temperature, block_temperature in zip(
+            brightness_temperature(band_10, band_11, mask=mask),
+            brightness_temperature(band_10, band_11, mask=mask, thermal_factor=3),
+        ):
+            np.testing.assert_allclose(
+                block_temperature, exact_temperature, rtol=1e-12, equal_nan=True
+            )
+
+    def test_that_masked_pixels_are_excluded_per_row_block(self):
+        # Scattered nodata over several row blocks, masked band 11 values are NaN
+        rng = np.random.default_rng(17)
+        band_10 = rng.uniform(18000, 30000, (600, 40))
+        band_10[rng.uniform(size=band_10.shape) < 0.1] = 0
+        band_10[300:303, :3] = 0
+        band_11 = np.where(band_10 == 0, np.nan, band_10 * 0.95)
+        expected = brightness_temperature(
+            block_nanmean(np.where(band_10 == 0, np.nan, band_10), 3),
+            block_nanmean(band_11, 3),
+        )
+        for mask in (nodata_mask(band_10), band_10 == 0):
+            temperatures = brightness_temperature(
+                band_10, band_11, mask=mask, thermal_factor=3
+            )
+            for temperature, block_temperature in zip(temperatures, expected):
+                block_temperature = repeat_blocks(block_temperature, 3, band_10.shape)
+                block_temperature[band_10 == 0] = np.nan
+                np.testing.assert_allclose(
+                    temperature, block_temperature, rtol=1e-12, equal_nan=True
+                )
+
+    def test_that_resampled_bands_error_is_bounded(self):
+        # Native pixels about 2 K apart: errors come from the variation within blocks
+        band_10 = resampled_thermal_band(self.shape, 300, 13)
+        exact = single_window(band_10, self.red, self.nir)
+        error = np.abs(
+            single_window(band_10, self.red, self.nir, thermal_factor=3) - exact
+        )
+        self.assertLess(np.nanmean(error), 0.3)
+        self.assertLess(np.nanpercentile(error, 99), 1.2)
+
+        # Smoother fields are closer
+        band_10 = resampled_thermal_band(self.shape, 50, 13)
+        exact = single_window(band_10, self.red, self.nir)
+        error = np.abs(
+            single_window(band_10, self.red, self.nir, thermal_factor=3) - exact
+        )
+        self.assertLess(np.nanmean(error), 0.05)
+
+    def test_that_tiles_match_the_whole_scene(self):
+        band_10 = resampled_thermal_band(self.shape, 300, 14)
+        band_10[:5, :8] = 0
+        bands = {
+            "landsat_band_10": band_10,
+            "landsat_band_11": band_10 * 0.95,
+            "landsat_band_4": self.red,
+            "landsat_band_5": self.nir,
+        }
+        expected = split_window(
+            band_10,
+            band_10 * 0.95,
+            self.red,
+            self.nir,
+            "jiminez-munoz",
+            "avdan",
+            unit="celcius",
+            thermal_factor=3,
+        )
+        lst = TiledPipeline(
+            "jiminez-munoz", unit="celcius", tile_shape=(48, 60), thermal_factor=3
+        )(**bands)
+        np.testing.assert_array_equal(lst, expected)
+
+    def test_that_invalid_factors_raise(self):
+        with self.assertRaises(ValueError):
+            TiledPipeline("mono-window", tile_shape=(64, 64), thermal_factor=3)
+        with self.assertRaises(ValueError):
+            TiledPipeline(
+                "mono-window", tile_shape=(60, 60), thermal_factor=3, stage_workers=2
+            )
+        band = np.ones((6, 6))
+        with self.assertRaises(ValueError):
+            brightness_temperature(band, thermal_factor=2.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import io
+import threading
+import unittest
+import unittest.mock
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+from pylandtemp.pipeline import ByteLRUCache, TiledPipeline, TileServer
+from pylandtemp.utils import block_nanmean
+
+from synthetic import synthetic_bands
+
+
+def load(content):
+    return np.load(io.BytesIO(content))
+
+
+class TestTileServer(unittest.TestCase):
+    shape = (100, 70)
+    bands = synthetic_bands(shape, seed=7, nodata=np.s_[:, :3], split_window=False)
+    expected = TiledPipeline("mono-window")(**bands)
+
+    def test_that_full_resolution_tiles_match_scene(self):
+        server = TileServer("mono-window", tile_size=32, **self.bands)
+        self.assertEqual(server.max_zoom, 2)
+        tile = load(server.get_tile("lst", 2, 1, 3, format="npy"))
+        np.testing.assert_allclose(tile[:4, :32], self.expected[96:100, 32:64])
+        self.assertTrue(np.isnan(tile[4:]).all())
+
+    def test_that_lower_zoom_aggregates_higher_zoom(self):
+        server = TileServer("mono-window", tile_size=32, **self.bands)
+        padded = np.full((128, 128), np.nan)
+        padded[:100, :70] = self.expected
+        level_1 = block_nanmean(padded, 2)
+        np.testing.assert_allclose(
+            load(server.get_tile("lst", 1, 0, 1, format="npy")),
+            level_1[32:64, :32],
+            equal_nan=True,
+        )
+        np.testing.assert_allclose(
+            load(server.get_tile("lst", 0, 0, 0, format="npy")),
+            block_nanmean(level_1, 2),
+            equal_nan=True,
+        )
+
+    def test_that_repeated_requests_are_served_from_cache(self):
+        server = TileServer("mono-window", tile_size=32, **self.bands)
+        first = server.get_tile("ndvi", 2, 0, 0)
+        hits = server.cache.info()["hits"]
+        self.assertEqual(server.get_tile("ndvi", 2, 0, 0), first)
+        self.assertEqual(server.cache.info()["hits"], hits + 1)
+        self.assertTrue(first.startswith(b"\x89PNG\r\n\x1a\n"))
+
+    def test_that_tiles_outside_scene_raise(self):
+        server = TileServer("mono-window", tile_size=32, **self.bands)
+        with self.assertRaises(KeyError):
+            server.get_tile("lst", 2, 3, 0)
+
+    def test_that_cached_values_are_read_only(self):
+        server = TileServer("mono-window", tile_size=32, **self.bands)
+        values = server.tile_values("lst", 1, 0, 0)
+        with self.assertRaises(ValueError):
+            values[0, 0] = 0
+        self.assertIs(server.tile_values("lst", 1, 0, 0), values)
+
+    def test_that_http_server_reports_errors(self):
+        server = TileServer("mono-window", tile_size=32, **self.bands)
+        http_server = server.make_http_server(port=0)
+        thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+        thread.start()
+        address = f"http://127.0.0.1:{http_server.server_address[1]}"
+        try:
+            with self.assertRaises(urllib.error.HTTPError) as missing:
+                urllib.request.urlopen(f"{address}/lst/2/9/0.png", timeout=10)
+            self.assertEqual(missing.exception.code, 404)
+            with unittest.mock.patch.object(
+                server, "tile_values", side_effect=RuntimeError("unreadable band")
+            ):
+                with self.assertRaises(urllib.error.HTTPError) as failed:
+                    urllib.request.urlopen(f"{address}/lst/2/0/0.png", timeout=10)
+            self.assertEqual(failed.exception.code, 500)
+        finally:
+            http_server.shutdown()
+            http_server.server_close()
+
+    def test_that_http_server_serves_tiles(self):
+        server = TileServer("mono-window", tile_size=32, **self.bands)
+        http_server = server.make_http_server(port=0)
+        thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = (
+                f"http://127.0.0.1:{http_server.server_address[1]}/emissivity/2/0/0.png"
+            )
+            with urllib.request.urlopen(url, timeout=10) as response:
+                self.assertEqual(response.headers["Content-Type"], "image/png")
+                self.assertEqual(
+                    response.read(), server.get_tile("emissivity", 2, 0, 0)
+                )
+        finally:
+            http_server.shutdown()
+            http_server.server_close()
+
+
+class TestByteLRUCache(unittest.TestCase):
+    def test_that_cache_is_bounded_by_bytes(self):
+        cache = ByteLRUCache(max_bytes=10)
+        cache.put("a", b"1234")
+        cache.put("b", b"1234")
+        cache.get("a")
+        cache.put("c", b"1234")
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertLessEqual(cache.nbytes, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
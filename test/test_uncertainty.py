@@ -0,0 +1,100 @@
+import unittest
+import warnings
+
+import numpy as np
+
+from pylandtemp.pipeline import MonteCarloLST, TiledPipeline
+
+from synthetic import synthetic_bands
+
+NO_UNCERTAINTY = {
+    "landsat_band_10": 0,
+    "landsat_band_11": 0,
+    "landsat_band_4": 0,
+    "landsat_band_5": 0,
+    "emissivity": 0,
+    "cwv": 0,
+    "k1": 0,
+    "k2": 0,
+}
+
+
+class TestMonteCarloLST(unittest.TestCase):
+    def bands(self, shape=(30, 40)):
+        return synthetic_bands(shape, seed=4, nodata=np.s_[:3, :4])
+
+    def test_that_unperturbed_samples_match_the_lst(self):
+        bands = self.bands()
+        for lst_method, emissivity_method in (
+            ("mono-window", "avdan"),
+            ("jiminez-munoz", "xiaolei"),
+            ("kerr", "gopinadh"),
+        ):
+            expected = TiledPipeline(lst_method, emissivity_method)(**bands)
+            result = MonteCarloLST(
+                lst_method,
+                emissivity_method,
+                samples=4,
+                uncertainties=NO_UNCERTAINTY,
+                tile_shape=(16, 16),
+            )(**bands)
+            np.testing.assert_allclose(result["mean"], expected, rtol=1e-12)
+            np.testing.assert_allclose(result["p5"], expected, rtol=1e-12)
+            np.testing.assert_allclose(result["std"][~np.isnan(expected)], 0, atol=1e-9)
+
+    def test_that_uncertainty_is_propagated(self):
+        bands = self.bands()
+        options = dict(samples=64, tile_shape=(16, 16), memory_budget=2**16)
+        result = MonteCarloLST("jiminez-munoz", "xiaolei", **options)(**bands)
+        self.assertEqual(set(result), {"mean", "std", "p5", "p95"})
+        valid = ~np.isnan(result["mean"])
+        self.assertTrue(np.isnan(result["mean"][:3, :4]).all())
+        # A few pixels near the temperature cap keep a single valid sample
+        self.assertGreater((result["std"][valid] > 0).mean(), 0.99)
+        self.assertTrue((result["p5"][valid] <= result["p95"][valid]).all())
+        again = MonteCarloLST("jiminez-munoz", "xiaolei", **options)(**bands)
+        np.testing.assert_array_equal(again["std"], result["std"])
+
+        # Systematic uncertainties only: every pixel shares the samples of the calibration
+        calibration = dict(NO_UNCERTAINTY, k1=0.01)
+        result = MonteCarloLST(
+            "mono-window", samples=16, uncertainties=calibration, percentiles=()
+        )(**bands)
+        self.assertEqual(set(result), {"mean", "std"})
+        self.assertTrue((result["std"][valid] > 0).all())
+
+    def test_that_water_vapour_perturbation_is_unbiased(self):
+        bands = self.bands()
+        expected = TiledPipeline("jiminez-munoz", "xiaolei")(**bands)
+        result = MonteCarloLST(
+            "jiminez-munoz",
+            "xiaolei",
+            samples=256,
+            uncertainties=dict(NO_UNCERTAINTY, cwv=0.2),
+            percentiles=(),
+        )(**bands)
+        valid = ~np.isnan(expected)
+        self.assertTrue((result["std"][valid] > 0).all())
+        np.testing.assert_allclose(result["mean"], expected, rtol=0, atol=1e-4)
+
+    def test_that_percentiles_match_numpy(self):
+        samples = np.random.default_rng(1).normal(300, 2, (50, 20))
+        samples[3] = np.nan
+        samples[5, 4:] = np.nan
+        samples[7, ::2] = np.nan
+        reduced = MonteCarloLST("mono-window", samples=20)._reduce(samples)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            expected = np.nanpercentile(samples, (5, 95), axis=1)
+        np.testing.assert_allclose(reduced[2], expected[0])
+        np.testing.assert_allclose(reduced[3], expected[1])
+
+    def test_that_invalid_options_are_rejected(self):
+        with self.assertRaises(ValueError):
+            MonteCarloLST("mono-window", samples=1)
+        with self.assertRaises(ValueError):
+            MonteCarloLST("mono-window", uncertainties={"k3": 0.1})
+
+
+if __name__ == "__main__":
+    unittest.main()
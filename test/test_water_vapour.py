@@ -0,0 +1,81 @@
+import unittest
+
+import numpy as np
+
+from pylandtemp import split_window
+from pylandtemp.pipeline import ProgressiveLST, QuicklookPipeline, TiledPipeline
+from pylandtemp.temperature import WaterVapourGrid
+
+from synthetic import synthetic_bands
+
+
+class TestWaterVapourGrid(unittest.TestCase):
+    # 30 m scene with its origin at (1000, 9000), 1.5 km water vapour grid covering it
+    scene_transform = (30.0, 0.0, 1000.0, 0.0, -30.0, 9000.0)
+    grid_transform = (1500.0, 0.0, 0.0, 0.0, -1500.0, 10500.0)
+    grid = np.add.outer(np.arange(5) * 0.5, np.arange(6) * 0.1) + 1.0
+
+    def test_that_interpolation_is_bilinear(self):
+        water_vapour = WaterVapourGrid(
+            self.grid, self.grid_transform, self.scene_transform
+        )
+        rows, cols = np.arange(0, 150), np.arange(0, 180)
+        # Pixel center coordinates in the grid, 0 at the center of the first grid pixel
+        grid_rows = np.clip((1500.0 + (rows + 0.5) * 30) / 1500 - 0.5, 0, 4)
+        grid_cols = np.clip((1000.0 + (cols + 0.5) * 30) / 1500 - 0.5, 0, 5)
+        # The grid is linear, so bilinear interpolation reproduces it exactly
+        expected = np.add.outer(grid_rows * 0.5, grid_cols * 0.1) + 1.0
+        np.testing.assert_allclose(
+            water_vapour((slice(0, 150), slice(0, 180))), expected
+        )
+        np.testing.assert_allclose(
+            water_vapour((slice(20, 60, 4), np.array([3, 170]))),
+            expected[20:60:4][:, [3, 170]],
+        )
+
+    def test_that_non_north_up_transforms_are_rejected(self):
+        with self.assertRaises(ValueError):
+            WaterVapourGrid(
+                self.grid, (1500.0, 10.0, 0.0, 0.0, -1500.0, 0.0), self.scene_transform
+            )
+
+    def test_that_pipeline_interpolates_per_tile(self):
+        shape = (150, 180)
+        bands = synthetic_bands(shape, seed=5, nodata=None)
+        water_vapour = WaterVapourGrid(
+            self.grid, self.grid_transform, self.scene_transform
+        )
+        cwv = water_vapour((slice(0, shape[0]), slice(0, shape[1])))
+        expected = split_window(
+            bands["landsat_band_10"],
+            bands["landsat_band_11"],
+            bands["landsat_band_4"],
+            bands["landsat_band_5"],
+            "jiminez-munoz",
+            "avdan",
+            cwv=cwv,
+        )
+        self.assertFalse(
+            np.allclose(
+                expected, TiledPipeline("jiminez-munoz")(**bands), equal_nan=True
+            )
+        )
+        pipeline = TiledPipeline(
+            "jiminez-munoz", tile_shape=(64, 64), water_vapour=water_vapour
+        )
+        np.testing.assert_allclose(pipeline(**bands), expected)
+        lst, _ = pipeline(stats=True, **bands)
+        np.testing.assert_allclose(lst, expected)
+        progressive = ProgressiveLST("jiminez-munoz", water_vapour=water_vapour)
+        np.testing.assert_allclose(progressive(**bands), expected)
+        quicklook = QuicklookPipeline(
+            "jiminez-munoz", 2, tile_shape=(64, 64), water_vapour=water_vapour
+        )
+        self.assertEqual(quicklook(**bands).shape, (75, 90))
+
+        with self.assertRaises(ValueError):
+            TiledPipeline("kerr", water_vapour=water_vapour)
+
+
+if __name__ == "__main__":
+    unittest.main()
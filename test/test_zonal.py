@@ -0,0 +1,73 @@
+import unittest
+
+import numpy as np
+
+from pylandtemp.pipeline import TiledPipeline, ZonalStatsSink
+
+from synthetic import synthetic_bands
+
+
+class TestZonalStatistics(unittest.TestCase):
+    rng = np.random.default_rng(13)
+    shape = (60, 70)
+    bands = synthetic_bands(shape, seed=13, nodata=np.s_[:4], split_window=False)
+
+    def test_that_zone_statistics_match_the_raster(self):
+        zones = self.rng.integers(-1, 50, self.shape)
+        pipeline = TiledPipeline("mono-window", tile_shape=(16, 16), max_workers=4)
+        stats = pipeline(sink=ZonalStatsSink(zones, bins=8), **self.bands)
+
+        lst = pipeline(**self.bands)
+        for zone in range(50):
+            values = lst[(zones == zone) & ~np.isnan(lst)]
+            self.assertEqual(stats["count"][zone], len(values))
+            if len(values) == 0:
+                self.assertTrue(np.isnan(stats["mean"][zone]))
+                continue
+            self.assertAlmostEqual(stats["mean"][zone], values.mean())
+            self.assertAlmostEqual(stats["std"][zone], values.std())
+            self.assertEqual(stats["min"][zone], values.min())
+            self.assertEqual(stats["max"][zone], values.max())
+            edges = stats["bin_edges"]
+            histogram, _ = np.histogram(
+                np.clip(values, edges[0], edges[-1] - 1e-3), bins=edges
+            )
+            np.testing.assert_array_equal(stats["histogram"][zone], histogram)
+
+    def test_that_quantized_tiles_and_many_zones_are_supported(self):
+        zones = np.arange(np.prod(self.shape)).reshape(self.shape)
+        pipeline = TiledPipeline("mono-window", tile_shape=(32, 32), quantize=True)
+        stats = pipeline(
+            sink=ZonalStatsSink(zones, zone_count=zones.size, bins=0), **self.bands
+        )
+        lst = TiledPipeline("mono-window")(**self.bands)
+        np.testing.assert_allclose(
+            stats["mean"], lst.ravel(), atol=0.006, equal_nan=True
+        )
+        self.assertEqual(stats["histogram"].shape, (zones.size, 0))
+
+    def test_that_histogram_range_follows_the_unit(self):
+        zones = np.zeros(self.shape, dtype=int)
+        pipeline = TiledPipeline("mono-window", unit="celcius")
+        stats = pipeline(sink=ZonalStatsSink(zones, bins=8), **self.bands)
+        np.testing.assert_allclose(stats["bin_edges"][[0, -1]], (-50.0, 60.0))
+        self.assertEqual(stats["histogram"].sum(), stats["count"][0])
+        self.assertLess(stats["histogram"][0, [0, -1]].sum(), stats["count"][0])
+
+        sink = ZonalStatsSink(zones, value_range=(0, 1))
+        sink.open(self.shape, np.float64, (16, 16), attrs={"units": "celcius"})
+        self.assertEqual(sink.value_range, (0, 1))
+        with self.assertRaises(ValueError):
+            ZonalStatsSink(zones).open(
+                self.shape, np.float64, (16, 16), attrs={"units": "count"}
+            )
+
+    def test_that_zone_shape_is_checked(self):
+        with self.assertRaises(ValueError):
+            TiledPipeline("mono-window")(
+                sink=ZonalStatsSink(np.zeros((2, 2), dtype=int)), **self.bands
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()